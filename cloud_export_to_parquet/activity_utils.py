@@ -0,0 +1,81 @@
+import threading
+from contextvars import ContextVar, copy_context
+from functools import wraps
+from typing import Any, Callable, Optional, Type, TypeVar, cast
+
+from temporalio import activity
+from temporalio.converter import value_to_type
+
+F = TypeVar("F", bound=Callable[..., Any])
+T = TypeVar("T")
+
+
+class _Heartbeater:
+    def __init__(self, interval: float, details: list[Any]) -> None:
+        self.interval = interval
+        self.details = details
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            activity.heartbeat(*self.details)
+
+
+_current_heartbeater: ContextVar[Optional[_Heartbeater]] = ContextVar(
+    "_current_heartbeater", default=None
+)
+
+
+def auto_heartbeater(fn: F) -> F:
+    """Heartbeat a sync activity from a background thread at half its heartbeat timeout, sending the last checkpoint.
+
+    A simpler version of the custom decorator sample's `auto_heartbeater`.
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        heartbeat_timeout = activity.info().heartbeat_timeout
+        if not heartbeat_timeout:
+            return fn(*args, **kwargs)
+
+        # Keep sending the last checkpoint of a previous attempt until this attempt checkpoints, so a retry that fails
+        # before then doesn't lose it
+        heartbeater = _Heartbeater(
+            heartbeat_timeout.total_seconds() / 2,
+            list(activity.info().heartbeat_details),
+        )
+        # The thread needs the activity's context to heartbeat
+        thread = threading.Thread(
+            target=copy_context().run, args=(heartbeater.run,), daemon=True
+        )
+        thread.start()
+        token = _current_heartbeater.set(heartbeater)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_heartbeater.reset(token)
+            heartbeater.stopped.set()
+            thread.join()
+
+    return cast(F, wrapper)
+
+
+def checkpoint(state: Any) -> None:
+    """Record the progress of the current activity so a retry can continue from it with `resume_state`.
+
+    The state is heartbeated right away (the SDK throttles heartbeats, but always sends the latest), and sent again with
+    every automatic heartbeat.
+    """
+    heartbeater = _current_heartbeater.get()
+    if heartbeater is not None:
+        heartbeater.details = [state]
+    activity.heartbeat(state)
+
+
+def resume_state(state_type: Type[T]) -> Optional[T]:
+    """The last state checkpointed by a previous attempt of the current activity as a `state_type`, or None on the
+    first attempt (or if no previous attempt checkpointed)."""
+    details = activity.info().heartbeat_details
+    if not details:
+        return None
+    return value_to_type(state_type, details[0])
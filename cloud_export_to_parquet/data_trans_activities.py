@@ -1,7 +1,6 @@
 import json
-import uuid
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import List, Sequence
 
 import boto3
 import pandas as pd
@@ -9,6 +8,15 @@ import temporalio.api.export.v1 as export
 from google.protobuf.json_format import MessageToJson
 from temporalio import activity
 
+from cloud_export_to_parquet.activity_utils import (
+    auto_heartbeater,
+    checkpoint,
+    resume_state,
+)
+
+# Number of workflow executions converted and written to each parquet file
+EXECUTIONS_PER_FILE = 100
+
 
 @dataclass
 class GetObjectKeysActivityInput:
@@ -24,6 +32,14 @@ class DataTransAndLandActivityInput:
     write_path: str
 
 
+@dataclass
+class DataTransAndLandProgress:
+    """How far data_trans_and_land got through its file."""
+
+    next_execution: int = 0
+    written_keys: List[str] = field(default_factory=list)
+
+
 @activity.defn
 def get_object_keys(activity_input: GetObjectKeysActivityInput) -> List[str]:
     """Function that list objects by key."""
@@ -43,16 +59,36 @@ def get_object_keys(activity_input: GetObjectKeysActivityInput) -> List[str]:
 
 
 @activity.defn
-def data_trans_and_land(activity_input: DataTransAndLandActivityInput) -> str:
-    """Function that convert proto to parquet and save to S3."""
+@auto_heartbeater
+def data_trans_and_land(activity_input: DataTransAndLandActivityInput) -> List[str]:
+    """Function that convert proto to parquet and save to S3, resuming where a previous attempt left off."""
     key = activity_input.object_key
     data = get_data_from_object_key(activity_input.export_s3_bucket, key)
-    activity.logger.info("Convert proto to parquet for file: %s", key)
-    parquet_data = convert_proto_to_parquet_flatten(data)
+    progress = resume_state(DataTransAndLandProgress) or DataTransAndLandProgress()
+    if progress.next_execution:
+        activity.logger.info(
+            "Resuming file %s at workflow execution %d", key, progress.next_execution
+        )
+
+    executions = data.items
+    for start in range(progress.next_execution, len(executions), EXECUTIONS_PER_FILE):
+        end = min(start + EXECUTIONS_PER_FILE, len(executions))
+        activity.logger.info(
+            "Convert proto to parquet for file: %s (executions %d-%d)", key, start, end
+        )
+        parquet_data = convert_proto_to_parquet_flatten(executions[start:end])
+        written_key = save_to_sink(
+            parquet_data,
+            activity_input.output_s3_bucket,
+            activity_input.write_path,
+            parquet_file_name(key, start),
+        )
+        # Checkpoint after each parquet file is written, so a retry doesn't convert or write it again. A retry that
+        # missed the checkpoint writes the same file name again, overwriting the file rather than duplicating rows.
+        progress = DataTransAndLandProgress(end, progress.written_keys + [written_key])
+        checkpoint(progress)
     activity.logger.info("Finish transformation for file: %s", key)
-    return save_to_sink(
-        parquet_data, activity_input.output_s3_bucket, activity_input.write_path
-    )
+    return progress.written_keys
 
 
 def get_data_from_object_key(
@@ -71,10 +107,12 @@ def get_data_from_object_key(
     return v
 
 
-def convert_proto_to_parquet_flatten(wfs: export.WorkflowExecutions) -> pd.DataFrame:
+def convert_proto_to_parquet_flatten(
+    wfs: Sequence[export.WorkflowExecution],
+) -> pd.DataFrame:
     """Function that convert flatten proto data to parquet."""
     dfs = []
-    for wf in wfs.items:
+    for wf in wfs:
         start_attributes = wf.history.events[
             0
         ].workflow_execution_started_event_attributes
@@ -106,11 +144,16 @@ def convert_proto_to_parquet_flatten(wfs: export.WorkflowExecutions) -> pd.DataF
     return df_flatten
 
 
-def save_to_sink(data: pd.DataFrame, s3_bucket: str, write_path: str) -> str:
+def parquet_file_name(object_key: str, start: int) -> str:
+    """Name of the parquet file for the workflow executions of an exported file from `start` on."""
+    return f"{object_key.replace('/', '_')}-{start:08d}.parquet"
+
+
+def save_to_sink(
+    data: pd.DataFrame, s3_bucket: str, write_path: str, file_name: str
+) -> str:
     """Function that save object to s3 bucket."""
     write_bytes = data.to_parquet(None, compression="snappy", index=False)
-    uuid_name = uuid.uuid1()
-    file_name = f"{uuid_name}.parquet"
     activity.logger.info("Writing to S3 bucket: %s", file_name)
 
     s3 = boto3.client("s3")
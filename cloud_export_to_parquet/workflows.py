@@ -65,6 +65,8 @@ class ProtoToParquet:
                     data_trans_and_land,
                     data_trans_and_land_input,
                     start_to_close_timeout=timedelta(minutes=15),
+                    # Heartbeats carry the activity's progress, so a retry resumes mid-file
+                    heartbeat_timeout=timedelta(minutes=1),
                     retry_policy=retry_policy,
                 )
         except ActivityError as output_err:
@@ -1,9 +1,12 @@
 from temporalio import activity
 
 from context_propagation import shared
+from context_propagation.deadline import remaining_time
 
 
 @activity.defn
 async def say_hello_activity(name: str) -> str:
-    activity.logger.info(f"Activity called by user {shared.user_id.get()}")
+    activity.logger.info(
+        f"Activity called by user {shared.user_id.get()} with {remaining_time()} left until the deadline"
+    )
     return f"Hello, {name}"
@@ -0,0 +1,112 @@
+"""End-to-end deadline propagation.
+
+An absolute deadline set by the caller travels with every call, including to the new run of a workflow that continues
+as new. Outbound activities, child workflows and continued runs have their timeouts clamped to the remaining budget,
+and activities and workflows whose budget is already exhausted are rejected before doing any work, so nothing keeps
+running after the original caller has given up.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any, Iterator, Optional
+
+import temporalio.workflow
+from temporalio.exceptions import ApplicationError
+
+from context_propagation.propagation import ContextVarPropagator, FloatSerializer
+
+# Absolute deadline as seconds since the epoch
+deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+# Outbound calls that have their timeouts clamped
+_ACTIVITY_CALLS = {"start_activity", "start_local_activity"}
+_WORKFLOW_CALLS = {"start_workflow", "start_child_workflow"}
+
+# Inbound calls that are rejected once the deadline has passed. Signals, queries and updates are still delivered.
+_REJECTED_INBOUND_CALLS = {"execute_activity", "execute_workflow"}
+
+
+def _now() -> float:
+    # Workflows must use workflow time to stay deterministic
+    if temporalio.workflow.in_workflow():
+        return temporalio.workflow.now().timestamp()
+    return time.time()
+
+
+@contextmanager
+def deadline_after(timeout: timedelta) -> Iterator[None]:
+    """Set a deadline `timeout` from now for calls made inside the block. An existing earlier deadline is kept."""
+    new_deadline = _now() + timeout.total_seconds()
+    current = deadline.get()
+    token = deadline.set(
+        new_deadline if current is None else min(current, new_deadline)
+    )
+    try:
+        yield
+    finally:
+        deadline.reset(token)
+
+
+def remaining_time() -> Optional[timedelta]:
+    """Time left until the current deadline (never negative), or None if there is no deadline."""
+    current = deadline.get()
+    if current is None:
+        return None
+    return timedelta(seconds=max(0.0, current - _now()))
+
+
+def _deadline_exceeded(kind: str, name: str) -> ApplicationError:
+    return ApplicationError(
+        f"Deadline exceeded before {kind} {name}",
+        type="DeadlineExceeded",
+        non_retryable=True,
+    )
+
+
+def _clamp(timeout: Optional[timedelta], remaining: timedelta) -> timedelta:
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+class DeadlinePropagator(ContextVarPropagator[float]):
+    """Propagates `deadline`, clamping the timeouts of outbound calls and rejecting late inbound ones."""
+
+    def __init__(self, name: str = "deadline") -> None:
+        super().__init__(name, deadline, FloatSerializer())
+
+    @contextmanager
+    def outbound_call(self, kind: str, name: str, input: Any) -> Iterator[None]:
+        remaining = remaining_time()
+        if remaining is not None and (
+            kind in _ACTIVITY_CALLS or kind in _WORKFLOW_CALLS
+        ):
+            if not remaining:
+                raise _deadline_exceeded(kind, name)
+            if kind in _ACTIVITY_CALLS:
+                # The server enforces schedule_to_close across all attempts, so retries can't outlive the deadline
+                input.schedule_to_close_timeout = _clamp(
+                    input.schedule_to_close_timeout, remaining
+                )
+                if input.start_to_close_timeout is not None:
+                    input.start_to_close_timeout = min(
+                        input.start_to_close_timeout, remaining
+                    )
+            else:
+                input.execution_timeout = _clamp(input.execution_timeout, remaining)
+                if input.run_timeout is not None:
+                    input.run_timeout = min(input.run_timeout, remaining)
+        elif remaining is not None and kind == "continue_as_new":
+            if not remaining:
+                raise _deadline_exceeded(kind, name)
+            # The execution timeout carries over to the new run, but the run timeout is set anew
+            input.run_timeout = _clamp(input.run_timeout, remaining)
+        yield
+
+    @contextmanager
+    def inbound_call(self, kind: str, name: str, input: Any) -> Iterator[None]:
+        if kind in _REJECTED_INBOUND_CALLS and remaining_time() == timedelta(0):
+            raise _deadline_exceeded(kind, name)
+        yield
@@ -1,6 +1,32 @@
 from contextvars import ContextVar
-from typing import Optional
+from typing import Any, Optional
 
-HEADER_KEY = "__my_user_id"
+from context_propagation.deadline import DeadlinePropagator
+from context_propagation.propagation import (
+    ContextPropagator,
+    ContextVarPropagator,
+    Serializer,
+    StrSerializer,
+)
 
 user_id: ContextVar[Optional[str]] = ContextVar("user_id", default=None)
+
+# Context propagated by ContextPropagationInterceptor. Register more with propagate_context_var, or add other
+# propagators, before creating clients or workers.
+propagators: list[ContextPropagator] = [
+    # Earlier versions of this sample sent the user ID in its own header
+    ContextVarPropagator(
+        "user_id", user_id, StrSerializer(), legacy_header_key="__my_user_id"
+    ),
+    DeadlinePropagator(),
+]
+
+
+def propagate_context_var(
+    name: str, var: ContextVar[Optional[Any]], serializer: Serializer[Any]
+) -> None:
+    """Register another context var for the interceptor to propagate.
+
+    Must be called before any clients or workers are created.
+    """
+    propagators.append(ContextVarPropagator(name, var, serializer))
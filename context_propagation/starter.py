@@ -1,10 +1,12 @@
 import asyncio
 import logging
+from datetime import timedelta
 
 from temporalio.client import Client
 from temporalio.envconfig import ClientConfig
 
 from context_propagation import interceptor, shared, workflows
+from context_propagation.deadline import deadline_after
 
 
 async def main():
@@ -23,14 +25,15 @@ async def main():
         interceptors=[interceptor.ContextPropagationInterceptor()],
     )
 
-    # Start workflow, send signal, wait for completion, issue query
-    handle = await client.start_workflow(
-        workflows.SayHelloWorkflow.run,
-        "Temporal",
-        id=f"context-propagation-workflow-id",
-        task_queue="context-propagation-task-queue",
-    )
-    await handle.signal(workflows.SayHelloWorkflow.signal_complete)
+    # Start workflow and send signal with a minute to finish, wait for completion
+    with deadline_after(timedelta(minutes=1)):
+        handle = await client.start_workflow(
+            workflows.SayHelloWorkflow.run,
+            "Temporal",
+            id=f"context-propagation-workflow-id",
+            task_queue="context-propagation-task-queue",
+        )
+        await handle.signal(workflows.SayHelloWorkflow.signal_complete)
     result = await handle.result()
     logging.info(f"Workflow result: {result}")
 
@@ -0,0 +1,66 @@
+import dataclasses
+from typing import Any, Optional, Type
+
+import temporalio.converter
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import (
+    BinaryPlainPayloadConverter,
+    CompositePayloadConverter,
+    DefaultPayloadConverter,
+    EncodingPayloadConverter,
+)
+
+
+class BinaryPassthroughEncodingPayloadConverter(EncodingPayloadConverter):
+    """Puts bytes-like values directly in the payload data.
+
+    The default converter only does this for ``bytes``. A ``bytearray`` or
+    ``memoryview`` falls through to the JSON converter, which writes it as a
+    list of numbers, more than tripling its size. This converter takes all
+    three, and decodes to whichever of them the type hint asks for. Decoding
+    to ``memoryview`` wraps the payload data without copying it.
+    """
+
+    @property
+    def encoding(self) -> str:
+        return "binary/plain"
+
+    def to_payload(self, value: Any) -> Optional[Payload]:
+        if isinstance(value, bytes):
+            data = value
+        elif isinstance(value, (bytearray, memoryview)):
+            # Protobuf needs bytes, so this is the one copy we can't avoid
+            data = bytes(value)
+        else:
+            return None
+        return Payload(metadata={"encoding": self.encoding.encode()}, data=data)
+
+    def from_payload(self, payload: Payload, type_hint: Optional[Type] = None) -> Any:
+        if type_hint is memoryview:
+            return memoryview(payload.data)
+        elif type_hint is bytearray:
+            return bytearray(payload.data)
+        else:
+            return payload.data
+
+
+class BinaryPassthroughPayloadConverter(CompositePayloadConverter):
+    def __init__(self) -> None:
+        # Replace the default binary/plain converter with ours
+        super().__init__(
+            *(
+                (
+                    c
+                    if not isinstance(c, BinaryPlainPayloadConverter)
+                    else BinaryPassthroughEncodingPayloadConverter()
+                )
+                for c in DefaultPayloadConverter.default_encoding_payload_converters
+            )
+        )
+
+
+# Use the default data converter, but change the payload converter.
+binary_passthrough_data_converter = dataclasses.replace(
+    temporalio.converter.default(),
+    payload_converter_class=BinaryPassthroughPayloadConverter,
+)
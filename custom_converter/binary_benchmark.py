@@ -0,0 +1,68 @@
+import argparse
+import os
+import time
+from typing import Any
+
+import temporalio.converter
+
+from custom_converter.binary import binary_passthrough_data_converter
+
+
+def measure(
+    data_converter: temporalio.converter.DataConverter,
+    value: Any,
+    type_hint: Any,
+    iterations: int,
+) -> tuple[float, int]:
+    """Returns the average round trip time in milliseconds and the payload size in bytes."""
+    payload_converter = data_converter.payload_converter
+    start = time.perf_counter()
+    for _ in range(iterations):
+        payloads = payload_converter.to_payloads([value])
+        payload_converter.from_payloads(payloads, [type_hint])
+    elapsed = time.perf_counter() - start
+    return elapsed / iterations * 1000, payloads[0].ByteSize()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the binary passthrough converter with the default converter"
+    )
+    parser.add_argument(
+        "--sizes-mb",
+        type=float,
+        nargs="+",
+        default=[0.1, 1, 4],
+        help="blob sizes in megabytes",
+    )
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    for size_mb in args.sizes_mb:
+        blob = os.urandom(int(size_mb * 1024 * 1024))
+        print(f"{size_mb} MB blob:")
+        for name, data_converter in [
+            ("default", temporalio.converter.default()),
+            ("passthrough", binary_passthrough_data_converter),
+        ]:
+            for value, type_hint in [
+                (blob, bytes),
+                (bytearray(blob), bytearray),
+                (memoryview(blob), memoryview),
+            ]:
+                label = f"{name} {type(value).__name__}"
+                try:
+                    millis, size = measure(
+                        data_converter, value, type_hint, args.iterations
+                    )
+                except TypeError as err:
+                    print(f"  {label:<24} not supported ({err})")
+                    continue
+                overhead = size / len(blob) - 1
+                print(
+                    f"  {label:<24} {millis:10.2f} ms/round trip {size:12} bytes ({overhead:+.0%})"
+                )
+
+
+if __name__ == "__main__":
+    main()
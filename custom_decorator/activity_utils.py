@@ -1,39 +1,101 @@
-import asyncio
-from datetime import datetime
+import inspect
+from contextvars import ContextVar
 from functools import wraps
-from typing import Any, Awaitable, Callable, TypeVar, cast
+from typing import Any, Callable, Optional, Type, TypeVar, cast
 
 from temporalio import activity
+from temporalio.converter import value_to_type
 
-F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+from custom_decorator.heartbeat_scheduler import (
+    AsyncHeartbeatScheduler,
+    HeartbeatHandle,
+    thread_heartbeat_scheduler,
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+T = TypeVar("T")
+
+_current_heartbeat: ContextVar[Optional[HeartbeatHandle]] = ContextVar(
+    "_current_heartbeat", default=None
+)
 
 
 def auto_heartbeater(fn: F) -> F:
-    # We want to ensure that the type hints from the original callable are
-    # available via our wrapper, so we use the functools wraps decorator
+    # Heartbeats are sent by a scheduler shared by all activities (one timer on the event loop for async activities, one
+    # thread for sync ones) rather than a task per activity.
+    if inspect.iscoroutinefunction(fn):
+        # We want to ensure that the type hints from the original callable are
+        # available via our wrapper, so we use the functools wraps decorator
+        @wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            heartbeat_timeout = activity.info().heartbeat_timeout
+            if not heartbeat_timeout:
+                return await fn(*args, **kwargs)
+
+            scheduler = AsyncHeartbeatScheduler.for_running_loop()
+            # Heartbeat twice as often as the timeout
+            handle = scheduler.register(heartbeat_timeout.total_seconds() / 2)
+            # Keep sending the last checkpoint of a previous attempt until this attempt checkpoints, so a retry that fails
+            # before then doesn't lose it
+            handle.set_details(*activity.info().heartbeat_details)
+            token = _current_heartbeat.set(handle)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _current_heartbeat.reset(token)
+                scheduler.unregister(handle)
+
+        return cast(F, async_wrapper)
+
     @wraps(fn)
-    async def wrapper(*args, **kwargs):
+    def sync_wrapper(*args, **kwargs):
         heartbeat_timeout = activity.info().heartbeat_timeout
-        heartbeat_task = None
-        if heartbeat_timeout:
-            # Heartbeat twice as often as the timeout
-            heartbeat_task = asyncio.create_task(
-                heartbeat_every(heartbeat_timeout.total_seconds() / 2)
-            )
+        if not heartbeat_timeout:
+            return fn(*args, **kwargs)
+
+        scheduler = thread_heartbeat_scheduler()
+        # Heartbeat twice as often as the timeout
+        handle = scheduler.register(heartbeat_timeout.total_seconds() / 2)
+        # Keep sending the last checkpoint of a previous attempt until this attempt checkpoints, so a retry that fails
+        # before then doesn't lose it
+        handle.set_details(*activity.info().heartbeat_details)
+        token = _current_heartbeat.set(handle)
         try:
-            return await fn(*args, **kwargs)
+            return fn(*args, **kwargs)
         finally:
-            if heartbeat_task:
-                heartbeat_task.cancel()
-                # Wait for heartbeat cancellation to complete
-                await asyncio.wait([heartbeat_task])
+            _current_heartbeat.reset(token)
+            scheduler.unregister(handle)
+
+    return cast(F, sync_wrapper)
+
+
+def set_heartbeat_details(*details: Any) -> None:
+    """Set the details sent with the automatic heartbeats of the current activity, e.g. its progress."""
+    handle = _current_heartbeat.get()
+    if handle is None:
+        raise RuntimeError("Not in an activity decorated with @auto_heartbeater")
+    handle.set_details(*details)
+
+
+def checkpoint(state: Any) -> None:
+    """Record the progress of the current activity so a retry can continue from it with `resume_state`.
 
-    return cast(F, wrapper)
+    Checkpointing is cheap and can be done as often as convenient: only the latest state is kept, and it is sent with the
+    next automatic heartbeat (at half the heartbeat timeout). Without a heartbeat timeout, the state is heartbeated
+    directly and the SDK throttles it. `state` is converted when the heartbeat is sent, so pass a new object each time
+    rather than mutating one already checkpointed.
+    """
+    handle = _current_heartbeat.get()
+    if handle is None:
+        activity.heartbeat(state)
+    else:
+        handle.set_details(state)
 
 
-async def heartbeat_every(delay: float, *details: Any) -> None:
-    # Heartbeat every so often while not cancelled
-    while True:
-        await asyncio.sleep(delay)
-        print(f"Heartbeating at {datetime.now()}")
-        activity.heartbeat(*details)
+def resume_state(state_type: Type[T]) -> Optional[T]:
+    """The last state checkpointed by a previous attempt of the current activity as a `state_type`, or None on the
+    first attempt (or if no previous attempt checkpointed)."""
+    details = activity.info().heartbeat_details
+    if not details:
+        return None
+    return value_to_type(state_type, details[0])
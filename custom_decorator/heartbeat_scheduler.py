@@ -0,0 +1,176 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Callable, Optional
+
+from temporalio import activity
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatHandle:
+    """An activity registered with a heartbeat scheduler.
+
+    Heartbeats are sent with the latest details set with `set_details`, so activities can report progress without
+    heartbeating themselves.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        heartbeat: Callable[..., None],
+        context: contextvars.Context,
+    ) -> None:
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.context = context
+        self.details: tuple[Any, ...] = ()
+        self.cancelled = False
+
+    def set_details(self, *details: Any) -> None:
+        self.details = details
+
+    def send(self) -> None:
+        # Run in the context the activity registered from, so the heartbeat goes to that activity
+        try:
+            self.context.run(self.heartbeat, *self.details)
+        except Exception:
+            logger.exception("Failed to heartbeat")
+
+
+class _HeartbeatTimers:
+    """Due times of every registered activity, soonest first. Unregistered activities are dropped when they come due."""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, HeartbeatHandle]] = []
+        self._sequence = itertools.count()
+
+    def add(self, handle: HeartbeatHandle, due: float) -> None:
+        heapq.heappush(self._heap, (due, next(self._sequence), handle))
+
+    def next_due(self) -> Optional[float]:
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> list[HeartbeatHandle]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, handle = heapq.heappop(self._heap)
+            if not handle.cancelled:
+                due.append(handle)
+        return due
+
+
+# Key is the event loop the scheduler runs on
+_async_schedulers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncHeartbeatScheduler]" = weakref.WeakKeyDictionary()
+
+
+class AsyncHeartbeatScheduler:
+    """Heartbeats every registered async activity from a single timer on the event loop, instead of each activity
+    running its own heartbeat task and timer."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._timers = _HeartbeatTimers()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    @staticmethod
+    def for_running_loop() -> "AsyncHeartbeatScheduler":
+        loop = asyncio.get_running_loop()
+        scheduler = _async_schedulers.get(loop)
+        if scheduler is None:
+            scheduler = AsyncHeartbeatScheduler(loop)
+            _async_schedulers[loop] = scheduler
+        return scheduler
+
+    def register(
+        self, interval: float, heartbeat: Callable[..., None] = activity.heartbeat
+    ) -> HeartbeatHandle:
+        """Heartbeat every `interval` seconds until unregistered. Must be called from the activity."""
+        handle = HeartbeatHandle(interval, heartbeat, contextvars.copy_context())
+        self._timers.add(handle, self._loop.time() + interval)
+        self._schedule_wakeup()
+        return handle
+
+    def unregister(self, handle: HeartbeatHandle) -> None:
+        handle.cancelled = True
+
+    def _schedule_wakeup(self) -> None:
+        due = self._timers.next_due()
+        if due is None:
+            return
+        if self._wakeup is not None:
+            if self._wakeup.when() <= due:
+                return
+            self._wakeup.cancel()
+        self._wakeup = self._loop.call_at(due, self._tick)
+
+    def _tick(self) -> None:
+        self._wakeup = None
+        now = self._loop.time()
+        for handle in self._timers.pop_due(now):
+            handle.send()
+            self._timers.add(handle, now + handle.interval)
+        self._schedule_wakeup()
+
+
+class ThreadHeartbeatScheduler:
+    """Heartbeats every registered sync (thread pool) activity from a single background thread.
+
+    Heartbeating a threaded activity waits for the worker's event loop to accept it, so this thread, rather than the
+    activity threads or the event loop, does the waiting.
+    """
+
+    def __init__(self) -> None:
+        self._timers = _HeartbeatTimers()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(
+        self, interval: float, heartbeat: Callable[..., None] = activity.heartbeat
+    ) -> HeartbeatHandle:
+        """Heartbeat every `interval` seconds until unregistered. Must be called from the activity."""
+        handle = HeartbeatHandle(interval, heartbeat, contextvars.copy_context())
+        with self._condition:
+            self._timers.add(handle, time.monotonic() + interval)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="heartbeat-scheduler", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        return handle
+
+    def unregister(self, handle: HeartbeatHandle) -> None:
+        with self._condition:
+            handle.cancelled = True
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                due = self._timers.next_due()
+                now = time.monotonic()
+                if due is None or due > now:
+                    self._condition.wait(None if due is None else due - now)
+                    continue
+                handles = self._timers.pop_due(now)
+                for handle in handles:
+                    self._timers.add(handle, now + handle.interval)
+
+            for handle in handles:
+                # Skip activities that finished while others were heartbeating
+                if not handle.cancelled:
+                    handle.send()
+
+
+_thread_scheduler = ThreadHeartbeatScheduler()
+
+
+def thread_heartbeat_scheduler() -> ThreadHeartbeatScheduler:
+    return _thread_scheduler
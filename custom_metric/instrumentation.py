@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any, Awaitable, Generator, Mapping, Optional, Type, TypeVar
+
+from temporalio import activity, workflow
+from temporalio.common import (
+    MetricCounter,
+    MetricHistogram,
+    MetricHistogramTimedelta,
+    MetricMeter,
+)
+from temporalio.runtime import Runtime
+from temporalio.worker import (
+    ActivityInboundInterceptor,
+    ActivityOutboundInterceptor,
+    ExecuteActivityInput,
+    ExecuteWorkflowInput,
+    HandleSignalInput,
+    HandleUpdateInput,
+    Interceptor,
+    WorkflowInboundInterceptor,
+    WorkflowInterceptorClassInput,
+)
+
+with workflow.unsafe.imports_passed_through():
+    import random
+    import time
+
+MetricT = TypeVar("MetricT", MetricCounter, MetricHistogram, MetricHistogramTimedelta)
+
+# Label value used once a label has seen max_label_values distinct values
+OTHER_LABEL_VALUE = "__other__"
+
+
+class WorkerInstruments:
+    """Instruments recorded by `WorkerInstrumentationInterceptor`.
+
+    Instruments are created once, and the instrument bound to each attribute set is cached, so recording is a dict
+    lookup rather than creating instruments on every call. Each label keeps at most `max_label_values` distinct values;
+    after that new values are recorded as `OTHER_LABEL_VALUE`, so a flood of workflow types or handler names can't
+    blow up the number of series.
+    """
+
+    def __init__(self, meter: MetricMeter, max_label_values: int = 100) -> None:
+        self.max_label_values = max_label_values
+        self._label_values: dict[str, set[str]] = {}
+        self._bound: dict[tuple, Any] = {}
+
+        self.activity_schedule_to_start_latency = meter.create_histogram_timedelta(
+            "custom_activity_schedule_to_start_latency",
+            description="Time between activity scheduling and start",
+            unit="duration",
+        )
+        self.activity_execution_latency = meter.create_histogram_timedelta(
+            "custom_activity_execution_latency",
+            description="Time spent executing an activity attempt",
+            unit="duration",
+        )
+        self.activity_heartbeats = meter.create_counter(
+            "custom_activity_heartbeats", description="Activity heartbeats sent"
+        )
+        self.activity_input_size = meter.create_histogram(
+            "custom_activity_input_size",
+            description="Size of activity arguments as payloads (sampled)",
+            unit="bytes",
+        )
+        self.activity_output_size = meter.create_histogram(
+            "custom_activity_output_size",
+            description="Size of activity results as payloads (sampled)",
+            unit="bytes",
+        )
+        self.activity_attempt = meter.create_histogram(
+            "custom_activity_attempt",
+            description="Attempt number of started activities",
+        )
+        self.workflow_task_latency = meter.create_histogram_timedelta(
+            "custom_workflow_task_latency",
+            description="Time spent running workflow code in each workflow task",
+            unit="duration",
+        )
+        self.workflow_signal_latency = meter.create_histogram_timedelta(
+            "custom_workflow_signal_handler_latency",
+            description="Time from a signal handler starting to it finishing",
+            unit="duration",
+        )
+        self.workflow_update_latency = meter.create_histogram_timedelta(
+            "custom_workflow_update_handler_latency",
+            description="Time from an update handler starting to it finishing",
+            unit="duration",
+        )
+
+    def label(self, key: str, value: str) -> str:
+        values = self._label_values.setdefault(key, set())
+        if value in values:
+            return value
+        if len(values) >= self.max_label_values:
+            return OTHER_LABEL_VALUE
+        values.add(value)
+        return value
+
+    def bind(self, metric: MetricT, attributes: Mapping[str, str]) -> MetricT:
+        """`metric` with the given attributes (after applying the cardinality limit)."""
+        labels = tuple(
+            (key, self.label(key, value)) for key, value in attributes.items()
+        )
+        cache_key = (metric.name, labels)
+        bound = self._bound.get(cache_key)
+        if bound is None:
+            bound = metric.with_additional_attributes(dict(labels))
+            self._bound[cache_key] = bound
+        return bound
+
+
+def _perf_counter() -> float:
+    # Timing workflow code doesn't affect what it does, so reading the clock is safe in the sandbox
+    with workflow.unsafe.sandbox_unrestricted():
+        return time.perf_counter()
+
+
+class _TimedSteps:
+    """Awaits a coroutine, recording how long each synchronous step of it takes.
+
+    A workflow's main coroutine runs one step per workflow task that wakes it, so this is the time the workflow's own code
+    takes in each task.
+    """
+
+    def __init__(
+        self, awaitable: Awaitable[Any], histogram: MetricHistogramTimedelta
+    ) -> None:
+        self._awaitable = awaitable
+        self._histogram = histogram
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        iterator = self._awaitable.__await__()
+        send_value: Any = None
+        error: Optional[BaseException] = None
+        while True:
+            start = _perf_counter()
+            try:
+                if error is None:
+                    yielded = iterator.send(send_value)
+                else:
+                    yielded = iterator.throw(error)
+            except StopIteration as result:
+                self._record(start)
+                return result.value
+            except BaseException:
+                self._record(start)
+                raise
+            self._record(start)
+
+            try:
+                send_value = yield yielded
+                error = None
+            except BaseException as e:
+                send_value = None
+                error = e
+
+    def _record(self, start: float) -> None:
+        if not workflow.unsafe.is_replaying():
+            self._histogram.record(timedelta(seconds=_perf_counter() - start))
+
+
+class _InstrumentedActivityInboundInterceptor(ActivityInboundInterceptor):
+    def __init__(
+        self,
+        next: ActivityInboundInterceptor,
+        instruments: WorkerInstruments,
+        payload_size_sample_rate: float,
+    ) -> None:
+        super().__init__(next)
+        self._instruments = instruments
+        self._payload_size_sample_rate = payload_size_sample_rate
+
+    def init(self, outbound: ActivityOutboundInterceptor) -> None:
+        super().init(
+            _InstrumentedActivityOutboundInterceptor(outbound, self._instruments)
+        )
+
+    async def execute_activity(self, input: ExecuteActivityInput) -> Any:
+        info = activity.info()
+        instruments = self._instruments
+        attributes = {
+            "task_queue": info.task_queue,
+            "workflow_type": info.workflow_type or "",
+            "activity_type": info.activity_type,
+        }
+
+        if info.started_time and info.current_attempt_scheduled_time:
+            instruments.bind(
+                instruments.activity_schedule_to_start_latency, attributes
+            ).record(info.started_time - info.current_attempt_scheduled_time)
+        instruments.bind(instruments.activity_attempt, attributes).record(info.attempt)
+
+        # Converting payloads again costs about as much as the SDK converting them, so only a sample is measured
+        measure_payloads = random.random() < self._payload_size_sample_rate
+        if measure_payloads:
+            instruments.bind(instruments.activity_input_size, attributes).record(
+                sum(
+                    p.ByteSize()
+                    for p in activity.payload_converter().to_payloads(input.args)
+                )
+            )
+
+        outcome = "failed"
+        start = time.perf_counter()
+        try:
+            result = await super().execute_activity(input)
+            outcome = "completed"
+        finally:
+            instruments.bind(
+                instruments.activity_execution_latency,
+                {**attributes, "outcome": outcome},
+            ).record(timedelta(seconds=time.perf_counter() - start))
+
+        if measure_payloads:
+            instruments.bind(instruments.activity_output_size, attributes).record(
+                sum(
+                    p.ByteSize()
+                    for p in activity.payload_converter().to_payloads([result])
+                )
+            )
+        return result
+
+
+class _InstrumentedActivityOutboundInterceptor(ActivityOutboundInterceptor):
+    def __init__(
+        self, next: ActivityOutboundInterceptor, instruments: WorkerInstruments
+    ) -> None:
+        super().__init__(next)
+        self._instruments = instruments
+
+    def heartbeat(self, *details: Any) -> None:
+        info = activity.info()
+        self._instruments.bind(
+            self._instruments.activity_heartbeats,
+            {"task_queue": info.task_queue, "activity_type": info.activity_type},
+        ).add(1)
+        super().heartbeat(*details)
+
+
+class _InstrumentedWorkflowInboundInterceptor(WorkflowInboundInterceptor):
+    # Set on the subclass returned by WorkerInstrumentationInterceptor.workflow_interceptor_class
+    instruments: WorkerInstruments
+
+    def _attributes(self, **extra: str) -> dict[str, str]:
+        info = workflow.info()
+        return {
+            "task_queue": info.task_queue,
+            "workflow_type": info.workflow_type,
+            **extra,
+        }
+
+    async def execute_workflow(self, input: ExecuteWorkflowInput) -> Any:
+        histogram = self.instruments.bind(
+            self.instruments.workflow_task_latency, self._attributes()
+        )
+        return await _TimedSteps(super().execute_workflow(input), histogram)
+
+    async def handle_signal(self, input: HandleSignalInput) -> None:
+        start = _perf_counter()
+        try:
+            await super().handle_signal(input)
+        finally:
+            if not workflow.unsafe.is_replaying():
+                self.instruments.bind(
+                    self.instruments.workflow_signal_latency,
+                    self._attributes(handler=input.signal),
+                ).record(timedelta(seconds=_perf_counter() - start))
+
+    async def handle_update_handler(self, input: HandleUpdateInput) -> Any:
+        start = _perf_counter()
+        try:
+            return await super().handle_update_handler(input)
+        finally:
+            if not workflow.unsafe.is_replaying():
+                self.instruments.bind(
+                    self.instruments.workflow_update_latency,
+                    self._attributes(handler=input.update),
+                ).record(timedelta(seconds=_perf_counter() - start))
+
+
+class WorkerInstrumentationInterceptor(Interceptor):
+    """Worker interceptor that records activity and workflow metrics to `meter` (the default runtime's meter if not
+    given).
+
+    For activities: schedule-to-start latency, execution latency by outcome, heartbeats, attempt number, and (for a
+    `payload_size_sample_rate` fraction of executions) input and output payload sizes. For workflows: the time workflow
+    code runs in each workflow task, and signal and update handler latency. Nothing is recorded for workflows while they
+    replay.
+    """
+
+    def __init__(
+        self,
+        meter: Optional[MetricMeter] = None,
+        max_label_values: int = 100,
+        payload_size_sample_rate: float = 0.1,
+    ) -> None:
+        self.instruments = WorkerInstruments(
+            meter or Runtime.default().metric_meter, max_label_values
+        )
+        self.payload_size_sample_rate = payload_size_sample_rate
+        # Workflow interceptors are instantiated by the worker, so bind the instruments to a subclass
+        self._workflow_interceptor_class = type(
+            "_BoundInstrumentedWorkflowInboundInterceptor",
+            (_InstrumentedWorkflowInboundInterceptor,),
+            {"instruments": self.instruments},
+        )
+
+    def intercept_activity(
+        self, next: ActivityInboundInterceptor
+    ) -> ActivityInboundInterceptor:
+        return _InstrumentedActivityInboundInterceptor(
+            next, self.instruments, self.payload_size_sample_rate
+        )
+
+    def workflow_interceptor_class(
+        self, input: WorkflowInterceptorClassInput
+    ) -> Optional[Type[WorkflowInboundInterceptor]]:
+        return self._workflow_interceptor_class
@@ -1,5 +1,11 @@
+import asyncio
+import hashlib
 import os
-from typing import Iterable, List
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Union
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from temporalio.api.common.v1 import Payload
@@ -55,3 +61,148 @@ class EncryptionCodec(PayloadCodec):
 
     def decrypt(self, data: bytes) -> bytes:
         return self.encryptor.decrypt(data[:12], data[12:], None)
+
+
+class BlobStore(ABC):
+    """Content-addressed storage for payloads offloaded by ClaimCheckCodec."""
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes) -> None:
+        """Store data under key. Keys are content hashes, so stores may skip
+        writing a key that already exists."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        """Return the data stored under key."""
+
+
+class LocalFileBlobStore(BlobStore):
+    """Stores blobs as files in a local directory. Only suitable for tests and
+    single-machine setups, since every client and worker must see the same
+    directory."""
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(self._put, key, data)
+
+    async def get(self, key: str) -> bytes:
+        return await asyncio.to_thread((self.directory / key).read_bytes)
+
+    def _put(self, key: str, data: bytes) -> None:
+        path = self.directory / key
+        if path.exists():
+            return
+        # Write to a temporary file first so readers never see a partial blob
+        tmp_path = path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+
+class S3BlobStore(BlobStore):
+    """Stores blobs as objects in an S3 bucket. Requires boto3."""
+
+    def __init__(self, bucket: str, prefix: str = "", client: Any = None) -> None:
+        if client is None:
+            import boto3
+
+            client = boto3.client("s3")
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(self._put, key, data)
+
+    async def get(self, key: str) -> bytes:
+        response = await asyncio.to_thread(
+            self.client.get_object, Bucket=self.bucket, Key=self.prefix + key
+        )
+        return await asyncio.to_thread(response["Body"].read)
+
+    def _put(self, key: str, data: bytes) -> None:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return
+        except self.client.exceptions.ClientError as err:
+            if err.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey"):
+                raise
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+
+class ClaimCheckCodec(PayloadCodec):
+    """Moves large payloads into a blob store, leaving a small reference payload
+    in their place.
+
+    Payloads are keyed by the SHA-256 of their serialized form, so identical
+    payloads are only stored once. Recently stored and fetched blobs are kept
+    in an in-memory LRU cache so that repeated decodes, for example during
+    replay, don't go back to the store.
+    """
+
+    def __init__(
+        self,
+        store: BlobStore,
+        threshold_bytes: int = 128 * 1024,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        super().__init__()
+        self.store = store
+        self.threshold_bytes = threshold_bytes
+        self.cache_max_bytes = cache_max_bytes
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._cache_bytes = 0
+
+    async def encode(self, payloads: Iterable[Payload]) -> List[Payload]:
+        return list(await asyncio.gather(*(self._encode(p) for p in payloads)))
+
+    async def decode(self, payloads: Iterable[Payload]) -> List[Payload]:
+        return list(await asyncio.gather(*(self._decode(p) for p in payloads)))
+
+    async def _encode(self, payload: Payload) -> Payload:
+        data = payload.SerializeToString()
+        if len(data) < self.threshold_bytes:
+            return payload
+
+        key = hashlib.sha256(data).hexdigest()
+        # Anything in the cache has already been stored
+        if self._cache_get(key) is None:
+            await self.store.put(key, data)
+            self._cache_put(key, data)
+        return Payload(
+            metadata={
+                "encoding": b"binary/claim-check",
+                "claim-check-key": key.encode(),
+            },
+        )
+
+    async def _decode(self, payload: Payload) -> Payload:
+        # Ignore ones w/out our expected encoding
+        if payload.metadata.get("encoding", b"").decode() != "binary/claim-check":
+            return payload
+
+        key = payload.metadata["claim-check-key"].decode()
+        data = self._cache_get(key)
+        if data is None:
+            data = await self.store.get(key)
+            if hashlib.sha256(data).hexdigest() != key:
+                raise ValueError(f"Blob {key} does not match its content hash")
+            self._cache_put(key, data)
+        return Payload.FromString(data)
+
+    def _cache_get(self, key: str) -> Optional[bytes]:
+        data = self._cache.get(key)
+        if data is not None:
+            self._cache.move_to_end(key)
+        return data
+
+    def _cache_put(self, key: str, data: bytes) -> None:
+        if len(data) > self.cache_max_bytes or key in self._cache:
+            return
+        self._cache[key] = data
+        self._cache_bytes += len(data)
+        while self._cache_bytes > self.cache_max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 
 import gevent
+import temporalio.exceptions
 from temporalio import activity
 
 
@@ -23,3 +24,21 @@ def compose_greeting_sync(input: ComposeGreetingInput) -> str:
         f"in greenlet: {gevent.getcurrent()}"
     )
     return f"{input.greeting}, {input.name}!"
+
+
+@activity.defn
+def wait_for_cancel_sync() -> None:
+    # Heartbeat until cancelled. With GreenletExecutor, cancellation raises in
+    # this greenlet wherever it is waiting.
+    try:
+        while True:
+            activity.heartbeat()
+            gevent.sleep(0.2)
+    except temporalio.exceptions.CancelledError:
+        activity.logger.info("Sync activity cancelled")
+        raise
+
+
+@activity.defn
+def sleep_sync(seconds: float) -> None:
+    gevent.sleep(seconds)
@@ -1,8 +1,14 @@
+import collections
+import concurrent.futures
+import contextvars
 import functools
 from concurrent.futures import Future
-from typing import Callable, TypeVar
+from typing import Any, Callable, NamedTuple, Optional, TypeVar
 
+import gevent
+import temporalio.exceptions
 from gevent import threadpool
+from temporalio import activity
 from typing_extensions import ParamSpec
 
 T = TypeVar("T")
@@ -39,3 +45,89 @@ class GeventExecutor(threadpool.ThreadPoolExecutor):
         super().submit(wrapper, *args, **kwargs)
         # Return Python future to user
         return python_fut
+
+
+class _WorkItem(NamedTuple):
+    future: Future
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: dict[str, Any]
+    # The context of the activity submitting the call, if any
+    activity_context: Optional[contextvars.Context]
+
+
+class GreenletExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Executor running each call in a greenlet, for sync activities that mostly wait on gevent patched I/O.
+
+    Unlike `GeventExecutor`, calls aren't handed to a native thread and their result translated back, so use it from a
+    single thread, and calls run in greenlets of that thread's hub. Up to `max_workers` calls run at once, the rest wait
+    in order. When a sync activity run by the executor is cancelled, `temporalio.exceptions.CancelledError` is raised in
+    its greenlet, like Temporal raises it in threads of a thread pool.
+
+    A call only yields to other greenlets and the event loop when it waits, so CPU-bound work like workflow tasks
+    belongs on native threads of a `GeventExecutor`. This subclasses `ThreadPoolExecutor` only so Temporal runs sync
+    activities in it, it never starts threads.
+    """
+
+    def __init__(self, max_workers: int = 10_000) -> None:
+        super().__init__(max_workers)
+        self._greenlets: set[gevent.Greenlet] = set()
+        self._pending: collections.deque[_WorkItem] = collections.deque()
+
+    def submit(
+        self, fn: Callable[P, T], /, *args: P.args, **kwargs: P.kwargs
+    ) -> Future[T]:
+        if self._shutdown:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        future: Future[T] = Future()
+        item = _WorkItem(
+            future,
+            fn,
+            args,
+            kwargs,
+            contextvars.copy_context() if activity.in_activity() else None,
+        )
+        if len(self._greenlets) < self._max_workers:
+            self._start(item)
+        else:
+            self._pending.append(item)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._shutdown = True
+        if cancel_futures:
+            while self._pending:
+                self._pending.popleft().future.cancel()
+        if wait:
+            while self._greenlets:
+                gevent.joinall(list(self._greenlets))
+
+    def _start(self, item: _WorkItem) -> None:
+        if item.future.set_running_or_notify_cancel():
+            self._greenlets.add(gevent.spawn(self._run, item))
+
+    def _run(self, item: _WorkItem) -> None:
+        watcher = (
+            gevent.spawn(
+                item.activity_context.run, _kill_when_cancelled, gevent.getcurrent()
+            )
+            if item.activity_context
+            else None
+        )
+        try:
+            result = item.fn(*item.args, **item.kwargs)
+        except BaseException as exc:
+            item.future.set_exception(exc)
+        else:
+            item.future.set_result(result)
+        finally:
+            if watcher:
+                watcher.kill(block=False)
+            self._greenlets.discard(gevent.getcurrent())
+            while self._pending and len(self._greenlets) < self._max_workers:
+                self._start(self._pending.popleft())
+
+
+def _kill_when_cancelled(greenlet: gevent.Greenlet) -> None:
+    activity.wait_for_cancelled_sync()
+    greenlet.kill(temporalio.exceptions.CancelledError(), block=False)
@@ -0,0 +1,69 @@
+from typing import Any, Callable, TypeVar
+
+from gevent import monkey
+from temporalio.common import MetricMeter
+
+T = TypeVar("T")
+
+# Counts are updated from native threads of GeventExecutor, which gevent's
+# patched locks don't synchronize
+_allocate_lock = monkey.get_original("_thread", "allocate_lock")
+
+
+class PoolMetrics:
+    """Utilization of one of a worker's executors: how many calls it is running out of its `size`, and how many are
+    waiting to run.
+
+    Also recorded as the `executor_pool_running`, `executor_pool_queued` and `executor_pool_size` gauges, with a `pool`
+    attribute naming the executor.
+    """
+
+    def __init__(self, meter: MetricMeter, pool: str, size: int) -> None:
+        self.pool = pool
+        self.size = size
+        self.running = 0
+        self.peak_running = 0
+        self._submitted = 0
+        self._lock = _allocate_lock()
+        meter = meter.with_additional_attributes({"pool": pool})
+        self._running_gauge = meter.create_gauge(
+            "executor_pool_running", "Calls running in the executor"
+        )
+        self._queued_gauge = meter.create_gauge(
+            "executor_pool_queued", "Calls waiting to run in the executor"
+        )
+        meter.create_gauge("executor_pool_size", "Calls the executor runs at once").set(
+            size
+        )
+
+    @property
+    def queued(self) -> int:
+        return self._submitted - self.running
+
+    @property
+    def utilization(self) -> float:
+        return self.running / self.size
+
+    def submitted(self) -> None:
+        self._update(submitted=1)
+
+    def done(self) -> None:
+        """Called once a submitted call has finished, or won't run."""
+        self._update(submitted=-1)
+
+    def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a submitted call, counting it as running meanwhile."""
+        self._update(running=1)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._update(running=-1)
+
+    def _update(self, submitted: int = 0, running: int = 0) -> None:
+        with self._lock:
+            self._submitted += submitted
+            self.running += running
+            self.peak_running = max(self.peak_running, self.running)
+            running, queued = self.running, self.queued
+        self._running_gauge.set(running)
+        self._queued_gauge.set(queued)
@@ -5,15 +5,24 @@ monkey.patch_all()
 
 import asyncio
 import logging
+import statistics
+import time
+from concurrent.futures import Executor
 
+import gevent
+from temporalio.client import Client, WorkflowHandle
+from temporalio.runtime import Runtime
 from temporalio.testing import WorkflowEnvironment
 from temporalio.worker import Worker
 
 from gevent_async import activity, workflow
-from gevent_async.executor import GeventExecutor
+from gevent_async.executor import GeventExecutor, GreenletExecutor
+from gevent_async.pool_metrics import PoolMetrics
+from gevent_async.worker_pools import MeteredGeventExecutor, WorkerPools
 
 # This basically combines ../worker.py and ../starter.py for use by CI to
-# confirm this works in all environments
+# confirm this works in all environments, compares the executors, and checks
+# slow activities don't hold up workflow tasks
 
 
 def main():
@@ -23,22 +32,23 @@ def main():
 
 
 async def async_main():
+    await benchmark_executors()
+
     logging.info("Starting local server")
     async with await WorkflowEnvironment.start_local() as env:
         logging.info("Starting worker")
-        with GeventExecutor(max_workers=200) as executor:
-            async with Worker(
+        with WorkerPools(
+            max_concurrent_activities=1000, max_concurrent_workflow_tasks=100
+        ) as pools:
+            async with pools.new_worker(
                 env.client,
                 task_queue="gevent_async-task-queue",
-                workflows=[workflow.GreetingWorkflow],
+                workflows=[workflow.GreetingWorkflow, workflow.CancellationWorkflow],
                 activities=[
                     activity.compose_greeting_async,
                     activity.compose_greeting_sync,
+                    activity.wait_for_cancel_sync,
                 ],
-                activity_executor=executor,
-                workflow_task_executor=executor,
-                max_concurrent_activities=100,
-                max_concurrent_workflow_tasks=100,
             ):
                 logging.info("Running workflow")
                 result = await env.client.execute_workflow(
@@ -51,6 +61,132 @@ async def async_main():
                     raise RuntimeError(f"Unexpected result: {result}")
                 logging.info(f"Workflow complete, result: {result}")
 
+                logging.info("Running cancellation workflow")
+                result = await env.client.execute_workflow(
+                    workflow.CancellationWorkflow.run,
+                    id="gevent_async-cancellation-workflow-id",
+                    task_queue="gevent_async-task-queue",
+                )
+                if result != "cancelled":
+                    raise RuntimeError(f"Unexpected result: {result}")
+                logging.info(f"Cancellation workflow complete, result: {result}")
+
+        await check_overload(env.client)
+
+
+async def check_overload(client: Client):
+    # Saturate a small activity pool, and confirm workflow tasks take as long
+    # as when it is idle, unlike with one executor shared by both and smaller
+    # than their limits combined. Queries are answered by workflow tasks.
+    logging.info("Running burst workflow with a shared executor")
+    metrics = PoolMetrics(Runtime.default().metric_meter, "shared", 10)
+    with MeteredGeventExecutor(metrics) as executor:
+        shared = await measure_burst(
+            Worker(
+                client,
+                task_queue="gevent_async-shared-burst-task-queue",
+                workflows=[workflow.BurstWorkflow],
+                activities=[activity.sleep_sync],
+                activity_executor=executor,
+                workflow_task_executor=executor,
+                max_concurrent_activities=10,
+                max_concurrent_workflow_tasks=10,
+            ),
+            metrics,
+        )
+
+    logging.info("Running burst workflow with separate executors")
+    with WorkerPools(
+        max_concurrent_activities=10, max_concurrent_workflow_tasks=10
+    ) as pools:
+        separate = await measure_burst(
+            pools.new_worker(
+                client,
+                task_queue="gevent_async-burst-task-queue",
+                workflows=[workflow.BurstWorkflow],
+                activities=[activity.sleep_sync],
+            ),
+            pools.activity_metrics,
+        )
+
+    if not slowed_down(*shared):
+        raise RuntimeError("Workflow tasks not slowed down by a shared executor")
+    if slowed_down(*separate):
+        raise RuntimeError("Workflow tasks slowed down by activities")
+
+
+async def measure_burst(
+    worker: Worker, activity_metrics: PoolMetrics
+) -> tuple[list[float], list[float]]:
+    # Query latencies with idle activities, then with all activity slots busy
+    async with worker:
+        handle = await worker.client.start_workflow(
+            workflow.BurstWorkflow.run,
+            args=[100, 0.5],
+            id=f"{worker.task_queue}-workflow-id",
+            task_queue=worker.task_queue,
+        )
+        idle = await query_latencies(handle)
+        await handle.signal(workflow.BurstWorkflow.start_burst)
+        while activity_metrics.running < 10:
+            await asyncio.sleep(0.01)
+        saturated = await query_latencies(handle)
+        utilization = activity_metrics.utilization
+        await handle.result()
+    logging.info(
+        f"Workflow task latency: {statistics.median(idle) * 1000:.1f}ms with "
+        f"idle activities, {statistics.median(saturated) * 1000:.1f}ms with "
+        f"{utilization:.0%} of activity slots busy"
+    )
+    if utilization != 1:
+        raise RuntimeError(f"Activities stopped being saturated: {utilization}")
+    return idle, saturated
+
+
+def slowed_down(idle: list[float], saturated: list[float]) -> bool:
+    return statistics.median(saturated) > 3 * statistics.median(idle) + 0.1
+
+
+async def query_latencies(handle: WorkflowHandle) -> list[float]:
+    latencies = []
+    for _ in range(10):
+        start = time.perf_counter()
+        await handle.query(workflow.BurstWorkflow.is_bursting)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def benchmark_executors():
+    # Calls from the event loop, like a worker running sync activities: many
+    # trivial ones to compare the overhead per call, then many at once that
+    # each wait on I/O, like activities calling other services
+    executors: list[tuple[str, Executor]] = [
+        ("GeventExecutor(200)", GeventExecutor(max_workers=200)),
+        ("GreenletExecutor()", GreenletExecutor()),
+    ]
+    for name, executor in executors:
+        with executor:
+            # Warm up, starting the threads
+            await run_all(executor, gevent.sleep, 0.01, 200)
+            start = time.perf_counter()
+            await run_all(executor, int, None, 10_000)
+            per_call = (time.perf_counter() - start) / 10_000
+            start = time.perf_counter()
+            await run_all(executor, gevent.sleep, 0.1, 2_000)
+            waiting = time.perf_counter() - start
+        logging.info(
+            f"{name}: {per_call * 1e6:.0f}us per call, "
+            f"{waiting:.2f}s for 2000 concurrent 100ms waits"
+        )
+
+
+async def run_all(executor: Executor, fn, arg, count: int) -> None:
+    loop = asyncio.get_running_loop()
+    args = () if arg is None else (arg,)
+    await asyncio.gather(
+        *(loop.run_in_executor(executor, fn, *args) for _ in range(count))
+    )
+
 
 if __name__ == "__main__":
     main()
@@ -10,10 +10,10 @@ import signal
 import gevent
 from temporalio.client import Client
 from temporalio.envconfig import ClientConfig
-from temporalio.worker import Worker
 
 from gevent_async import activity, workflow
 from gevent_async.executor import GeventExecutor
+from gevent_async.worker_pools import WorkerPools
 
 
 def main():
@@ -44,28 +44,26 @@ async def async_main():
     config.setdefault("target_host", "localhost:7233")
     client = await Client.connect(**config)
 
-    # Create an executor for use by Temporal. This cannot be the outer one
-    # running this async main. The max_workers here needs to have enough room to
-    # support the max concurrent activities/workflows settings.
-    with GeventExecutor(max_workers=200) as executor:
-        # Run a worker for the workflow and activities
-        async with Worker(
+    # Create executors for use by Temporal. These cannot be the outer one
+    # running this async main. WorkerPools creates separate ones for workflow
+    # tasks and activities, sized to the max concurrent workflow tasks and
+    # activities of the worker, so slow sync activities can't starve workflow
+    # tasks. Workflow tasks are CPU bound, so they run on native threads. Sync
+    # activities run in greenlets of this thread, which is cheap enough to run
+    # thousands at once.
+    with WorkerPools(
+        max_concurrent_activities=1000, max_concurrent_workflow_tasks=100
+    ) as pools:
+        # Run a worker for the workflows and activities
+        async with pools.new_worker(
             client,
             task_queue="gevent_async-task-queue",
-            workflows=[workflow.GreetingWorkflow],
+            workflows=[workflow.GreetingWorkflow, workflow.CancellationWorkflow],
             activities=[
                 activity.compose_greeting_async,
                 activity.compose_greeting_sync,
+                activity.wait_for_cancel_sync,
             ],
-            # Set the executor for activities (only used for non-async
-            # activities) and workflow tasks
-            activity_executor=executor,
-            workflow_task_executor=executor,
-            # Set the max concurrent activities/workflows. These are the same as
-            # the defaults, but this makes it clear that the 100 + 100 = 200 for
-            # max_workers settings.
-            max_concurrent_activities=100,
-            max_concurrent_workflow_tasks=100,
         ):
             # Wait until interrupted
             logging.info("Worker started, ctrl+c to exit")
@@ -1,12 +1,16 @@
+import asyncio
 from datetime import timedelta
 
 from temporalio import workflow
+from temporalio.exceptions import ActivityError, CancelledError
 
 with workflow.unsafe.imports_passed_through():
     from gevent_async.activity import (
         ComposeGreetingInput,
         compose_greeting_async,
         compose_greeting_sync,
+        sleep_sync,
+        wait_for_cancel_sync,
     )
 
 
@@ -32,3 +36,53 @@ class GreetingWorkflow:
         if async_res != sync_res:
             raise ValueError("Results are not the same")
         return sync_res
+
+
+@workflow.defn
+class CancellationWorkflow:
+    @workflow.run
+    async def run(self) -> str:
+        # Start a sync activity that runs until cancelled, then cancel it
+        handle = workflow.start_activity(
+            wait_for_cancel_sync,
+            start_to_close_timeout=timedelta(minutes=1),
+            heartbeat_timeout=timedelta(seconds=2),
+            cancellation_type=workflow.ActivityCancellationType.WAIT_CANCELLATION_COMPLETED,
+        )
+        await asyncio.sleep(1)
+        handle.cancel()
+        try:
+            await handle
+        except ActivityError as err:
+            if isinstance(err.cause, CancelledError):
+                return "cancelled"
+            raise
+        raise RuntimeError("Activity was not cancelled")
+
+
+@workflow.defn
+class BurstWorkflow:
+    """Runs a burst of sync activities once signalled, and answers queries meanwhile."""
+
+    def __init__(self) -> None:
+        self.bursting = False
+
+    @workflow.run
+    async def run(self, count: int, seconds: float) -> None:
+        await workflow.wait_condition(lambda: self.bursting)
+        await asyncio.gather(
+            *(
+                workflow.execute_activity(
+                    sleep_sync, seconds, start_to_close_timeout=timedelta(minutes=1)
+                )
+                for _ in range(count)
+            )
+        )
+
+    @workflow.signal
+    def start_burst(self) -> None:
+        self.bursting = True
+
+    @workflow.query
+    def is_bursting(self) -> bool:
+        return self.bursting
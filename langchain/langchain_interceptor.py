@@ -1,181 +1,192 @@
 from __future__ import annotations
 
-from typing import Any, Mapping, Protocol, Type
+from typing import Any, Iterator, Mapping, Optional
 
-from temporalio import activity, api, client, converter, worker, workflow
+from propagation import ContextPropagator, JSONSerializer, PropagationInterceptor
+from temporalio import activity, workflow
 
 with workflow.unsafe.imports_passed_through():
+    import atexit
+    import hashlib
+    import logging
+    import queue
+    import threading
+    import time
     from contextlib import contextmanager
+    from datetime import timedelta
 
-    from langsmith import trace, tracing_context
+    from langsmith import RunTree, tracing_context
     from langsmith.run_helpers import get_current_run_tree
 
-# Header key for LangChain context
-LANGCHAIN_CONTEXT_KEY = "langchain-context"
+logger = logging.getLogger(__name__)
 
+# Calls that get their own LangSmith run
+_TRACED_OUTBOUND_CALLS = {"start_workflow", "start_activity", "start_child_workflow"}
+_TRACED_INBOUND_CALLS = {"execute_workflow", "execute_activity"}
 
-class _InputWithHeaders(Protocol):
-    headers: Mapping[str, api.common.v1.Payload]
 
+class SpanBuffer:
+    """Collects finished runs and posts them to LangSmith in batches from a background thread, so workflow and activity
+    code never waits on LangSmith.
 
-def set_header_from_context(
-    input: _InputWithHeaders, payload_converter: converter.PayloadConverter
-) -> None:
-    # Get current LangChain run tree
-    run_tree = get_current_run_tree()
-    if run_tree:
-        headers = run_tree.to_headers()
-        input.headers = {
-            **input.headers,
-            LANGCHAIN_CONTEXT_KEY: payload_converter.to_payload(headers),
-        }
-
-
-@contextmanager
-def context_from_header(
-    input: _InputWithHeaders, payload_converter: converter.PayloadConverter
-):
-    payload = input.headers.get(LANGCHAIN_CONTEXT_KEY)
-    if payload:
-        run_tree = payload_converter.from_payload(payload, dict)
-        # Set the run tree in the current context
-        with tracing_context(parent=run_tree):
-            yield
-    else:
-        yield
-
-
-class LangChainContextPropagationInterceptor(client.Interceptor, worker.Interceptor):
-    """Interceptor that propagates LangChain context through Temporal."""
+    A batch is posted once it has `batch_size` runs or `flush_interval` after its first run, whichever comes first.
+    """
 
     def __init__(
         self,
-        payload_converter: converter.PayloadConverter = converter.default().payload_converter,
+        batch_size: int = 100,
+        flush_interval: timedelta = timedelta(seconds=1),
     ) -> None:
-        self._payload_converter = payload_converter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue[RunTree] = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def add(self, run: RunTree) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="langsmith-span-buffer", daemon=True
+                    )
+                    self._thread.start()
+                    atexit.register(self.flush)
+        self._queue.put(run)
+
+    def flush(self) -> None:
+        """Block until every run added so far has been posted."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            flush_at = time.monotonic() + self.flush_interval.total_seconds()
+            while len(batch) < self.batch_size:
+                timeout = flush_at - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._post(batch)
+
+    def _post(self, batch: list[RunTree]) -> None:
+        # Runs are posted already ended, so each is a single create. The LangSmith client sends them together.
+        for run in batch:
+            try:
+                run.post()
+            except Exception:
+                logger.exception(f"Failed to post LangSmith run {run.name}")
+            finally:
+                self._queue.task_done()
 
-    def intercept_client(
-        self, next: client.OutboundInterceptor
-    ) -> client.OutboundInterceptor:
-        return _LangChainContextPropagationClientOutboundInterceptor(
-            next, self._payload_converter
-        )
 
-    def intercept_activity(
-        self, next: worker.ActivityInboundInterceptor
-    ) -> worker.ActivityInboundInterceptor:
-        return _LangChainContextPropagationActivityInboundInterceptor(next)
+def _sample(key: str, rate: float) -> bool:
+    # Hash rather than random so every call in a workflow (including on other workers and on replay) makes the same
+    # choice without using workflow randomness
+    if rate >= 1.0:
+        return True
+    digest = hashlib.md5(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64 < rate
 
-    def workflow_interceptor_class(
-        self, input: worker.WorkflowInterceptorClassInput
-    ) -> Type[_LangChainContextPropagationWorkflowInboundInterceptor]:
-        return _LangChainContextPropagationWorkflowInboundInterceptor
 
+class LangSmithRunTreePropagator(ContextPropagator):
+    """Propagates the current LangSmith run tree, and traces workflow and activity starts and executions.
+
+    Workflows are sampled by type using `sample_rates` (falling back to `default_sample_rate`); a workflow's activities
+    and the client call that starts it follow the workflow's decision. With `skip_replay`, no runs are created while a
+    workflow is replaying, since they were already recorded the first time. Finished runs are posted through `buffer`.
+    """
 
-class _LangChainContextPropagationClientOutboundInterceptor(client.OutboundInterceptor):
     def __init__(
         self,
-        next: client.OutboundInterceptor,
-        payload_converter: converter.PayloadConverter,
+        name: str = "langsmith",
+        *,
+        sample_rates: Optional[Mapping[str, float]] = None,
+        default_sample_rate: float = 1.0,
+        skip_replay: bool = True,
+        buffer: Optional[SpanBuffer] = None,
     ) -> None:
-        super().__init__(next)
-        self._payload_converter = payload_converter
-
-    async def start_workflow(
-        self, input: client.StartWorkflowInput
-    ) -> client.WorkflowHandle[Any, Any]:
-        with trace(name=f"start_workflow:{input.workflow}"):
-            set_header_from_context(input, self._payload_converter)
-            return await super().start_workflow(input)
-
-
-class _LangChainContextPropagationActivityInboundInterceptor(
-    worker.ActivityInboundInterceptor
-):
-    async def execute_activity(self, input: worker.ExecuteActivityInput) -> Any:
-        if isinstance(input.fn, str):
-            name = input.fn
-        elif callable(input.fn):
-            defn = activity._Definition.from_callable(input.fn)
-            name = (
-                defn.name if defn is not None and defn.name is not None else "unknown"
-            )
-        else:
-            name = "unknown"
-
-        with context_from_header(input, activity.payload_converter()):
-            with trace(name=f"execute_activity:{name}"):
-                return await self.next.execute_activity(input)
-
-
-class _LangChainContextPropagationWorkflowInboundInterceptor(
-    worker.WorkflowInboundInterceptor
-):
-    def init(self, outbound: worker.WorkflowOutboundInterceptor) -> None:
-        self.next.init(
-            _LangChainContextPropagationWorkflowOutboundInterceptor(outbound)
-        )
-
-    async def execute_workflow(self, input: worker.ExecuteWorkflowInput) -> Any:
-        if isinstance(input.run_fn, str):
-            name = input.run_fn
-        elif callable(input.run_fn):
-            defn = workflow._Definition.from_run_fn(input.run_fn)
-            name = (
-                defn.name if defn is not None and defn.name is not None else "unknown"
-            )
-        else:
-            name = "unknown"
-
-        with context_from_header(input, workflow.payload_converter()):
-            # This is a sandbox friendly way to write
-            # with trace(...):
-            #   return await self.next.execute_workflow(input)
-            with workflow.unsafe.sandbox_unrestricted():
-                t = trace(
-                    name=f"execute_workflow:{name}", run_id=workflow.info().run_id
-                )
-                with workflow.unsafe.imports_passed_through():
-                    t.__enter__()
-            try:
-                return await self.next.execute_workflow(input)
-            finally:
-                with workflow.unsafe.sandbox_unrestricted():
-                    # Cannot use __aexit__ because it's internally uses
-                    # loop.run_in_executor which is not available in the sandbox
-                    t.__exit__()
-
-
-class _LangChainContextPropagationWorkflowOutboundInterceptor(
-    worker.WorkflowOutboundInterceptor
-):
-    def start_activity(
-        self, input: worker.StartActivityInput
-    ) -> workflow.ActivityHandle:
+        super().__init__(name)
+        self.sample_rates = dict(sample_rates or {})
+        self.default_sample_rate = default_sample_rate
+        self.skip_replay = skip_replay
+        self.buffer = buffer or SpanBuffer()
+        self._serializer = JSONSerializer()
+
+    def serialize_current(self) -> Optional[bytes]:
+        run_tree = get_current_run_tree()
+        if run_tree is None:
+            return None
+        return self._serializer.to_bytes(run_tree.to_headers())
+
+    def activate(self, data: bytes):
+        return tracing_context(parent=self._serializer.from_bytes(data))
+
+    def outbound_call(self, kind: str, name: str, input: Any):
+        if kind not in _TRACED_OUTBOUND_CALLS:
+            return super().outbound_call(kind, name, input)
+        if workflow.in_workflow():
+            # Always draw the run ID so that workflow randomness is consumed the same whether or not the run is traced
+            run_id = workflow.uuid4()
+            if not self._should_trace_workflow():
+                return super().outbound_call(kind, name, input)
+            return self._trace(f"{kind}:{name}", run_id)
+        if kind == "start_workflow" and not self._sampled(input.workflow, input.id):
+            return super().outbound_call(kind, name, input)
+        return self._trace(f"{kind}:{name}")
+
+    def inbound_call(self, kind: str, name: str, input: Any):
+        if kind not in _TRACED_INBOUND_CALLS:
+            return super().inbound_call(kind, name, input)
+        if kind == "execute_workflow":
+            if not self._should_trace_workflow():
+                return super().inbound_call(kind, name, input)
+            return self._trace(f"{kind}:{name}", workflow.info().run_id)
+        info = activity.info()
+        if not self._sampled(info.workflow_type, info.workflow_id):
+            return super().inbound_call(kind, name, input)
+        return self._trace(f"{kind}:{name}")
+
+    def _sampled(
+        self, workflow_type: Optional[str], workflow_id: Optional[str]
+    ) -> bool:
+        rate = self.sample_rates.get(workflow_type or "", self.default_sample_rate)
+        return _sample(workflow_id or "", rate)
+
+    def _should_trace_workflow(self) -> bool:
+        if self.skip_replay and workflow.unsafe.is_replaying():
+            return False
+        info = workflow.info()
+        return self._sampled(info.workflow_type, info.workflow_id)
+
+    @contextmanager
+    def _trace(self, name: str, run_id: Optional[Any] = None) -> Iterator[None]:
+        # Creating runs reads the clock and environment, which the sandbox doesn't allow
         with workflow.unsafe.sandbox_unrestricted():
-            t = trace(name=f"start_activity:{input.activity}", run_id=workflow.uuid4())
-            with workflow.unsafe.imports_passed_through():
-                t.__enter__()
+            parent = get_current_run_tree()
+            if parent is not None:
+                run = parent.create_child(name=name, run_type="chain", run_id=run_id)
+            elif run_id is not None:
+                run = RunTree(name=name, run_type="chain", id=run_id)
+            else:
+                run = RunTree(name=name, run_type="chain")
         try:
-            set_header_from_context(input, workflow.payload_converter())
-            return self.next.start_activity(input)
+            with tracing_context(parent=run):
+                yield
         finally:
             with workflow.unsafe.sandbox_unrestricted():
-                t.__exit__()
+                run.end()
+                self.buffer.add(run)
 
-    async def start_child_workflow(
-        self, input: worker.StartChildWorkflowInput
-    ) -> workflow.ChildWorkflowHandle:
-        with workflow.unsafe.sandbox_unrestricted():
-            t = trace(
-                name=f"start_child_workflow:{input.workflow}", run_id=workflow.uuid4()
-            )
-            with workflow.unsafe.imports_passed_through():
-                t.__enter__()
 
-        try:
-            set_header_from_context(input, workflow.payload_converter())
-            return await self.next.start_child_workflow(input)
-        finally:
-            with workflow.unsafe.sandbox_unrestricted():
-                t.__exit__()
+class LangChainContextPropagationInterceptor(PropagationInterceptor):
+    """Interceptor that propagates LangChain context through Temporal.
+
+    Keyword arguments are passed to `LangSmithRunTreePropagator` to configure sampling, replay handling and batching.
+    """
+
+    def __init__(self, **propagator_options: Any) -> None:
+        super().__init__([LangSmithRunTreePropagator(**propagator_options)])
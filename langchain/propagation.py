@@ -0,0 +1,408 @@
+"""Reusable framework for propagating context through Temporal clients, workflows and activities.
+
+Applications register a `ContextPropagator` for each piece of context (user ID, tenant, trace headers, deadlines, ...).
+All registered values travel together in a single compact binary header instead of one JSON payload per value.
+
+This is a copy of the parts of the context propagation sample's propagation.py that this sample uses, so that it runs
+on its own.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import (
+    Any,
+    ContextManager,
+    Iterator,
+    Mapping,
+    NoReturn,
+    Optional,
+    Protocol,
+    Sequence,
+    Type,
+)
+
+import temporalio.activity
+import temporalio.api.common.v1
+import temporalio.client
+import temporalio.worker
+import temporalio.workflow
+
+logger = logging.getLogger(__name__)
+
+# The one header all propagated context is sent under
+HEADER_KEY = "__context"
+
+# First byte of the header, so the format can change without breaking older readers
+_HEADER_VERSION = 1
+
+# Caches are cleared when they grow past this many entries. Context values usually come from a small set (users,
+# tenants), so this is rarely hit.
+_MAX_CACHED_VALUES = 1024
+
+
+class _InputWithHeaders(Protocol):
+    headers: Mapping[str, temporalio.api.common.v1.Payload]
+
+
+class ContextPropagator(ABC):
+    """Carries one piece of context across Temporal calls.
+
+    `name` identifies the value in the header, so it must be unique among the registered propagators and the same on
+    both sides of a call. Values whose name the receiving side doesn't know are ignored.
+    """
+
+    def __init__(self, name: str) -> None:
+        if not 0 < len(name.encode()) < 256:
+            raise ValueError("Propagator name must be 1 to 255 bytes")
+        self.name = name
+
+    @abstractmethod
+    def serialize_current(self) -> Optional[bytes]:
+        """Serialize the value in the current context, or return None if there isn't one."""
+
+    @abstractmethod
+    def activate(self, data: bytes) -> ContextManager[Any]:
+        """Make a value received from a caller current for the duration of the returned context manager."""
+
+    def outbound_call(self, kind: str, name: str, input: Any) -> ContextManager[Any]:
+        """Wraps an outbound call, such as `start_activity`, before the header is set. `input` is the interceptor input
+        of the call and may be modified. Does nothing by default."""
+        return nullcontext()
+
+    def inbound_call(self, kind: str, name: str, input: Any) -> ContextManager[Any]:
+        """Wraps an inbound call, such as `execute_activity`, after received values are activated. Does nothing by
+        default."""
+        return nullcontext()
+
+
+class JSONSerializer:
+    def to_bytes(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def from_bytes(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+def _write_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    n = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("Truncated varint in context header")
+        if shift > 63:
+            raise ValueError("Varint in context header is too long")
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+def encode_header(entries: Sequence[tuple[str, bytes]]) -> bytes:
+    """Pack (name, value) pairs as: version byte, then for each pair a name length byte, the name, a varint value
+    length and the value."""
+    out = bytearray([_HEADER_VERSION])
+    for name, value in entries:
+        encoded_name = name.encode()
+        out.append(len(encoded_name))
+        out += encoded_name
+        _write_varint(out, len(value))
+        out += value
+    return bytes(out)
+
+
+def decode_header(data: bytes) -> list[tuple[str, bytes]]:
+    if not data or data[0] != _HEADER_VERSION:
+        raise ValueError("Unsupported context header version")
+
+    entries = []
+    pos = 1
+    while pos < len(data):
+        name_end = pos + 1 + data[pos]
+        if name_end > len(data):
+            raise ValueError("Truncated name in context header")
+        name = data[pos + 1 : name_end].decode()
+        value_length, pos = _read_varint(data, name_end)
+        if pos + value_length > len(data):
+            raise ValueError("Truncated value in context header")
+        entries.append((name, data[pos : pos + value_length]))
+        pos += value_length
+    return entries
+
+
+class ContextPropagation:
+    """Moves the context of a set of propagators into and out of call headers.
+
+    Header payloads are memoized per set of serialized values, so workflows that send the same context with every
+    activity or child workflow only build the header once.
+    """
+
+    def __init__(self, propagators: Sequence[ContextPropagator]) -> None:
+        self.propagators = list(propagators)
+        self._propagators_by_name = {p.name: p for p in self.propagators}
+        if len(self._propagators_by_name) != len(self.propagators):
+            raise ValueError("Propagator names must be unique")
+        self._payloads: dict[
+            tuple[tuple[str, bytes], ...], temporalio.api.common.v1.Payload
+        ] = {}
+        self._entries: dict[bytes, list[tuple[str, bytes]]] = {}
+
+    def set_header(self, input: _InputWithHeaders) -> None:
+        entries = []
+        for propagator in self.propagators:
+            data = propagator.serialize_current()
+            if data is not None:
+                entries.append((propagator.name, data))
+        if not entries:
+            return
+
+        cache_key = tuple(entries)
+        payload = self._payloads.get(cache_key)
+        if payload is None:
+            payload = temporalio.api.common.v1.Payload(
+                metadata={"encoding": b"binary/plain"}, data=encode_header(entries)
+            )
+            if len(self._payloads) >= _MAX_CACHED_VALUES:
+                self._payloads.clear()
+            self._payloads[cache_key] = payload
+        input.headers = {**input.headers, HEADER_KEY: payload}
+
+    def _decode(self, data: bytes) -> list[tuple[str, bytes]]:
+        entries = self._entries.get(data)
+        if entries is None:
+            try:
+                entries = decode_header(data)
+            except ValueError as err:
+                # Run the call without context rather than failing it
+                logger.warning("Ignoring malformed context header: %s", err)
+                entries = []
+            if len(self._entries) >= _MAX_CACHED_VALUES:
+                self._entries.clear()
+            self._entries[data] = entries
+        return entries
+
+    @contextmanager
+    def activate(self, input: _InputWithHeaders) -> Iterator[None]:
+        payload = input.headers.get(HEADER_KEY)
+        entries = self._decode(payload.data) if payload else []
+        with ExitStack() as stack:
+            for name, data in entries:
+                propagator = self._propagators_by_name.get(name)
+                if propagator:
+                    try:
+                        stack.enter_context(propagator.activate(data))
+                    except ValueError as err:
+                        logger.warning(
+                            "Ignoring malformed context value %s: %s", name, err
+                        )
+            yield
+
+    @contextmanager
+    def outbound(
+        self, input: _InputWithHeaders, kind: str, name: str
+    ) -> Iterator[None]:
+        with ExitStack() as stack:
+            for propagator in self.propagators:
+                stack.enter_context(propagator.outbound_call(kind, name, input))
+            self.set_header(input)
+            yield
+
+    @contextmanager
+    def inbound(self, input: _InputWithHeaders, kind: str, name: str) -> Iterator[None]:
+        with self.activate(input), ExitStack() as stack:
+            for propagator in self.propagators:
+                stack.enter_context(propagator.inbound_call(kind, name, input))
+            yield
+
+
+class PropagationInterceptor(
+    temporalio.client.Interceptor, temporalio.worker.Interceptor
+):
+    """Interceptor that propagates the context of the given propagators through client, workflow and activity calls.
+
+    This interceptor implements methods `temporalio.client.Interceptor` and  `temporalio.worker.Interceptor` so that
+
+    (1) the client code's context is serialized into a header with outbound requests
+    (2) workflows activate the context from their task input, and propagate it into the header of their outbound calls
+    (3) activities similarly activate the context from their task input so that it's available for their outbound calls
+    """
+
+    def __init__(self, propagators: Sequence[ContextPropagator]) -> None:
+        self._propagation = ContextPropagation(propagators)
+        # Workflow interceptors are instantiated by the worker, so bind the propagation to a subclass
+        self._workflow_interceptor_class = type(
+            "_BoundPropagationWorkflowInboundInterceptor",
+            (_PropagationWorkflowInboundInterceptor,),
+            {"propagation": self._propagation},
+        )
+
+    def intercept_client(
+        self, next: temporalio.client.OutboundInterceptor
+    ) -> temporalio.client.OutboundInterceptor:
+        return _PropagationClientOutboundInterceptor(next, self._propagation)
+
+    def intercept_activity(
+        self, next: temporalio.worker.ActivityInboundInterceptor
+    ) -> temporalio.worker.ActivityInboundInterceptor:
+        return _PropagationActivityInboundInterceptor(next, self._propagation)
+
+    def workflow_interceptor_class(
+        self, input: temporalio.worker.WorkflowInterceptorClassInput
+    ) -> Type[_PropagationWorkflowInboundInterceptor]:
+        return self._workflow_interceptor_class
+
+
+class _PropagationClientOutboundInterceptor(temporalio.client.OutboundInterceptor):
+    def __init__(
+        self,
+        next: temporalio.client.OutboundInterceptor,
+        propagation: ContextPropagation,
+    ) -> None:
+        super().__init__(next)
+        self._propagation = propagation
+
+    async def start_workflow(
+        self, input: temporalio.client.StartWorkflowInput
+    ) -> temporalio.client.WorkflowHandle[Any, Any]:
+        with self._propagation.outbound(input, "start_workflow", input.workflow):
+            return await super().start_workflow(input)
+
+    async def query_workflow(self, input: temporalio.client.QueryWorkflowInput) -> Any:
+        with self._propagation.outbound(input, "query_workflow", input.query):
+            return await super().query_workflow(input)
+
+    async def signal_workflow(
+        self, input: temporalio.client.SignalWorkflowInput
+    ) -> None:
+        with self._propagation.outbound(input, "signal_workflow", input.signal):
+            await super().signal_workflow(input)
+
+    async def start_workflow_update(
+        self, input: temporalio.client.StartWorkflowUpdateInput
+    ) -> temporalio.client.WorkflowUpdateHandle[Any]:
+        with self._propagation.outbound(input, "start_workflow_update", input.update):
+            return await super().start_workflow_update(input)
+
+
+class _PropagationActivityInboundInterceptor(
+    temporalio.worker.ActivityInboundInterceptor
+):
+    def __init__(
+        self,
+        next: temporalio.worker.ActivityInboundInterceptor,
+        propagation: ContextPropagation,
+    ) -> None:
+        super().__init__(next)
+        self._propagation = propagation
+
+    async def execute_activity(
+        self, input: temporalio.worker.ExecuteActivityInput
+    ) -> Any:
+        with self._propagation.inbound(
+            input, "execute_activity", temporalio.activity.info().activity_type
+        ):
+            return await self.next.execute_activity(input)
+
+
+class _PropagationWorkflowInboundInterceptor(
+    temporalio.worker.WorkflowInboundInterceptor
+):
+    # Set on the subclass returned by PropagationInterceptor.workflow_interceptor_class
+    propagation: ContextPropagation
+
+    def init(self, outbound: temporalio.worker.WorkflowOutboundInterceptor) -> None:
+        self.next.init(
+            _PropagationWorkflowOutboundInterceptor(outbound, self.propagation)
+        )
+
+    async def execute_workflow(
+        self, input: temporalio.worker.ExecuteWorkflowInput
+    ) -> Any:
+        with self.propagation.inbound(
+            input, "execute_workflow", temporalio.workflow.info().workflow_type
+        ):
+            return await self.next.execute_workflow(input)
+
+    async def handle_signal(self, input: temporalio.worker.HandleSignalInput) -> None:
+        with self.propagation.inbound(input, "handle_signal", input.signal):
+            return await self.next.handle_signal(input)
+
+    async def handle_query(self, input: temporalio.worker.HandleQueryInput) -> Any:
+        with self.propagation.inbound(input, "handle_query", input.query):
+            return await self.next.handle_query(input)
+
+    def handle_update_validator(
+        self, input: temporalio.worker.HandleUpdateInput
+    ) -> None:
+        with self.propagation.inbound(input, "handle_update_validator", input.update):
+            self.next.handle_update_validator(input)
+
+    async def handle_update_handler(
+        self, input: temporalio.worker.HandleUpdateInput
+    ) -> Any:
+        with self.propagation.inbound(input, "handle_update_handler", input.update):
+            return await self.next.handle_update_handler(input)
+
+
+class _PropagationWorkflowOutboundInterceptor(
+    temporalio.worker.WorkflowOutboundInterceptor
+):
+    def __init__(
+        self,
+        next: temporalio.worker.WorkflowOutboundInterceptor,
+        propagation: ContextPropagation,
+    ) -> None:
+        super().__init__(next)
+        self._propagation = propagation
+
+    def continue_as_new(self, input: temporalio.worker.ContinueAsNewInput) -> NoReturn:
+        with self._propagation.outbound(
+            input,
+            "continue_as_new",
+            input.workflow or temporalio.workflow.info().workflow_type,
+        ):
+            self.next.continue_as_new(input)
+
+    async def signal_child_workflow(
+        self, input: temporalio.worker.SignalChildWorkflowInput
+    ) -> None:
+        with self._propagation.outbound(input, "signal_child_workflow", input.signal):
+            return await self.next.signal_child_workflow(input)
+
+    async def signal_external_workflow(
+        self, input: temporalio.worker.SignalExternalWorkflowInput
+    ) -> None:
+        with self._propagation.outbound(
+            input, "signal_external_workflow", input.signal
+        ):
+            return await self.next.signal_external_workflow(input)
+
+    def start_activity(
+        self, input: temporalio.worker.StartActivityInput
+    ) -> temporalio.workflow.ActivityHandle:
+        with self._propagation.outbound(input, "start_activity", input.activity):
+            return self.next.start_activity(input)
+
+    async def start_child_workflow(
+        self, input: temporalio.worker.StartChildWorkflowInput
+    ) -> temporalio.workflow.ChildWorkflowHandle:
+        with self._propagation.outbound(input, "start_child_workflow", input.workflow):
+            return await self.next.start_child_workflow(input)
+
+    def start_local_activity(
+        self, input: temporalio.worker.StartLocalActivityInput
+    ) -> temporalio.workflow.ActivityHandle:
+        with self._propagation.outbound(input, "start_local_activity", input.activity):
+            return self.next.start_local_activity(input)
@@ -0,0 +1,133 @@
+import argparse
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from ipaddress import IPv4Address
+from typing import Any, List
+
+import temporalio.converter
+from temporalio.contrib.pydantic import pydantic_data_converter
+
+from orjson_converter.converter import orjson_data_converter
+from orjson_converter.worker import MyDataclass, MyPydanticModel
+
+
+@dataclass
+class Reading:
+    sensor: str
+    taken_at: datetime
+    values: List[float]
+
+
+@dataclass
+class Batch:
+    name: str
+    readings: List[Reading]
+
+
+def dataclass_payload(size: int) -> Batch:
+    start = datetime(2024, 1, 1)
+    return Batch(
+        name="batch",
+        readings=[
+            Reading(
+                sensor=f"sensor-{i}",
+                taken_at=start + timedelta(seconds=i),
+                values=[i * 0.5, i * 1.5, i * 2.5],
+            )
+            for i in range(size)
+        ],
+    )
+
+
+def pydantic_payload(size: int) -> List[MyDataclass]:
+    start = datetime(2024, 1, 1)
+    return [
+        MyDataclass(
+            name=f"item-{i}",
+            created_at=start + timedelta(seconds=i),
+            models=[
+                MyPydanticModel(
+                    some_ip=IPv4Address(f"10.0.{i % 256}.{j}"),
+                    some_date=start + timedelta(minutes=j),
+                )
+                for j in range(5)
+            ],
+        )
+        for i in range(size)
+    ]
+
+
+def measure(
+    data_converter: temporalio.converter.DataConverter,
+    value: Any,
+    type_hint: Any,
+    iterations: int,
+) -> tuple[float, int]:
+    """Returns round trips per second and the encoded size in bytes."""
+    payload_converter = data_converter.payload_converter
+    # Warm up, which also builds the orjson converter's cached encoders/decoders
+    payloads = payload_converter.to_payloads([value])
+    payload_converter.from_payloads(payloads, [type_hint])
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        payloads = payload_converter.to_payloads([value])
+        payload_converter.from_payloads(payloads, [type_hint])
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed, payloads[0].ByteSize()
+
+
+def report(
+    title: str,
+    baseline_name: str,
+    baseline: temporalio.converter.DataConverter,
+    value: Any,
+    type_hint: Any,
+    iterations: int,
+) -> None:
+    print(title)
+    results = [
+        (baseline_name, measure(baseline, value, type_hint, iterations)),
+        ("orjson", measure(orjson_data_converter, value, type_hint, iterations)),
+    ]
+    for name, (round_trips_per_second, size) in results:
+        print(
+            f"  {name:<10} {round_trips_per_second:10.1f} round trips/sec {size:10} bytes"
+        )
+    speedup = results[1][1][0] / results[0][1][0]
+    print(f"  orjson is {speedup:.1f}x faster")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the orjson converter with the default JSON converters"
+    )
+    parser.add_argument(
+        "--size", type=int, default=1000, help="number of items in each payload"
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=100, help="round trips to time"
+    )
+    args = parser.parse_args()
+
+    report(
+        f"Dataclasses ({args.size} readings)",
+        "default",
+        temporalio.converter.default(),
+        dataclass_payload(args.size),
+        Batch,
+        args.iterations,
+    )
+    report(
+        f"Dataclasses of Pydantic models ({args.size} items)",
+        "pydantic",
+        pydantic_data_converter,
+        pydantic_payload(args.size),
+        List[MyDataclass],
+        args.iterations,
+    )
+
+
+if __name__ == "__main__":
+    main()
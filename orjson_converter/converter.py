@@ -0,0 +1,276 @@
+import dataclasses
+import datetime
+import decimal
+import enum
+import ipaddress
+import threading
+import types
+import typing
+import uuid
+from typing import Any, Callable, Optional, Type, Union
+
+import orjson
+from pydantic import BaseModel, TypeAdapter
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import (
+    CompositePayloadConverter,
+    DataConverter,
+    DefaultPayloadConverter,
+    EncodingPayloadConverter,
+    JSONPlainPayloadConverter,
+    value_to_type,
+)
+
+_Encoder = Callable[[Any], Any]
+_Decoder = Callable[[Any], Any]
+
+# Types that serialize to a string and are rebuilt by passing that string to the type's constructor
+_STRING_TYPES: tuple[type, ...] = (
+    uuid.UUID,
+    decimal.Decimal,
+    ipaddress.IPv4Address,
+    ipaddress.IPv6Address,
+    ipaddress.IPv4Network,
+    ipaddress.IPv6Network,
+)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+class OrjsonJSONPayloadConverter(EncodingPayloadConverter):
+    """JSON payload converter using orjson.
+
+    Payloads use the standard ``json/plain`` encoding, so they stay readable by
+    the default converter, other SDKs and the UI. orjson serializes dataclasses,
+    datetimes, enums and UUIDs natively. Other values (Pydantic models, IP
+    addresses, sets, decimals) go through an encoder that is built once per
+    value type. Decoding likewise builds a decoder once per type hint and
+    reuses it for every later payload with that type hint. Type hints that
+    contain Pydantic models are decoded by a cached Pydantic ``TypeAdapter``.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._encoders: dict[type, _Encoder] = {}
+        # Decoders from payload data, keyed by type hint
+        self._payload_decoders: dict[Any, Callable[[bytes], Any]] = {}
+        # Decoders from orjson.loads output, keyed by type hint
+        self._decoders: dict[Any, _Decoder] = {}
+        # Decoders are built under this lock, and kept in _building until the
+        # outermost one is complete, so other threads only see finished ones
+        self._build_lock = threading.RLock()
+        self._building: dict[Any, _Decoder] = {}
+        self._build_depth = 0
+
+    @property
+    def encoding(self) -> str:
+        return "json/plain"
+
+    def to_payload(self, value: Any) -> Optional[Payload]:
+        # Like the JSON converter this replaces, we fail rather than returning
+        # None if we can't convert, since we're expected to be last in the chain
+        return Payload(
+            metadata={"encoding": b"json/plain"},
+            data=orjson.dumps(
+                value, default=self._default, option=orjson.OPT_NON_STR_KEYS
+            ),
+        )
+
+    def from_payload(self, payload: Payload, type_hint: Optional[Type] = None) -> Any:
+        if type_hint is None:
+            return orjson.loads(payload.data)
+        decoder = self._payload_decoders.get(type_hint)
+        if decoder is None:
+            decoder = self._build_payload_decoder(type_hint)
+            self._payload_decoders[type_hint] = decoder
+        return decoder(payload.data)
+
+    def _default(self, value: Any) -> Any:
+        value_type = type(value)
+        encoder = self._encoders.get(value_type)
+        if encoder is None:
+            encoder = _build_encoder(value_type)
+            self._encoders[value_type] = encoder
+        return encoder(value)
+
+    def _build_payload_decoder(self, type_hint: Any) -> Callable[[bytes], Any]:
+        # Pydantic parses and validates JSON in a single pass in Rust, which is
+        # faster than anything we can build out of orjson.loads and Python
+        if _contains_model(type_hint):
+            return TypeAdapter(type_hint).validate_json
+        decoder = self._decoder_for(type_hint)
+        return lambda data: decoder(orjson.loads(data))
+
+    def _decoder_for(self, type_hint: Any) -> _Decoder:
+        decoder = self._decoders.get(type_hint)
+        if decoder is not None:
+            return decoder
+
+        with self._build_lock:
+            decoder = self._decoders.get(type_hint) or self._building.get(type_hint)
+            if decoder is not None:
+                return decoder
+
+            # Register a forwarding decoder first so that self-referencing
+            # dataclasses don't recurse forever while their decoder is being
+            # built. Decoders that use it are only published once it forwards.
+            built: list[_Decoder] = []
+            self._building[type_hint] = lambda value: built[0](value)
+            self._build_depth += 1
+            try:
+                decoder = self._build_decoder(type_hint)
+                built.append(decoder)
+                self._building[type_hint] = decoder
+            finally:
+                self._build_depth -= 1
+                if self._build_depth == 0:
+                    if built:
+                        self._decoders.update(self._building)
+                    self._building.clear()
+            return decoder
+
+    def _build_decoder(self, type_hint: Any) -> _Decoder:
+        if type_hint in (Any, object, str, int, bool, type(None)):
+            return _identity
+        if type_hint is float:
+            return float
+        if type_hint is datetime.datetime:
+            return _parse_datetime
+        if type_hint is datetime.date:
+            return datetime.date.fromisoformat
+        if isinstance(type_hint, type):
+            if issubclass(type_hint, BaseModel):
+                return type_hint.model_validate
+            if issubclass(type_hint, enum.Enum) or issubclass(type_hint, _STRING_TYPES):
+                return type_hint
+            if dataclasses.is_dataclass(type_hint):
+                return self._build_dataclass_decoder(type_hint)
+
+        origin = typing.get_origin(type_hint)
+        args = typing.get_args(type_hint)
+        if origin in (list, set, frozenset) and len(args) == 1:
+            item_decoder = self._decoder_for(args[0])
+            if item_decoder is _identity:
+                return origin
+            return lambda value: origin(item_decoder(item) for item in value)
+        if origin is tuple and len(args) == 2 and args[1] is Ellipsis:
+            item_decoder = self._decoder_for(args[0])
+            return lambda value: tuple(item_decoder(item) for item in value)
+        if origin is dict and len(args) == 2:
+            # JSON object keys are always strings
+            key_decoder = (
+                args[0] if args[0] in (int, float) else self._decoder_for(args[0])
+            )
+            value_decoder = self._decoder_for(args[1])
+            return lambda value: {
+                key_decoder(k): value_decoder(v) for k, v in value.items()
+            }
+        if origin in (Union, types.UnionType) and len(args) == 2 and type(None) in args:
+            inner_type = args[0] if args[1] is type(None) else args[1]
+            inner_decoder = self._decoder_for(inner_type)
+            return lambda value: None if value is None else inner_decoder(value)
+
+        # Everything else (other unions, literals, NewTypes, ...) falls back to
+        # the SDK's own conversion, which is slower but handles every type the
+        # default JSON converter does
+        return lambda value: value_to_type(type_hint, value)
+
+    def _build_dataclass_decoder(self, cls: type) -> _Decoder:
+        hints = typing.get_type_hints(cls)
+        field_decoders = [
+            (field.name, self._decoder_for(hints[field.name]))
+            for field in dataclasses.fields(cls)
+            if field.init
+        ]
+
+        def decode(value: Any) -> Any:
+            return cls(
+                **{
+                    name: decoder(value[name])
+                    for name, decoder in field_decoders
+                    if name in value
+                }
+            )
+
+        return decode
+
+
+def _parse_datetime(value: str) -> datetime.datetime:
+    # Before Python 3.11, fromisoformat doesn't accept the "Z" suffix other
+    # SDKs write for UTC
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.datetime.fromisoformat(value)
+
+
+def _is_plain_model(cls: Type[BaseModel]) -> bool:
+    """Whether a model serializes to exactly its field values by field name.
+
+    That's not the case for models with custom serializers, computed fields,
+    extra fields or excluded fields, so those are serialized by Pydantic.
+    """
+    decorators = cls.__pydantic_decorators__
+    if (
+        decorators.field_serializers
+        or decorators.model_serializers
+        or decorators.computed_fields
+    ):
+        return False
+    if cls.model_config.get("extra") == "allow":
+        return False
+    return not any(field.exclude for field in cls.model_fields.values())
+
+
+def _contains_model(type_hint: Any, seen: Optional[set[Any]] = None) -> bool:
+    """Whether a Pydantic model appears anywhere in the type hint."""
+    seen = seen if seen is not None else set()
+    if type_hint in seen:
+        return False
+    seen.add(type_hint)
+    if isinstance(type_hint, type):
+        if issubclass(type_hint, BaseModel):
+            return True
+        if dataclasses.is_dataclass(type_hint):
+            return any(
+                _contains_model(hint, seen)
+                for hint in typing.get_type_hints(type_hint).values()
+            )
+    return any(_contains_model(arg, seen) for arg in typing.get_args(type_hint))
+
+
+def _build_encoder(value_type: type) -> _Encoder:
+    if issubclass(value_type, BaseModel):
+        if _is_plain_model(value_type):
+            # orjson serializes the field values itself, calling back into
+            # _default only for the ones it doesn't support natively
+            return lambda value: value.__dict__
+        return lambda value: value.model_dump(mode="json")
+    if issubclass(value_type, _STRING_TYPES):
+        return str
+    if issubclass(value_type, (set, frozenset)):
+        return list
+    raise TypeError(f"Type is not JSON serializable: {value_type.__name__}")
+
+
+class OrjsonPayloadConverter(CompositePayloadConverter):
+    """Payload converter that replaces Temporal JSON conversion with orjson
+    conversion.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(
+            *(
+                (
+                    c
+                    if not isinstance(c, JSONPlainPayloadConverter)
+                    else OrjsonJSONPayloadConverter()
+                )
+                for c in DefaultPayloadConverter.default_encoding_payload_converters
+            )
+        )
+
+
+orjson_data_converter = DataConverter(payload_converter_class=OrjsonPayloadConverter)
+"""Data converter using orjson conversion."""
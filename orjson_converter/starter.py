@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from datetime import datetime
+from ipaddress import IPv4Address
+
+from temporalio.client import Client
+from temporalio.envconfig import ClientConfig
+
+from orjson_converter.converter import orjson_data_converter
+from orjson_converter.worker import MyDataclass, MyPydanticModel, MyWorkflow
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+
+    config = ClientConfig.load_client_connect_config()
+    config.setdefault("target_host", "localhost:7233")
+
+    # Connect client using the orjson converter
+    client = await Client.connect(
+        **config,
+        data_converter=orjson_data_converter,
+    )
+
+    # Run workflow
+    result = await client.execute_workflow(
+        MyWorkflow.run,
+        [
+            MyDataclass(
+                name="first",
+                created_at=datetime(2000, 1, 2, 3, 4, 5),
+                models=[
+                    MyPydanticModel(
+                        some_ip=IPv4Address("127.0.0.1"),
+                        some_date=datetime(2000, 1, 2, 3, 4, 5),
+                    ),
+                    MyPydanticModel(
+                        some_ip=IPv4Address("127.0.0.2"),
+                        some_date=datetime(2001, 2, 3, 4, 5, 6),
+                    ),
+                ],
+            ),
+        ],
+        id="orjson_converter-workflow-id",
+        task_queue="orjson_converter-task-queue",
+    )
+    logging.info("Got items from client: %s" % result)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from ipaddress import IPv4Address
+from typing import List
+
+from temporalio import activity, workflow
+from temporalio.client import Client
+from temporalio.envconfig import ClientConfig
+from temporalio.worker import Worker
+
+# Always pass through external modules to the sandbox that you know are safe for
+# workflow use
+with workflow.unsafe.imports_passed_through():
+    from pydantic import BaseModel
+
+    from orjson_converter.converter import orjson_data_converter
+
+
+class MyPydanticModel(BaseModel):
+    some_ip: IPv4Address
+    some_date: datetime
+
+
+@dataclass
+class MyDataclass:
+    name: str
+    created_at: datetime
+    models: List[MyPydanticModel]
+
+
+@activity.defn
+async def my_activity(items: List[MyDataclass]) -> List[MyDataclass]:
+    activity.logger.info("Got items in activity: %s" % items)
+    return items
+
+
+@workflow.defn
+class MyWorkflow:
+    @workflow.run
+    async def run(self, items: List[MyDataclass]) -> List[MyDataclass]:
+        workflow.logger.info("Got items in workflow: %s" % items)
+        return await workflow.execute_activity(
+            my_activity, items, start_to_close_timeout=timedelta(minutes=1)
+        )
+
+
+interrupt_event = asyncio.Event()
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+
+    config = ClientConfig.load_client_connect_config()
+    config.setdefault("target_host", "localhost:7233")
+
+    # Connect client using the orjson converter
+    client = await Client.connect(
+        **config,
+        data_converter=orjson_data_converter,
+    )
+
+    # Run a worker for the workflow
+    async with Worker(
+        client,
+        task_queue="orjson_converter-task-queue",
+        workflows=[MyWorkflow],
+        activities=[my_activity],
+    ):
+        # Wait until interrupted
+        print("Worker started, ctrl+c to exit")
+        await interrupt_event.wait()
+        print("Shutting down")
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(main())
+    except KeyboardInterrupt:
+        interrupt_event.set()
+        loop.run_until_complete(loop.shutdown_asyncgens())
@@ -0,0 +1,183 @@
+import asyncio
+import collections
+import dataclasses
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from temporalio import activity
+from temporalio.exceptions import ApplicationError, ApplicationErrorCategory
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class PollingPolicy:
+    """When to poll a service for the result of an operation.
+
+    The delay after the nth unsuccessful poll is `initial_interval * backoff_coefficient ** (n - 1)`, at most
+    `maximum_interval`, shortened by a random fraction of up to `jitter` so polls for operations started together
+    spread out. Given how long operations usually take to complete, polling waits for that before backing off.
+    """
+
+    initial_interval: timedelta = timedelta(seconds=1)
+    backoff_coefficient: float = 2.0
+    maximum_interval: timedelta = timedelta(minutes=1)
+    jitter: float = 0.2
+
+    def next_delay(
+        self, state: "PollState", expected_completion: Optional[float] = None
+    ) -> float:
+        """Seconds to wait before polling again, after the polls in `state` didn't return a result."""
+        delay = self.initial_interval.total_seconds() * self.backoff_coefficient ** (
+            state.polls - 1
+        )
+        if expected_completion is not None:
+            delay = max(delay, expected_completion - state.elapsed())
+        delay = min(delay, self.maximum_interval.total_seconds())
+        return delay * (1 - self.jitter * random.random())
+
+
+@dataclass(frozen=True)
+class PollState:
+    """Polls made for an operation, heartbeated so retries of the polling activity carry on the schedule."""
+
+    polls: int = 0
+    # Wall clock time of the first poll, since retries may run on other workers
+    started_at: float = field(default_factory=time.time)
+
+    def elapsed(self) -> float:
+        return time.time() - self.started_at
+
+    @staticmethod
+    def from_heartbeat() -> "PollState":
+        """State heartbeated by the previous attempt of the current activity, or new state."""
+        details = activity.info().heartbeat_details
+        # Heartbeat details aren't converted to a type, so this is a dict. Attempts running before this was deployed
+        # heartbeated other details, so start over from those.
+        if details and isinstance(details[0], dict):
+            try:
+                return PollState(**details[0])
+            except TypeError:
+                pass
+        return PollState()
+
+
+class CompletionTimes:
+    """How long operations have taken to complete, learned from past polls, by key.
+
+    The expected completion time is the `percentile` of the last `window` completion times, once there are
+    `min_samples`, so most operations aren't done before it and polling before it would mostly be wasted.
+    """
+
+    def __init__(
+        self, percentile: float = 0.1, window: int = 100, min_samples: int = 5
+    ) -> None:
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, collections.deque[float]] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        self._samples.setdefault(key, collections.deque(maxlen=self.window)).append(
+            seconds
+        )
+
+    def expected(self, key: str) -> Optional[float]:
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        return sorted(samples)[int(self.percentile * (len(samples) - 1))]
+
+
+def _record_poll() -> None:
+    activity.metric_meter().create_counter(
+        "polling_polls", "Polls for the result of an operation"
+    ).add(1)
+
+
+def _expected_completion(
+    completion_times: Optional[CompletionTimes],
+) -> Optional[float]:
+    if not completion_times:
+        return None
+    return completion_times.expected(activity.info().activity_type)
+
+
+def _record_completion(
+    state: PollState, completion_times: Optional[CompletionTimes]
+) -> None:
+    activity.metric_meter().create_histogram(
+        "polling_polls_per_completion",
+        "Polls it took to get the result of an operation",
+    ).record(state.polls)
+    if completion_times:
+        completion_times.record(activity.info().activity_type, state.elapsed())
+
+
+async def _sleep_heartbeating(seconds: float, state: PollState) -> None:
+    # Keep heartbeating while waiting longer than the heartbeat timeout
+    heartbeat_timeout = activity.info().heartbeat_timeout
+    interval = heartbeat_timeout.total_seconds() / 2 if heartbeat_timeout else seconds
+    deadline = time.monotonic() + seconds
+    while (remaining := deadline - time.monotonic()) > 0:
+        await asyncio.sleep(min(interval, remaining))
+        activity.heartbeat(state)
+
+
+async def poll_until_done(
+    poll: Callable[[], Awaitable[T]],
+    policy: PollingPolicy,
+    completion_times: Optional[CompletionTimes] = None,
+) -> T:
+    """Call `poll` until it returns a result rather than raising, waiting between calls as `policy` says.
+
+    For use in an activity, which heartbeats the poll state after each poll, and carries on the schedule from it when
+    retried. Given `completion_times`, it records how long the activity's operations take, and waits for their expected
+    completion before polling again.
+    """
+    state = PollState.from_heartbeat()
+    while True:
+        state = dataclasses.replace(state, polls=state.polls + 1)
+        _record_poll()
+        try:
+            result = await poll()
+        except Exception:
+            activity.logger.debug("Poll %s failed", state.polls, exc_info=True)
+        else:
+            _record_completion(state, completion_times)
+            return result
+        activity.heartbeat(state)
+        await _sleep_heartbeating(
+            policy.next_delay(state, _expected_completion(completion_times)), state
+        )
+
+
+async def poll_once(
+    poll: Callable[[], Awaitable[T]],
+    policy: PollingPolicy,
+    completion_times: Optional[CompletionTimes] = None,
+) -> T:
+    """Call `poll` once, and if it raises, fail the activity to be retried after the delay `policy` says.
+
+    For activities polling infrequently through activity retries. Each attempt heartbeats the poll state, so the next
+    one carries on the schedule from it. The retry policy's intervals don't apply, but its maximum attempts do.
+    """
+    state = PollState.from_heartbeat()
+    state = dataclasses.replace(state, polls=state.polls + 1)
+    _record_poll()
+    try:
+        result = await poll()
+    except Exception as err:
+        activity.heartbeat(state)
+        delay = policy.next_delay(state, _expected_completion(completion_times))
+        raise ApplicationError(
+            f"Poll {state.polls} failed: {err}",
+            next_retry_delay=timedelta(seconds=delay),
+            # Expected while the operation is in progress
+            category=ApplicationErrorCategory.BENIGN,
+        ) from err
+    _record_completion(state, completion_times)
+    return result
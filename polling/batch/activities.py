@@ -0,0 +1,21 @@
+from temporalio import activity
+
+from polling.batch.poller import BatchPoller
+from polling.test_service import ComposeGreetingInput
+
+
+class BatchPollingActivities:
+    def __init__(self, poller: BatchPoller) -> None:
+        self.poller = poller
+
+    @activity.defn
+    async def compose_greeting(self, input: ComposeGreetingInput) -> str:
+        # Hand the operation over to the batch poller, which completes this
+        # activity with its result. The test service knows operations by
+        # workflow ID.
+        info = activity.info()
+        self.poller.add(info.workflow_id or info.activity_id, info.task_token, input)
+        # Raise the complete-async error which will complete this function but
+        # does not consider the activity complete from the workflow perspective,
+        # freeing its slot on the worker
+        activity.raise_complete_async()
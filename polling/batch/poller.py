@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from temporalio.client import AsyncActivityCancelledError, Client
+from temporalio.service import RPCError, RPCStatusCode
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Pending:
+    task_token: bytes
+    request: Any
+
+
+class BatchPoller:
+    """Polls a service for the results of many operations at once, and completes the activity waiting on each operation
+    once its result is in.
+
+    Activities hand their operation over with `add` and complete asynchronously, so they don't hold an activity slot
+    while waiting. Every `interval`, `poll` is called with the requests of up to `max_batch_size` pending operations by
+    ID, and returns the results of those that are done by ID. Run `run` alongside the worker.
+
+    Pending operations are only kept in memory, so if the worker stops, the activities waiting on them time out and are
+    retried, handing them over again. Given `heartbeat_interval`, each waiting activity is heartbeated that often, so
+    that with a heartbeat timeout that happens sooner, and cancelled activities are noticed.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        poll: Callable[[dict[str, Any]], Awaitable[dict[str, Any]]],
+        interval: timedelta = timedelta(seconds=1),
+        max_batch_size: int = 1000,
+        heartbeat_interval: Optional[timedelta] = None,
+    ) -> None:
+        self.client = client
+        self.poll = poll
+        self.interval = interval
+        self.max_batch_size = max_batch_size
+        self.heartbeat_interval = heartbeat_interval
+        self._pending: dict[str, _Pending] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, operation_id: str, task_token: bytes, request: Any) -> None:
+        """Poll for the result of `operation_id` with `request`, and complete the activity with `task_token` with it."""
+        # A retried activity replaces the attempt that timed out
+        self._pending[operation_id] = _Pending(task_token, request)
+
+    async def run(self) -> None:
+        last_heartbeat = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval.total_seconds())
+            await self.poll_pending()
+            if (
+                self.heartbeat_interval
+                and time.monotonic() - last_heartbeat
+                >= self.heartbeat_interval.total_seconds()
+            ):
+                last_heartbeat = time.monotonic()
+                await self.heartbeat_pending()
+
+    async def poll_pending(self) -> None:
+        """Poll for the results of the pending operations once, and complete the activities waiting on those done."""
+        operation_ids = list(self._pending)
+        for start in range(0, len(operation_ids), self.max_batch_size):
+            batch = {
+                operation_id: self._pending[operation_id]
+                for operation_id in operation_ids[start : start + self.max_batch_size]
+                if operation_id in self._pending
+            }
+            try:
+                results = await self.poll(
+                    {
+                        operation_id: pending.request
+                        for operation_id, pending in batch.items()
+                    }
+                )
+            except Exception:
+                logger.warning(
+                    "Polling %s operations failed", len(batch), exc_info=True
+                )
+                continue
+            done = [
+                (operation_id, batch[operation_id], result)
+                for operation_id, result in results.items()
+                if operation_id in batch
+            ]
+            for operation_id, pending, _ in done:
+                self._forget(operation_id, pending)
+            await asyncio.gather(
+                *(
+                    self._complete(operation_id, pending, result)
+                    for operation_id, pending, result in done
+                )
+            )
+
+    async def heartbeat_pending(self) -> None:
+        await asyncio.gather(
+            *(
+                self._heartbeat(operation_id, pending)
+                for operation_id, pending in list(self._pending.items())
+            )
+        )
+
+    async def _complete(
+        self, operation_id: str, pending: _Pending, result: Any
+    ) -> None:
+        handle = self.client.get_async_activity_handle(task_token=pending.task_token)
+        try:
+            await handle.complete(result)
+        except Exception:
+            # E.g. the activity timed out, and its retry will get the result
+            logger.warning(
+                "Failed completing activity for operation %s",
+                operation_id,
+                exc_info=True,
+            )
+
+    async def _heartbeat(self, operation_id: str, pending: _Pending) -> None:
+        handle = self.client.get_async_activity_handle(task_token=pending.task_token)
+        try:
+            try:
+                await handle.heartbeat()
+            except AsyncActivityCancelledError:
+                # The workflow cancelled the activity
+                self._forget(operation_id, pending)
+                await handle.report_cancellation()
+            except RPCError as err:
+                if err.status == RPCStatusCode.NOT_FOUND:
+                    # The activity timed out without being retried, or its workflow was terminated, so it will never
+                    # complete
+                    self._forget(operation_id, pending)
+                raise
+        except Exception:
+            logger.warning(
+                "Failed heartbeating activity for operation %s",
+                operation_id,
+                exc_info=True,
+            )
+
+    def _forget(self, operation_id: str, pending: _Pending) -> None:
+        # Unless a retried activity replaced it meanwhile
+        if self._pending.get(operation_id) is pending:
+            del self._pending[operation_id]
@@ -0,0 +1,30 @@
+import asyncio
+
+from temporalio.client import Client
+from temporalio.envconfig import ClientConfig
+
+from polling.batch.workflows import GreetingWorkflow
+
+
+async def main():
+    config = ClientConfig.load_client_connect_config()
+    config.setdefault("target_host", "localhost:7233")
+    client = await Client.connect(**config)
+
+    # Run many workflows at once, all waiting on the service
+    results = await asyncio.gather(
+        *(
+            client.execute_workflow(
+                GreetingWorkflow.run,
+                f"World {i}",
+                id=f"batch-polling-{i}",
+                task_queue="batch-polling-task-queue",
+            )
+            for i in range(100)
+        )
+    )
+    print(f"Results: {results[0]} ... {results[-1]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,38 @@
+import asyncio
+from datetime import timedelta
+
+from temporalio.client import Client
+from temporalio.envconfig import ClientConfig
+from temporalio.worker import Worker
+
+from polling.batch.activities import BatchPollingActivities
+from polling.batch.poller import BatchPoller
+from polling.batch.workflows import GreetingWorkflow
+from polling.test_service import get_service_results
+
+
+async def main():
+    config = ClientConfig.load_client_connect_config()
+    config.setdefault("target_host", "localhost:7233")
+    client = await Client.connect(**config)
+
+    poller = BatchPoller(
+        client, get_service_results, heartbeat_interval=timedelta(seconds=20)
+    )
+    activities = BatchPollingActivities(poller)
+    worker = Worker(
+        client,
+        task_queue="batch-polling-task-queue",
+        workflows=[GreetingWorkflow],
+        activities=[activities.compose_greeting],
+    )
+    # Run the poller alongside the worker
+    poller_task = asyncio.create_task(poller.run())
+    try:
+        await worker.run()
+    finally:
+        poller_task.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from temporalio import workflow
+
+with workflow.unsafe.imports_passed_through():
+    from polling.batch.activities import BatchPollingActivities
+    from polling.test_service import ComposeGreetingInput
+
+
+@workflow.defn
+class GreetingWorkflow:
+    @workflow.run
+    async def run(self, name: str) -> str:
+        return await workflow.execute_activity_method(
+            BatchPollingActivities.compose_greeting,
+            ComposeGreetingInput("Hello", name),
+            # If the worker stops, the activity is retried once it times out
+            start_to_close_timeout=timedelta(minutes=10),
+            # The batch poller heartbeats every 20 seconds
+            heartbeat_timeout=timedelta(minutes=1),
+        )
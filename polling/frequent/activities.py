@@ -1,26 +1,27 @@
-import asyncio
+from datetime import timedelta
 
 from temporalio import activity
 
+from polling.backoff import CompletionTimes, PollingPolicy, poll_until_done
 from polling.test_service import ComposeGreetingInput, get_service_result
 
+policy = PollingPolicy(
+    initial_interval=timedelta(seconds=1),
+    backoff_coefficient=1.5,
+    maximum_interval=timedelta(seconds=10),
+)
+# How long the service usually takes, learned by this worker
+completion_times = CompletionTimes()
+
 
 @activity.defn
 async def compose_greeting(input: ComposeGreetingInput) -> str:
-    while True:
-        try:
-            try:
-                result = await get_service_result(input)
-                activity.logger.info(f"Exiting activity ${result}")
-                return result
-            except Exception:
-                # swallow exception since service is down
-                activity.logger.debug("Failed, trying again shortly", exc_info=True)
-
-            activity.heartbeat("Invoking activity")
-            await asyncio.sleep(1)
-        except asyncio.CancelledError:
-            # activity was either cancelled or workflow was completed or worker shut down
-            # if you need to clean up you can catch this.
-            # Here we are just reraising the exception
-            raise
+    # Poll until the service returns a result, heartbeating on every iteration.
+    # If the activity is cancelled, the workflow completed, or the worker shuts
+    # down, asyncio.CancelledError is raised here. If you need to clean up you
+    # can catch it.
+    result = await poll_until_done(
+        lambda: get_service_result(input), policy, completion_times
+    )
+    activity.logger.info(f"Exiting activity ${result}")
+    return result
@@ -1,10 +1,21 @@
+from datetime import timedelta
+
 from temporalio import activity
 
+from polling.backoff import CompletionTimes, PollingPolicy, poll_once
 from polling.test_service import ComposeGreetingInput, get_service_result
 
+policy = PollingPolicy(
+    initial_interval=timedelta(seconds=60),
+    backoff_coefficient=1.5,
+    maximum_interval=timedelta(minutes=10),
+)
+# How long the service usually takes, learned by this worker
+completion_times = CompletionTimes()
+
 
 @activity.defn
 async def compose_greeting(input: ComposeGreetingInput) -> str:
     # If this raises an exception because it's not done yet, the activity will
-    # continually be scheduled for retry
-    return await get_service_result(input)
+    # be retried after the delay the polling policy gives
+    return await poll_once(lambda: get_service_result(input), policy, completion_times)
@@ -1,7 +1,6 @@
 from datetime import timedelta
 
 from temporalio import workflow
-from temporalio.common import RetryPolicy
 
 with workflow.unsafe.imports_passed_through():
     from polling.infrequent.activities import ComposeGreetingInput, compose_greeting
@@ -15,8 +14,6 @@ class GreetingWorkflow:
             compose_greeting,
             ComposeGreetingInput("Hello", name),
             start_to_close_timeout=timedelta(seconds=2),
-            retry_policy=RetryPolicy(
-                backoff_coefficient=1.0,
-                initial_interval=timedelta(seconds=60),
-            ),
+            # The activity sets the delay before each retry, backing off from
+            # 60 seconds
         )
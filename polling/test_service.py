@@ -28,3 +28,17 @@ async def get_service_result(input):
         # and do not emit activity failure metrics.
         category=ApplicationErrorCategory.BENIGN,
     )
+
+
+async def get_service_results(
+    inputs: dict[str, ComposeGreetingInput],
+) -> dict[str, str]:
+    """Bulk version of `get_service_result`, taking inputs by operation ID and returning the results of the operations
+    that are done."""
+    print(f"Checking {len(inputs)} operations in one request")
+    results = {}
+    for operation_id, input in inputs.items():
+        attempts[operation_id] += 1
+        if attempts[operation_id] >= ERROR_ATTEMPTS:
+            results[operation_id] = f"{input.greeting}, {input.name}!"
+    return results
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import time
+from datetime import timedelta
+
+from temporalio import activity, workflow
+from temporalio.client import Client
+from temporalio.envconfig import ClientConfig
+from temporalio.worker import Worker
+
+from process_pool_activities.shared_state import SharedMemoryStateManager
+from process_pool_activities.warm_pool import Resource, WarmProcessPoolExecutor
+
+TASK_QUEUE = "process-pool-activities-resources-task-queue"
+
+
+def load_stop_words() -> frozenset[str]:
+    # Stands in for loading a model, compiling patterns or opening a connection
+    # pool
+    print(f"Loading stop words on PID {os.getpid()}")
+    time.sleep(2)
+    return frozenset(["a", "an", "and", "of", "the", "to"])
+
+
+# Loaded once in each process, the first time an activity there needs it
+stop_words = Resource(load_stop_words)
+
+
+@activity.defn
+def count_words(text: str) -> int:
+    return sum(1 for word in text.lower().split() if word not in stop_words.get())
+
+
+@workflow.defn
+class CountWordsWorkflow:
+    @workflow.run
+    async def run(self, texts: list[str]) -> int:
+        counts = await asyncio.gather(
+            *(
+                workflow.execute_activity(
+                    count_words, text, start_to_close_timeout=timedelta(seconds=10)
+                )
+                for text in texts
+            )
+        )
+        return sum(counts)
+
+
+async def main():
+    config = ClientConfig.load_client_connect_config()
+    config.setdefault("target_host", "localhost:7233")
+    client = await Client.connect(**config)
+
+    shared_state_manager = SharedMemoryStateManager()
+    # Each process loads the stop words once, and is replaced after 10
+    # activities or once it uses more than 512MB, to contain memory leaks
+    with WarmProcessPoolExecutor(
+        4, max_tasks_per_process=10, max_rss_mb=512
+    ) as activity_executor:
+        try:
+            async with Worker(
+                client,
+                task_queue=TASK_QUEUE,
+                workflows=[CountWordsWorkflow],
+                activities=[count_words],
+                activity_executor=activity_executor,
+                shared_state_manager=shared_state_manager,
+            ):
+                result = await client.execute_workflow(
+                    CountWordsWorkflow.run,
+                    [
+                        f"The quick brown fox number {i} jumps over the lazy dog"
+                        for i in range(50)
+                    ],
+                    id="process-pool-activities-resources-workflow-id",
+                    task_queue=TASK_QUEUE,
+                )
+                print(f"Result: {result} words")
+        finally:
+            shared_state_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+import argparse
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable
+
+from process_pool_activities.shared_memory_executor import SharedMemoryExecutor
+
+
+def size_of(data: Any) -> int:
+    return len(data)
+
+
+def echo(data: Any) -> Any:
+    return data
+
+
+def seconds_per_call(
+    executor: Executor, fn: Callable[[Any], Any], payload: Any, calls: int
+) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        executor.submit(fn, payload).result()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare passing large arguments and results to a process pool through its pipe and through shared memory"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100],
+        help="payload sizes in MB",
+    )
+    parser.add_argument("--calls", type=int, default=10, help="calls per measurement")
+    args = parser.parse_args()
+
+    with SharedMemoryExecutor(ProcessPoolExecutor(1)) as shared:
+        pool = shared.executor
+        # Start the pool process
+        pool.submit(size_of, b"").result()
+        print(
+            f"{'payload':>16} {'argument (pipe)':>16} {'argument (shm)':>16} {'both (pipe)':>16} {'both (shm)':>16}"
+        )
+        for size in args.sizes:
+            for payload in (bytes(size * 1024 * 1024), bytearray(size * 1024 * 1024)):
+                timings = [
+                    seconds_per_call(executor, fn, payload, args.calls)
+                    for fn in (size_of, echo)
+                    for executor in (pool, shared)
+                ]
+                print(
+                    f"{size:>4}MB {type(payload).__name__:>10} "
+                    + " ".join(f"{timing * 1000:>14.1f}ms" for timing in timings)
+                )
+
+
+if __name__ == "__main__":
+    main()
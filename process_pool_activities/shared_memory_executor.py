@@ -0,0 +1,343 @@
+import collections
+import copyreg
+import io
+import os
+import pickle
+import threading
+from concurrent.futures import Executor, Future
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.reduction import ForkingPickler
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+from process_pool_activities.shared_state import attach_shared_memory
+
+# Segments of the worker's pool attached to by this process, least recently used first
+_attached: collections.OrderedDict[str, shared_memory.SharedMemory] = (
+    collections.OrderedDict()
+)
+_MAX_ATTACHED = 16
+# Segments that couldn't be unmapped, because something still uses their buffers
+_lingering: list[shared_memory.SharedMemory] = []
+# Windows destroys a segment once no process has it open, so a segment created in a pool process for a result would be
+# gone before the worker attaches to it
+_RESULT_SEGMENTS_OUTLIVE_CREATOR = os.name != "nt"
+
+
+class _Pickled(NamedTuple):
+    data: bytes
+    # Segment holding the large bytes, then the out-of-band buffers, one after another, if any
+    segment_name: Optional[str]
+    bytes_sizes: tuple[int, ...]
+    buffer_sizes: tuple[int, ...]
+    # Size of what would have been pickled separately, had there been a segment for it
+    pipe_fallback_size: int = 0
+
+
+class _Pickler(pickle.Pickler):
+    """Pickles `bytes`, `bytearray` and buffers of `threshold` bytes or more separately, instead of copying them into
+    the pickle data.
+
+    Buffers are those of anything supporting pickle protocol 5 out-of-band buffers, like NumPy arrays and Arrow arrays
+    and tables.
+    """
+
+    def __init__(self, file: io.BytesIO, threshold: int) -> None:
+        super().__init__(file, protocol=5, buffer_callback=self._buffer)
+        self.file = file
+        # Pickle whatever the process pool itself can
+        self.dispatch_table = copyreg.dispatch_table.copy()
+        self.dispatch_table.update(ForkingPickler._extra_reducers)  # type: ignore[attr-defined]
+        self.threshold = threshold
+        self.bytes: list[Union[bytes, bytearray]] = []
+        self.buffers: list[memoryview] = []
+
+    def persistent_id(self, obj: Any) -> Optional[tuple[type, int]]:
+        # These are always pickled in-band, and bytes aren't even passed to reducer_override
+        if type(obj) in (bytes, bytearray) and len(obj) >= self.threshold:
+            self.bytes.append(obj)
+            return type(obj), len(self.bytes) - 1
+        return None
+
+    def _buffer(self, buffer: pickle.PickleBuffer) -> bool:
+        raw = buffer.raw()
+        if raw.nbytes < self.threshold:
+            # Pickled in-band
+            return True
+        self.buffers.append(raw)
+        return False
+
+    @property
+    def size(self) -> int:
+        """Size of the segment needed for what was pickled separately."""
+        return sum(len(data) for data in self.bytes) + sum(
+            buffer.nbytes for buffer in self.buffers
+        )
+
+    def pickled(self, segment: Optional[shared_memory.SharedMemory]) -> _Pickled:
+        """Copy what was pickled separately into `segment`."""
+        if segment is None:
+            return _Pickled(self.file.getvalue(), None, (), ())
+        assert segment.buf is not None
+        offset = 0
+        for buffer in [memoryview(data) for data in self.bytes] + self.buffers:
+            segment.buf[offset : offset + buffer.nbytes] = buffer.cast("B")
+            offset += buffer.nbytes
+        return _Pickled(
+            self.file.getvalue(),
+            segment.name,
+            tuple(len(data) for data in self.bytes),
+            tuple(buffer.nbytes for buffer in self.buffers),
+        )
+
+    @classmethod
+    def pickle(cls, obj: Any, threshold: int) -> "_Pickler":
+        pickler = cls(io.BytesIO(), threshold)
+        pickler.dump(obj)
+        return pickler
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, pickled: _Pickled, views: list[memoryview], copy: bool) -> None:
+        bytes_count = len(pickled.bytes_sizes)
+        super().__init__(
+            io.BytesIO(pickled.data),
+            buffers=[bytearray(view) for view in views[bytes_count:]]
+            if copy
+            else views[bytes_count:],
+        )
+        self.bytes_views = views[:bytes_count]
+
+    def persistent_load(self, pid: Any) -> Union[bytes, bytearray]:
+        bytes_type, index = pid
+        return bytes_type(self.bytes_views[index])
+
+
+def _load(
+    pickled: _Pickled, segment: Optional[shared_memory.SharedMemory], copy: bool
+) -> Any:
+    """Unpickle `pickled`, with its buffers in `segment`. Unless `copy`, the result uses buffers in the segment."""
+    if segment is None:
+        return pickle.loads(pickled.data)
+    assert segment.buf is not None
+    views = []
+    offset = 0
+    for size in pickled.bytes_sizes + pickled.buffer_sizes:
+        views.append(segment.buf[offset : offset + size])
+        offset += size
+    try:
+        return _Unpickler(pickled, views, copy).load()
+    finally:
+        if copy:
+            for view in views:
+                view.release()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    segment = _attached.pop(name, None)
+    if segment is None:
+        segment = attach_shared_memory(name)
+    _attached[name] = segment
+    while len(_attached) > _MAX_ATTACHED:
+        _close(_attached.popitem(last=False)[1])
+    return segment
+
+
+def _close(segment: shared_memory.SharedMemory) -> None:
+    try:
+        segment.close()
+    except BufferError:
+        _lingering.append(segment)
+
+
+def _unlink(segment: shared_memory.SharedMemory) -> None:
+    segment.close()
+    segment.unlink()
+
+
+def _run(
+    fn: Callable[..., Any],
+    arguments: _Pickled,
+    result_segment_name: Optional[str],
+    threshold: int,
+) -> _Pickled:
+    for lingering in _lingering[:]:
+        _lingering.remove(lingering)
+        _close(lingering)
+
+    args, kwargs = _load(
+        arguments,
+        _attach(arguments.segment_name) if arguments.segment_name else None,
+        copy=False,
+    )
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        # The worker reuses the segment once the activity is done
+        del args, kwargs
+    pickler = _Pickler.pickle(result, threshold)
+    size = pickler.size
+    if not size:
+        return pickler.pickled(None)
+    if result_segment_name:
+        segment = _attach(result_segment_name)
+        if segment.size >= size:
+            return pickler.pickled(segment)
+    if not _RESULT_SEGMENTS_OUTLIVE_CREATOR:
+        # Send the result through the pipe, and the worker provides a large enough segment next time
+        return _Pickled(bytes(ForkingPickler.dumps(result)), None, (), (), size)
+    # The worker unlinks it once it has read the result
+    segment = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        return pickler.pickled(segment)
+    finally:
+        segment.close()
+
+
+class _SegmentPool:
+    """Shared memory segments reused between activities, so their memory stays allocated and mapped by every process.
+
+    Free segments are kept up to `max_free_bytes` in total, evicting the smallest first.
+    """
+
+    def __init__(self, max_free_bytes: int) -> None:
+        self.max_free_bytes = max_free_bytes
+        self._free: list[shared_memory.SharedMemory] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self, size: int) -> shared_memory.SharedMemory:
+        with self._lock:
+            fits = [segment for segment in self._free if segment.size >= size]
+            if fits:
+                segment = min(fits, key=lambda segment: segment.size)
+                self._free.remove(segment)
+                return segment
+        # Round up, so growing sizes don't each need a new segment. Pages are only allocated once used.
+        return shared_memory.SharedMemory(
+            create=True, size=1 << (size - 1).bit_length()
+        )
+
+    def release(self, segment: shared_memory.SharedMemory) -> None:
+        with self._lock:
+            if self._closed:
+                _unlink(segment)
+                return
+            self._free.append(segment)
+            self._free.sort(key=lambda segment: segment.size)
+            while sum(segment.size for segment in self._free) > self.max_free_bytes:
+                _unlink(self._free.pop(0))
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            while self._free:
+                _unlink(self._free.pop())
+
+
+class SharedMemoryExecutor(Executor):
+    """Executor wrapping a process pool, that passes large arguments and results through shared memory.
+
+    The process pool pickles arguments and results through a pipe, copying every byte of them several times. Here,
+    `bytes`, and buffers of objects supporting pickle protocol 5 like `bytearray`, NumPy arrays or Arrow tables, of
+    `threshold` bytes or more in arguments and results are copied into shared memory instead, and only the rest is
+    pickled through the pipe. Activities use NumPy and Arrow arguments in shared memory directly, while `bytes` and
+    `bytearray` are copied out once, and the worker copies results out once, since they outlive the activity. Arguments
+    must not be used once the activity is done.
+
+    Segments are reused, since allocating shared memory costs more than copying into it. Each activity gets a segment
+    for its result as large as the previous result. Larger results get a new segment, except on Windows, where they go
+    through the pipe, since a segment is destroyed once the process that created it closes it. Free segments are kept up
+    to `max_free_bytes`, and unlinked on shutdown. If the worker crashes, the multiprocessing resource tracker unlinks
+    them.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        threshold: int = 1024 * 1024,
+        max_free_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        self.executor = executor
+        self.threshold = threshold
+        if os.name == "posix":
+            # Processes forked before the resource tracker is running start their own, which then considers the
+            # segments they create for results leaked, although the worker unlinks them
+            resource_tracker.ensure_running()
+        self._segments = _SegmentPool(max_free_bytes)
+        self._result_size = 0
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        pickler = _Pickler.pickle((args, kwargs), self.threshold)
+        segments = []
+        try:
+            if pickler.size:
+                segments.append(self._segments.acquire(pickler.size))
+            arguments = pickler.pickled(segments[0] if segments else None)
+            result_segment = None
+            if self._result_size:
+                result_segment = self._segments.acquire(self._result_size)
+                segments.append(result_segment)
+            inner = self.executor.submit(
+                _run,
+                fn,
+                arguments,
+                result_segment.name if result_segment else None,
+                self.threshold,
+            )
+        except BaseException:
+            for segment in segments:
+                self._segments.release(segment)
+            raise
+        outer: Future = Future()
+        outer.add_done_callback(lambda outer: outer.cancelled() and inner.cancel())
+        inner.add_done_callback(
+            lambda inner: self._complete(inner, outer, result_segment, segments)
+        )
+        return outer
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self.executor.shutdown(wait, cancel_futures=cancel_futures)
+        self._segments.close()
+
+    def _complete(
+        self,
+        inner: Future,
+        outer: Future,
+        result_segment: Optional[shared_memory.SharedMemory],
+        segments: list[shared_memory.SharedMemory],
+    ) -> None:
+        result: Any = None
+        exception: Optional[BaseException] = None
+        try:
+            if inner.cancelled():
+                outer.cancel()
+                return
+            exception = inner.exception()
+            if exception is None:
+                pickled: _Pickled = inner.result()
+                self._result_size = (
+                    sum(pickled.bytes_sizes + pickled.buffer_sizes)
+                    or pickled.pipe_fallback_size
+                )
+                if result_segment and pickled.segment_name == result_segment.name:
+                    result = _load(pickled, result_segment, copy=True)
+                elif pickled.segment_name:
+                    # Tracked, so unlinking unregisters it from the resource tracker for the process that created it
+                    segment = shared_memory.SharedMemory(pickled.segment_name)
+                    try:
+                        result = _load(pickled, segment, copy=True)
+                    finally:
+                        _unlink(segment)
+                else:
+                    result = _load(pickled, None, copy=True)
+        except BaseException as err:
+            exception = err
+        finally:
+            for segment in segments:
+                self._segments.release(segment)
+        if not outer.set_running_or_notify_cancel():
+            return
+        if exception is not None:
+            outer.set_exception(exception)
+        else:
+            outer.set_result(result)
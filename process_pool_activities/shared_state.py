@@ -0,0 +1,312 @@
+import asyncio
+import logging
+import pickle
+import queue
+import struct
+import sys
+import threading
+import time
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Optional, cast
+
+from temporalio.worker import SharedHeartbeatSender, SharedStateManager
+
+logger = logging.getLogger(__name__)
+
+# Ring header: position up to which the activity process has written, and up to which the worker has read. Positions
+# only increase, and each is only written by one side.
+_POSITION = struct.Struct("<Q")
+_HEADER_SIZE = 2 * _POSITION.size
+_LENGTH = struct.Struct("<I")
+
+# Segments attached by this process, by name. Processes in the pool attach once and reuse the mapping for every
+# activity.
+_segments: dict[str, shared_memory.SharedMemory] = {}
+_segments_lock = threading.Lock()
+
+
+def _buffer(name: str) -> memoryview:
+    segment = _segments.get(name)
+    if segment is None:
+        with _segments_lock:
+            segment = _segments.get(name)
+            if segment is None:
+                segment = attach_shared_memory(name)
+                _segments[name] = segment
+    assert segment.buf is not None
+    return segment.buf
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to the shared memory segment `name`, created by another process that is responsible for unlinking it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)  # type: ignore[call-arg]
+    # Before Python 3.13, attaching registers the segment with the resource tracker, which then unlinks it (or warns
+    # that it leaked) when this process exits, although the worker that created it still uses it
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+class _SharedFlag:
+    """A `threading.Event` stand-in stored in a byte of shared memory, so it can be pickled to pool processes.
+
+    Nothing can wake a waiting process when the flag is set, so `wait` polls.
+    """
+
+    def __init__(self, segment_name: str, index: int) -> None:
+        self.segment_name = segment_name
+        self.index = index
+
+    def is_set(self) -> bool:
+        return _buffer(self.segment_name)[self.index] == 1
+
+    def set(self) -> None:
+        _buffer(self.segment_name)[self.index] = 1
+
+    def clear(self) -> None:
+        _buffer(self.segment_name)[self.index] = 0
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.001
+        while not self.is_set():
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        return True
+
+    def __reduce__(self) -> tuple:
+        # Copies in other processes don't free the flag when collected
+        return (_SharedFlag, (self.segment_name, self.index))
+
+
+class _HeartbeatRing:
+    """Single-producer single-consumer ring buffer of length-prefixed messages in shared memory.
+
+    Each running activity gets its own ring, so the activity process is the only writer and the worker the only reader.
+    """
+
+    def __init__(self, segment_name: str, offset: int, capacity: int) -> None:
+        self.segment_name = segment_name
+        self.offset = offset
+        self.capacity = capacity
+
+    def reset(self) -> None:
+        buf = _buffer(self.segment_name)
+        buf[self.offset : self.offset + _HEADER_SIZE] = bytes(_HEADER_SIZE)
+
+    def write(self, data: bytes, timeout: float) -> None:
+        message = _LENGTH.pack(len(data)) + data
+        if len(message) > self.capacity:
+            raise ValueError(
+                f"Heartbeat of {len(data)} bytes doesn't fit the {self.capacity} byte heartbeat buffer"
+            )
+        buf = _buffer(self.segment_name)
+        deadline = time.monotonic() + timeout
+        while True:
+            (written,) = _POSITION.unpack_from(buf, self.offset)
+            (read,) = _POSITION.unpack_from(buf, self.offset + _POSITION.size)
+            if self.capacity - (written - read) >= len(message):
+                break
+            if time.monotonic() > deadline:
+                raise queue.Full("Heartbeat buffer is full")
+            time.sleep(0.001)
+        self._copy_in(buf, written, message)
+        # Publish the message only once it is written
+        _POSITION.pack_into(buf, self.offset, written + len(message))
+
+    def read_all(self) -> list[bytes]:
+        buf = _buffer(self.segment_name)
+        (written,) = _POSITION.unpack_from(buf, self.offset)
+        (read,) = _POSITION.unpack_from(buf, self.offset + _POSITION.size)
+        messages = []
+        while read < written:
+            (length,) = _LENGTH.unpack(self._copy_out(buf, read, _LENGTH.size))
+            messages.append(self._copy_out(buf, read + _LENGTH.size, length))
+            read += _LENGTH.size + length
+        _POSITION.pack_into(buf, self.offset + _POSITION.size, read)
+        return messages
+
+    def _copy_in(self, buf: memoryview, position: int, data: bytes) -> None:
+        start = position % self.capacity
+        first = min(len(data), self.capacity - start)
+        base = self.offset + _HEADER_SIZE
+        buf[base + start : base + start + first] = data[:first]
+        buf[base : base + len(data) - first] = data[first:]
+
+    def _copy_out(self, buf: memoryview, position: int, length: int) -> bytes:
+        start = position % self.capacity
+        first = min(length, self.capacity - start)
+        base = self.offset + _HEADER_SIZE
+        return bytes(buf[base + start : base + start + first]) + bytes(
+            buf[base : base + length - first]
+        )
+
+
+class _SharedMemoryHeartbeatSender(SharedHeartbeatSender):
+    def __init__(self, ring: _HeartbeatRing) -> None:
+        super().__init__()
+        self._ring = ring
+
+    def send_heartbeat(self, task_token: bytes, *details: Any) -> None:
+        # Like the multiprocessing manager's queue, wait up to 30 seconds for room
+        self._ring.write(pickle.dumps(details), timeout=30)
+
+
+class _Heartbeater:
+    def __init__(
+        self, ring_index: int, ring: _HeartbeatRing, heartbeat: Callable[..., None]
+    ) -> None:
+        self.ring_index = ring_index
+        self.ring = ring
+        self.heartbeat = heartbeat
+        # Set when unregistering, to the future to complete once the ring is drained
+        self.unregistered: Optional[
+            tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]
+        ] = None
+
+
+class SharedMemoryStateManager(SharedStateManager):
+    """Shared state manager for activities run in a process pool, backed by `multiprocessing.shared_memory`.
+
+    The state manager from `SharedStateManager.create_from_multiprocessing` sends every heartbeat through a queue, and
+    every cancellation check through an event, living in a manager server process, each a pickled round trip over a
+    socket. Here, cancellation and shutdown events are bytes in a shared flag array that activities read directly. Each
+    running activity writes its heartbeats to its own ring buffer, which a thread in the worker drains every
+    `poll_interval` seconds, and as soon as the activity is done. Pool processes attach to the shared memory once and reuse it for every activity.
+
+    At most `max_events` events can exist and `max_heartbeaters` activities run at once. Each activity's heartbeats
+    must fit in `heartbeat_buffer_size` bytes until the worker reads them. Share one manager between workers in a
+    process, like the manager-based one, and `close` it once they have shut down.
+    """
+
+    def __init__(
+        self,
+        max_events: int = 4096,
+        max_heartbeaters: int = 1024,
+        heartbeat_buffer_size: int = 16 * 1024,
+        poll_interval: float = 0.01,
+    ) -> None:
+        super().__init__()
+        self.heartbeat_buffer_size = heartbeat_buffer_size
+        self.poll_interval = poll_interval
+        self._flags = shared_memory.SharedMemory(create=True, size=max_events)
+        self._rings = shared_memory.SharedMemory(
+            create=True, size=max_heartbeaters * (_HEADER_SIZE + heartbeat_buffer_size)
+        )
+        _segments[self._flags.name] = self._flags
+        _segments[self._rings.name] = self._rings
+        self._finalizer = weakref.finalize(self, _unlink, [self._flags, self._rings])
+
+        self._lock = threading.Lock()
+        self._free_flags = list(reversed(range(max_events)))
+        self._free_rings = list(reversed(range(max_heartbeaters)))
+        self._heartbeaters: dict[bytes, _Heartbeater] = {}
+        self._reader: Optional[threading.Thread] = None
+        self._wake_reader = threading.Event()
+
+    def new_event(self) -> threading.Event:
+        with self._lock:
+            if not self._free_flags:
+                raise RuntimeError("All shared events are in use, increase max_events")
+            index = self._free_flags.pop()
+        flag = _SharedFlag(self._flags.name, index)
+        flag.clear()
+        # The SDK drops its event once the activity is done, which frees the flag
+        weakref.finalize(flag, self._free_flag, index)
+        # Only is_set, set, clear and wait are used
+        return cast(threading.Event, flag)
+
+    async def register_heartbeater(
+        self, task_token: bytes, heartbeat: Callable[..., None]
+    ) -> SharedHeartbeatSender:
+        with self._lock:
+            if not self._free_rings:
+                raise RuntimeError(
+                    "All heartbeat buffers are in use, increase max_heartbeaters"
+                )
+            index = self._free_rings.pop()
+            ring = _HeartbeatRing(
+                self._rings.name,
+                index * (_HEADER_SIZE + self.heartbeat_buffer_size),
+                self.heartbeat_buffer_size,
+            )
+            ring.reset()
+            self._heartbeaters[task_token] = _Heartbeater(index, ring, heartbeat)
+            if self._reader is None:
+                self._reader = threading.Thread(
+                    target=self._read_heartbeats,
+                    name="shared-memory-heartbeats",
+                    daemon=True,
+                )
+                self._reader.start()
+        return _SharedMemoryHeartbeatSender(ring)
+
+    async def unregister_heartbeater(self, task_token: bytes) -> None:
+        # The reader delivers any heartbeats still in the ring before removing it. Heartbeat functions wait on the event
+        # loop, so they can't be called from here.
+        loop = asyncio.get_running_loop()
+        drained = loop.create_future()
+        with self._lock:
+            self._heartbeaters[task_token].unregistered = (loop, drained)
+        self._wake_reader.set()
+        await drained
+
+    def close(self) -> None:
+        """Release the shared memory. Activities must no longer be running."""
+        self._finalizer()
+
+    def _free_flag(self, index: int) -> None:
+        with self._lock:
+            self._free_flags.append(index)
+
+    def _read_heartbeats(self) -> None:
+        while True:
+            # Cleared before looking, so activities finishing meanwhile are picked up straight after
+            self._wake_reader.clear()
+            with self._lock:
+                heartbeaters = list(self._heartbeaters.items())
+                if not heartbeaters:
+                    self._reader = None
+                    return
+            for task_token, heartbeater in heartbeaters:
+                # Check before draining, since anything sent before unregistering is in the ring by then
+                unregistered = heartbeater.unregistered
+                for message in heartbeater.ring.read_all():
+                    try:
+                        # We count on this being a cheap function, as for the manager-based state manager
+                        heartbeater.heartbeat(*pickle.loads(message))
+                    except Exception:
+                        logger.exception("Failed to deliver shared memory heartbeat")
+                if unregistered:
+                    with self._lock:
+                        del self._heartbeaters[task_token]
+                        self._free_rings.append(heartbeater.ring_index)
+                    loop, drained = unregistered
+                    loop.call_soon_threadsafe(_set_done, drained)
+            self._wake_reader.wait(self.poll_interval)
+
+
+def _set_done(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _unlink(segments: list[shared_memory.SharedMemory]) -> None:
+    for segment in segments:
+        _segments.pop(segment.name, None)
+        try:
+            segment.close()
+        except BufferError:
+            # Still referenced by a memoryview, the mapping goes when the process exits
+            pass
+        segment.unlink()
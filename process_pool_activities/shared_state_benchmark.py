@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from temporalio.worker import SharedHeartbeatSender, SharedStateManager
+
+from process_pool_activities.shared_state import SharedMemoryStateManager
+
+
+def run_activity(
+    task_token: bytes,
+    sender: SharedHeartbeatSender,
+    cancelled: Any,
+    worker_shutdown: Any,
+    heartbeats: int,
+    cancellation_checks: int,
+) -> None:
+    # What the SDK does on behalf of an activity calling activity.heartbeat and
+    # activity.is_cancelled in a pool process
+    for i in range(heartbeats):
+        sender.send_heartbeat(task_token, i)
+    for _ in range(cancellation_checks):
+        cancelled.is_set()
+    worker_shutdown.is_set()
+
+
+async def run_activities(
+    manager: SharedStateManager,
+    executor: ProcessPoolExecutor,
+    activities: int,
+    concurrency: int,
+    heartbeats: int,
+    cancellation_checks: int,
+) -> int:
+    """Run activities like the worker does, returning how many heartbeats were delivered."""
+    loop = asyncio.get_running_loop()
+    delivered = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def heartbeat(*details: Any) -> None:
+        nonlocal delivered
+        delivered += 1
+
+    async def run(index: int) -> None:
+        async with semaphore:
+            task_token = f"task-token-{index}".encode()
+            cancelled = manager.new_event()
+            worker_shutdown = manager.new_event()
+            sender = await manager.register_heartbeater(task_token, heartbeat)
+            try:
+                await loop.run_in_executor(
+                    executor,
+                    run_activity,
+                    task_token,
+                    sender,
+                    cancelled,
+                    worker_shutdown,
+                    heartbeats,
+                    cancellation_checks,
+                )
+            finally:
+                await manager.unregister_heartbeater(task_token)
+
+    await asyncio.gather(*(run(i) for i in range(activities)))
+    return delivered
+
+
+async def benchmark(
+    name: str, manager: SharedStateManager, args: argparse.Namespace
+) -> None:
+    with ProcessPoolExecutor(args.processes) as executor:
+        # Start the pool processes, and attach them to the shared state
+        await run_activities(manager, executor, args.processes, args.processes, 1, 1)
+
+        start = time.perf_counter()
+        await run_activities(manager, executor, args.activities, args.processes, 0, 0)
+        overhead = (time.perf_counter() - start) / args.activities
+
+        start = time.perf_counter()
+        await run_activities(
+            manager, executor, args.processes, args.processes, 0, args.checks
+        )
+        checks = args.processes * args.checks / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        delivered = await run_activities(
+            manager, executor, args.processes, args.processes, args.heartbeats, 0
+        )
+        heartbeats = delivered / (time.perf_counter() - start)
+
+    print(
+        f"{name:>13}: {overhead * 1000:6.2f}ms per activity, "
+        f"{checks:10,.0f} cancellation checks/s, {heartbeats:9,.0f} heartbeats/s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the multiprocessing manager and shared memory shared state managers"
+    )
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument(
+        "--activities", type=int, default=1000, help="activities per measurement"
+    )
+    parser.add_argument(
+        "--checks",
+        type=int,
+        default=100000,
+        help="cancellation checks per activity, with one activity per process",
+    )
+    parser.add_argument(
+        "--heartbeats",
+        type=int,
+        default=10000,
+        help="heartbeats per activity, with one activity per process",
+    )
+    args = parser.parse_args()
+
+    with multiprocessing.Manager() as sync_manager:
+        await benchmark(
+            "manager",
+            SharedStateManager.create_from_multiprocessing(sync_manager),
+            args,
+        )
+    shared_memory_manager = SharedMemoryStateManager()
+    try:
+        await benchmark("shared memory", shared_memory_manager, args)
+    finally:
+        shared_memory_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,260 @@
+import collections
+import concurrent.futures
+import functools
+import logging
+import multiprocessing.util
+import os
+import sys
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Generic, NamedTuple, Optional, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Resources created in this process, in the order they were created
+_created: dict["Resource[Any]", Any] = {}
+_lock = threading.RLock()
+
+
+class Resource(Generic[T]):
+    """Something expensive to create, like a loaded model or a connection pool, created at most once per process the
+    first time it is used there, and reused by every activity that runs in the process afterwards.
+
+    Define resources at module level, so activities can use them in any process:
+
+        tokenizer = Resource(load_tokenizer)
+
+        @activity.defn
+        def tokenize(text: str) -> list[int]:
+            return tokenizer.get().encode(text)
+
+    In processes of a `WarmProcessPoolExecutor`, resources are passed to `close`, if given, when the process exits.
+    """
+
+    def __init__(
+        self, create: Callable[[], T], close: Optional[Callable[[T], None]] = None
+    ) -> None:
+        self.create = create
+        self.close = close
+
+    def get(self) -> T:
+        with _lock:
+            if self not in _created:
+                _created[self] = self.create()
+            return cast(T, _created[self])
+
+
+def close_resources() -> None:
+    """Close the resources created in this process, most recently created first."""
+    with _lock:
+        created = list(_created.items())
+        _created.clear()
+    for resource, value in reversed(created):
+        if resource.close:
+            try:
+                resource.close(value)
+            except Exception:
+                logger.exception("Failed closing resource %r", value)
+
+
+def _forget_resources() -> None:
+    global _lock
+    # A forked process creates its own resources, and the lock may have been held by a thread that isn't there anymore
+    _lock = threading.RLock()
+    _created.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_resources)
+
+
+def _rss_mb() -> Optional[float]:
+    if sys.platform == "linux":
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    if sys.platform == "darwin":
+        import resource
+
+        # Only the peak is available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**20
+    return None
+
+
+def _initialize(initializer: Optional[Callable[..., Any]], initargs: tuple) -> None:
+    # Unlike atexit handlers, finalizers with an exit priority run when a pool process exits
+    multiprocessing.util.Finalize(None, close_resources, exitpriority=0)
+    if initializer:
+        initializer(*initargs)
+
+
+def _run(
+    fn: Callable[..., Any], args: tuple, kwargs: dict[str, Any], measure_rss: bool
+) -> tuple[Any, Optional[float]]:
+    result = fn(*args, **kwargs)
+    return result, _rss_mb() if measure_rss else None
+
+
+class _Process:
+    def __init__(self, executor: ProcessPoolExecutor) -> None:
+        self.executor = executor
+        self.tasks = 0
+
+
+class _WorkItem(NamedTuple):
+    future: Future
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: dict[str, Any]
+
+
+class WarmProcessPoolExecutor(Executor):
+    """Process pool for activities that need expensive setup, whose processes keep their `Resource`s between activities.
+
+    `initializer` is called with `initargs` in each process when it starts, like for `ProcessPoolExecutor`, e.g. to
+    create resources up front. To contain memory leaks, processes are replaced once they have run
+    `max_tasks_per_process` activities, or once their resident memory exceeds `max_rss_mb` after an activity (the peak
+    resident memory on macOS, and not measured on Windows). Resources created in a process are closed when it exits,
+    after being replaced or on shutdown.
+
+    Each process is run by its own single process `ProcessPoolExecutor`, so one of them can be shut down to replace it.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        *,
+        initializer: Optional[Callable[..., Any]] = None,
+        initargs: tuple = (),
+        max_tasks_per_process: Optional[int] = None,
+        max_rss_mb: Optional[float] = None,
+        mp_context: Optional[Any] = None,
+    ) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.initializer = initializer
+        self.initargs = initargs
+        self.max_tasks_per_process = max_tasks_per_process
+        self.max_rss_mb = max_rss_mb
+        self.mp_context = mp_context
+        self.replaced_processes = 0
+        self._lock = threading.Lock()
+        self._pending: collections.deque[_WorkItem] = collections.deque()
+        self._outstanding: set[Future] = set()
+        self._processes: set[_Process] = set()
+        self._idle: list[_Process] = []
+        # Threads waiting for replaced processes to exit
+        self._retiring: list[threading.Thread] = []
+        self._shutdown = False
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._pending.append(_WorkItem(future, fn, args, kwargs))
+            self._outstanding.add(future)
+        future.add_done_callback(self._forget)
+        self._dispatch()
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+            cancelled = []
+            if cancel_futures:
+                cancelled = list(self._pending)
+                self._pending.clear()
+            outstanding = list(self._outstanding)
+        for item in cancelled:
+            item.future.cancel()
+        self._dispatch()
+        if not wait:
+            return
+        concurrent.futures.wait(outstanding)
+        with self._lock:
+            processes = list(self._processes)
+            retiring = list(self._retiring)
+        for process in processes:
+            process.executor.shutdown(wait=True)
+        for thread in retiring:
+            thread.join()
+
+    def _forget(self, future: Future) -> None:
+        with self._lock:
+            self._outstanding.discard(future)
+
+    def _dispatch(self) -> None:
+        started = []
+        with self._lock:
+            while self._pending and (
+                self._idle or len(self._processes) < self.max_workers
+            ):
+                item = self._pending.popleft()
+                if not item.future.set_running_or_notify_cancel():
+                    continue
+                if self._idle:
+                    process = self._idle.pop()
+                else:
+                    process = _Process(
+                        ProcessPoolExecutor(
+                            1,
+                            mp_context=self.mp_context,
+                            initializer=_initialize,
+                            initargs=(self.initializer, self.initargs),
+                        )
+                    )
+                    self._processes.add(process)
+                started.append((process, item))
+            if self._shutdown and not self._pending:
+                idle, self._idle = self._idle, []
+                for process in idle:
+                    self._retire(process)
+        # Outside the lock, since callbacks of futures that are already done are called right away
+        for process, item in started:
+            try:
+                inner = process.executor.submit(
+                    _run, item.fn, item.args, item.kwargs, self.max_rss_mb is not None
+                )
+            except BaseException as err:
+                item.future.set_exception(err)
+                with self._lock:
+                    self._retire(process)
+                continue
+            inner.add_done_callback(functools.partial(self._done, process, item.future))
+
+    def _done(self, process: _Process, future: Future, inner: Future) -> None:
+        process.tasks += 1
+        replace = bool(
+            self.max_tasks_per_process and process.tasks >= self.max_tasks_per_process
+        )
+        try:
+            result, rss_mb = inner.result()
+        except BrokenProcessPool as err:
+            # The process died
+            replace = True
+            future.set_exception(err)
+        except BaseException as err:
+            future.set_exception(err)
+        else:
+            if self.max_rss_mb and rss_mb and rss_mb > self.max_rss_mb:
+                replace = True
+            future.set_result(result)
+        with self._lock:
+            if replace:
+                self.replaced_processes += 1
+                self._retire(process)
+            else:
+                self._idle.append(process)
+        self._dispatch()
+
+    def _retire(self, process: _Process) -> None:
+        # Called with the lock held. Don't wait for the process to exit, which includes closing its resources.
+        self._processes.discard(process)
+        self._retiring = [thread for thread in self._retiring if thread.is_alive()]
+        thread = threading.Thread(
+            target=process.executor.shutdown, name="retire-pool-process", daemon=True
+        )
+        thread.start()
+        self._retiring.append(thread)
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+
+from temporalio import activity, workflow
+from temporalio.client import Client
+from temporalio.envconfig import ClientConfig
+from temporalio.exceptions import CancelledError
+from temporalio.worker import Worker
+
+from process_pool_activities.shared_state import SharedMemoryStateManager
+
+TASK_QUEUE = "process-pool-activities-task-queue"
+
+
+@dataclass
+class ComposeGreetingInput:
+    greeting: str
+    name: str
+
+
+@activity.defn
+def compose_greeting(input: ComposeGreetingInput) -> str:
+    # Heartbeats go to a shared memory buffer and cancellation is read from
+    # shared memory, without a round trip to another process
+    for i in range(0, 30):
+        activity.heartbeat(i)
+        if activity.is_cancelled():
+            raise CancelledError()
+        time.sleep(0.1)
+    return f"{input.greeting}, {input.name} from PID {os.getpid()}!"
+
+
+@workflow.defn
+class GreetingWorkflow:
+    @workflow.run
+    async def run(self, name: str) -> str:
+        return await workflow.execute_activity(
+            compose_greeting,
+            ComposeGreetingInput("Hello", name),
+            start_to_close_timeout=timedelta(seconds=10),
+            heartbeat_timeout=timedelta(seconds=2),
+        )
+
+
+async def main():
+    config = ClientConfig.load_client_connect_config()
+    config.setdefault("target_host", "localhost:7233")
+    client = await Client.connect(**config)
+
+    shared_state_manager = SharedMemoryStateManager()
+    try:
+        async with Worker(
+            client,
+            task_queue=TASK_QUEUE,
+            workflows=[GreetingWorkflow],
+            activities=[compose_greeting],
+            activity_executor=ProcessPoolExecutor(5),
+            # A drop-in replacement for
+            # SharedStateManager.create_from_multiprocessing(multiprocessing.Manager())
+            shared_state_manager=shared_state_manager,
+        ):
+            results = await asyncio.gather(
+                *(
+                    client.execute_workflow(
+                        GreetingWorkflow.run,
+                        f"World {i}",
+                        id=f"process-pool-activities-workflow-id-{i}",
+                        task_queue=TASK_QUEUE,
+                    )
+                    for i in range(10)
+                )
+            )
+            for result in results:
+                print(f"Result: {result}")
+    finally:
+        shared_state_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,231 @@
+"""Payload size and conversion/codec latency metrics.
+
+Wrap any data converter with `metered_data_converter` to record, through a runtime's metric meter (and so its Prometheus
+endpoint):
+
+* `payload_size`: histogram of payload sizes in bytes
+* `payload_latency`: histogram of how long converting or encoding/decoding a batch of payloads takes
+
+Both have `stage` (`converter` or `codec`) and `direction` (`outbound` or `inbound`) labels, plus `kind` (`activity`,
+`workflow` or `other`) and `type` (activity or workflow type) taken from the serialization context the SDK passes to
+the converter and codec. Sizes are also labeled with the payload's `encoding`. Label values are capped so the number of
+series stays bounded.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import time
+from datetime import timedelta
+from typing import Any, Mapping, Optional, Sequence, Type, TypeVar
+
+import temporalio.converter
+import temporalio.runtime
+from temporalio import workflow
+from temporalio.api.common.v1 import Payload
+from temporalio.common import MetricHistogram, MetricHistogramTimedelta, MetricMeter
+from temporalio.converter import (
+    ActivitySerializationContext,
+    DataConverter,
+    PayloadCodec,
+    PayloadConverter,
+    SerializationContext,
+    WithSerializationContext,
+    WorkflowSerializationContext,
+)
+
+MetricT = TypeVar("MetricT", MetricHistogram, MetricHistogramTimedelta)
+
+# Label value used once a label has seen max_label_values distinct values
+OTHER_LABEL_VALUE = "__other__"
+
+
+class PayloadInstruments:
+    """The payload histograms, with the instrument bound to each attribute set cached."""
+
+    def __init__(self, meter: MetricMeter, max_label_values: int = 100) -> None:
+        self.max_label_values = max_label_values
+        self._label_values: dict[str, set[str]] = {}
+        self._bound: dict[tuple, Any] = {}
+        self.size = meter.create_histogram(
+            "payload_size", description="Size of payloads", unit="bytes"
+        )
+        self.latency = meter.create_histogram_timedelta(
+            "payload_latency",
+            description="Time to convert or encode/decode a batch of payloads",
+            unit="duration",
+        )
+
+    def bind(self, metric: MetricT, attributes: Mapping[str, str]) -> MetricT:
+        labels = []
+        for key, value in attributes.items():
+            values = self._label_values.setdefault(key, set())
+            if value not in values:
+                if len(values) >= self.max_label_values:
+                    value = OTHER_LABEL_VALUE
+                else:
+                    values.add(value)
+            labels.append((key, value))
+
+        cache_key = (metric.name, tuple(labels))
+        bound = self._bound.get(cache_key)
+        if bound is None:
+            bound = metric.with_additional_attributes(dict(labels))
+            self._bound[cache_key] = bound
+        return bound
+
+    def record(
+        self,
+        stage: str,
+        direction: str,
+        context: Optional[SerializationContext],
+        payloads: Sequence[Payload],
+        elapsed: float,
+    ) -> None:
+        # Workflow code converts the same payloads again when it replays
+        if workflow.in_workflow() and workflow.unsafe.is_replaying():
+            return
+
+        kind, type_name = _kind_and_type(context)
+        attributes = {
+            "stage": stage,
+            "direction": direction,
+            "kind": kind,
+            "type": type_name,
+        }
+        self.bind(self.latency, attributes).record(timedelta(seconds=elapsed))
+        for payload in payloads:
+            encoding = payload.metadata.get("encoding", b"").decode()
+            self.bind(self.size, {**attributes, "encoding": encoding}).record(
+                payload.ByteSize()
+            )
+
+
+def _kind_and_type(context: Optional[SerializationContext]) -> tuple[str, str]:
+    if isinstance(context, ActivitySerializationContext):
+        return "activity", context.activity_type or ""
+    if isinstance(context, WorkflowSerializationContext):
+        # The context only has the workflow ID, but inside workflow code the type is available
+        if workflow.in_workflow():
+            return "workflow", workflow.info().workflow_type
+        return "workflow", ""
+    return "other", ""
+
+
+class MeteredPayloadConverter(PayloadConverter, WithSerializationContext):
+    """Payload converter that records sizes and conversion latency for `inner_class`.
+
+    Data converters instantiate their payload converter class without arguments, so use
+    `metered_payload_converter_class` to get a class to pass as `payload_converter_class`.
+    """
+
+    inner_class: Type[PayloadConverter]
+    instruments: PayloadInstruments
+
+    def __init__(
+        self,
+        inner: Optional[PayloadConverter] = None,
+        context: Optional[SerializationContext] = None,
+    ) -> None:
+        super().__init__()
+        self.inner = inner or self.inner_class()
+        self.context = context
+
+    def to_payloads(self, values: Sequence[Any]) -> list[Payload]:
+        start = time.perf_counter()
+        payloads = self.inner.to_payloads(values)
+        self.instruments.record(
+            "converter",
+            "outbound",
+            self.context,
+            payloads,
+            time.perf_counter() - start,
+        )
+        return payloads
+
+    def from_payloads(
+        self, payloads: Sequence[Payload], type_hints: Optional[list[Type]] = None
+    ) -> list[Any]:
+        start = time.perf_counter()
+        values = self.inner.from_payloads(payloads, type_hints)
+        self.instruments.record(
+            "converter", "inbound", self.context, payloads, time.perf_counter() - start
+        )
+        return values
+
+    def with_context(self, context: SerializationContext) -> MeteredPayloadConverter:
+        inner = self.inner
+        if isinstance(inner, WithSerializationContext):
+            inner = inner.with_context(context)
+        return type(self)(inner, context)
+
+
+def metered_payload_converter_class(
+    inner_class: Type[PayloadConverter], instruments: PayloadInstruments
+) -> Type[MeteredPayloadConverter]:
+    return type(
+        f"Metered{inner_class.__name__}",
+        (MeteredPayloadConverter,),
+        {"inner_class": inner_class, "instruments": instruments},
+    )
+
+
+class MeteredPayloadCodec(PayloadCodec, WithSerializationContext):
+    """Payload codec that records encoded sizes and encode/decode latency for `inner`, e.g. an `EncryptionCodec`."""
+
+    def __init__(
+        self,
+        inner: PayloadCodec,
+        instruments: PayloadInstruments,
+        context: Optional[SerializationContext] = None,
+    ) -> None:
+        super().__init__()
+        self.inner = inner
+        self.instruments = instruments
+        self.context = context
+
+    async def encode(self, payloads: Sequence[Payload]) -> list[Payload]:
+        start = time.perf_counter()
+        encoded = await self.inner.encode(payloads)
+        self.instruments.record(
+            "codec", "outbound", self.context, encoded, time.perf_counter() - start
+        )
+        return encoded
+
+    async def decode(self, payloads: Sequence[Payload]) -> list[Payload]:
+        start = time.perf_counter()
+        decoded = await self.inner.decode(payloads)
+        self.instruments.record(
+            "codec", "inbound", self.context, payloads, time.perf_counter() - start
+        )
+        return decoded
+
+    def with_context(self, context: SerializationContext) -> MeteredPayloadCodec:
+        inner = self.inner
+        if isinstance(inner, WithSerializationContext):
+            inner = inner.with_context(context)
+        return MeteredPayloadCodec(inner, self.instruments, context)
+
+
+def metered_data_converter(
+    data_converter: DataConverter = temporalio.converter.default(),
+    meter: Optional[MetricMeter] = None,
+    max_label_values: int = 100,
+) -> DataConverter:
+    """`data_converter` with its payload converter and codec (if any) metered to `meter`.
+
+    Use the same meter as the runtime whose Prometheus endpoint should serve the metrics, e.g. `runtime.metric_meter`.
+    Defaults to the default runtime's meter.
+    """
+    instruments = PayloadInstruments(
+        meter or temporalio.runtime.Runtime.default().metric_meter, max_label_values
+    )
+    return dataclasses.replace(
+        data_converter,
+        payload_converter_class=metered_payload_converter_class(
+            data_converter.payload_converter_class, instruments
+        ),
+        payload_codec=MeteredPayloadCodec(data_converter.payload_codec, instruments)
+        if data_converter.payload_codec
+        else None,
+    )
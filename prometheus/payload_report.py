@@ -0,0 +1,99 @@
+"""Print the largest payload producers from a worker's Prometheus endpoint.
+
+    uv run prometheus/payload_report.py --url http://127.0.0.1:9000/metrics --top 10
+
+Reads the `payload_size` histograms recorded by `payload_metrics.metered_data_converter` and ranks activity and
+workflow types by the total bytes of payloads they produced.
+"""
+
+import argparse
+import re
+import urllib.request
+from dataclasses import dataclass
+from typing import Iterable
+
+# The exporter may append the unit to the metric name
+_SAMPLE = re.compile(r"^payload_size(?:_bytes)?_(sum|count)\{(.*)\} (\S+)$")
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+@dataclass
+class PayloadProducer:
+    kind: str
+    type: str
+    total_bytes: float = 0.0
+    payloads: float = 0.0
+
+    @property
+    def average_bytes(self) -> float:
+        return self.total_bytes / self.payloads if self.payloads else 0.0
+
+
+def top_payload_producers(
+    metrics_text: str, top: int, stage: str = "converter", direction: str = "outbound"
+) -> list[PayloadProducer]:
+    producers: dict[tuple[str, str], PayloadProducer] = {}
+    for line in metrics_text.splitlines():
+        match = _SAMPLE.match(line)
+        if not match:
+            continue
+        field, labels_text, value = match.groups()
+        labels = dict(_LABEL.findall(labels_text))
+        if labels.get("stage") != stage or labels.get("direction") != direction:
+            continue
+
+        key = (labels.get("kind", ""), labels.get("type", ""))
+        producer = producers.setdefault(key, PayloadProducer(*key))
+        if field == "sum":
+            producer.total_bytes += float(value)
+        else:
+            producer.payloads += float(value)
+    return sorted(producers.values(), key=lambda p: p.total_bytes, reverse=True)[:top]
+
+
+def format_report(producers: Iterable[PayloadProducer]) -> str:
+    lines = [
+        f"{'kind':<10} {'type':<40} {'total bytes':>14} {'payloads':>10} {'avg bytes':>12}"
+    ]
+    for p in producers:
+        lines.append(
+            f"{p.kind:<10} {p.type or '-':<40} {p.total_bytes:>14.0f} {p.payloads:>10.0f} {p.average_bytes:>12.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show the largest payload producers")
+    parser.add_argument(
+        "--url",
+        default="http://127.0.0.1:9000/metrics",
+        help="Prometheus endpoint of the worker",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="number of producers to show"
+    )
+    parser.add_argument(
+        "--stage",
+        choices=["converter", "codec"],
+        default="converter",
+        help="measure payloads before (converter) or after (codec) encoding",
+    )
+    parser.add_argument(
+        "--direction",
+        choices=["outbound", "inbound"],
+        default="outbound",
+        help="payloads produced (outbound) or received (inbound) by the worker",
+    )
+    args = parser.parse_args()
+
+    with urllib.request.urlopen(args.url) as response:
+        metrics_text = response.read().decode()
+    print(
+        format_report(
+            top_payload_producers(metrics_text, args.top, args.stage, args.direction)
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
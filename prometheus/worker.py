@@ -7,6 +7,8 @@ from temporalio.envconfig import ClientConfig
 from temporalio.runtime import PrometheusConfig, Runtime, TelemetryConfig
 from temporalio.worker import Worker
 
+from prometheus.payload_metrics import metered_data_converter
+
 
 @workflow.defn
 class GreetingWorkflow:
@@ -46,6 +48,8 @@ async def main():
     client = await Client.connect(
         **config,
         runtime=runtime,
+        # Record payload sizes and conversion latency to the same Prometheus endpoint
+        data_converter=metered_data_converter(meter=runtime.metric_meter),
     )
 
     # Run a worker for the workflow
@@ -1,2 +1,4 @@
 from .resource_pool_client import ResourcePoolClient
 from .resource_pool_workflow import ResourcePoolWorkflow
+from .sharded_resource_pool_client import ShardedResourcePoolClient
+from .sharded_resource_pool_workflow import ShardedResourcePoolWorkflow
@@ -0,0 +1,41 @@
+import bisect
+import hashlib
+from typing import Sequence
+
+
+def _hash(key: str) -> int:
+    # Python's built-in hash() is salted per process, so it can't be used to route deterministically in workflows
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+# Maps keys to nodes such that adding or removing a node only remaps the keys that were on (or move to) that node.
+class ConsistentHashRing:
+    def __init__(self, nodes: Sequence[str], virtual_nodes_per_node: int = 64) -> None:
+        if len(nodes) == 0:
+            raise ValueError("ConsistentHashRing needs at least one node")
+
+        self.nodes = list(nodes)
+        points = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in self.nodes
+            for i in range(virtual_nodes_per_node)
+        )
+        self._point_hashes = [point_hash for point_hash, _ in points]
+        self._point_nodes = [node for _, node in points]
+
+    def node_for(self, key: str) -> str:
+        return self.nodes_for(key)[0]
+
+    # All nodes, ordered by their distance clockwise around the ring from key. The first node is the key's home node.
+    def nodes_for(self, key: str) -> list[str]:
+        start = bisect.bisect(self._point_hashes, _hash(key))
+        ordered: list[str] = []
+        seen: set[str] = set()
+        for i in range(len(self._point_nodes)):
+            node = self._point_nodes[(start + i) % len(self._point_nodes)]
+            if node not in seen:
+                seen.add(node)
+                ordered.append(node)
+                if len(ordered) == len(self.nodes):
+                    break
+        return ordered
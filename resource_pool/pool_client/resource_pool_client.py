@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from datetime import timedelta
 from typing import AsyncGenerator, Optional
@@ -10,6 +11,7 @@ from resource_pool.shared import (
     AcquireRequest,
     AcquireResponse,
     DetachedResource,
+    RenewLeaseRequest,
 )
 
 
@@ -18,27 +20,81 @@ class ResourcePoolClient:
     def __init__(self, pool_workflow_id: str) -> None:
         self.pool_workflow_id = pool_workflow_id
         self.acquired_resources: list[AcquiredResource] = []
+        self.unavailable_responses = 0
+        # Requests we stopped waiting for. Their responses may still arrive, and must not be taken as responses to later
+        # requests.
+        self.abandoned_requests = 0
+        # Resources held in hold_resource, by release key
+        self.held_resources: dict[str, AcquiredResource] = {}
 
         signal_name = f"assign_resource_{self.pool_workflow_id}"
         if workflow.get_signal_handler(signal_name) is None:
             workflow.set_signal_handler(signal_name, self._handle_acquire_response)
+            workflow.set_signal_handler(
+                f"resource_unavailable_{self.pool_workflow_id}",
+                self._handle_unavailable_response,
+            )
+            workflow.set_signal_handler(
+                f"lease_expired_{self.pool_workflow_id}",
+                self._handle_lease_expired,
+            )
         else:
             raise RuntimeError(
                 f"{signal_name} already registered - if you use multiple ResourcePoolClients within the "
                 f"same workflow, they must use different pool_workflow_ids"
             )
 
-    def _handle_acquire_response(self, response: AcquireResponse) -> None:
+    async def _handle_acquire_response(self, response: AcquireResponse) -> None:
+        if self.abandoned_requests > 0:
+            # Granted after we gave up on it, so give it back
+            self.abandoned_requests -= 1
+            await self._send_release_signal(
+                AcquiredResource(
+                    resource=response.resource, release_key=response.release_key
+                )
+            )
+            return
         self.acquired_resources.append(
             AcquiredResource(
-                resource=response.resource, release_key=response.release_key
+                resource=response.resource,
+                release_key=response.release_key,
+                lease_duration_seconds=response.lease_duration_seconds,
             )
         )
 
-    async def _send_acquire_signal(self) -> None:
+    def _handle_unavailable_response(self) -> None:
+        if self.abandoned_requests > 0:
+            self.abandoned_requests -= 1
+            return
+        self.unavailable_responses += 1
+
+    def _handle_lease_expired(self, response: AcquireResponse) -> None:
+        resource = self.held_resources.get(response.release_key)
+        if resource is not None:
+            workflow.logger.warning(
+                f"Lease on resource {resource.resource} expired and the pool reclaimed it"
+            )
+            resource.lease_expired = True
+
+    async def _send_acquire_signal(
+        self,
+        lease_duration_seconds: Optional[float],
+        wait_if_unavailable: bool,
+        priority: int,
+        tenant: Optional[str],
+    ) -> None:
         await workflow.get_external_workflow_handle_for(
             ResourcePoolWorkflow.run, self.pool_workflow_id
-        ).signal("acquire_resource", AcquireRequest(workflow.info().workflow_id))
+        ).signal(
+            "acquire_resource",
+            AcquireRequest(
+                workflow.info().workflow_id,
+                lease_duration_seconds=lease_duration_seconds,
+                wait_if_unavailable=wait_if_unavailable,
+                priority=priority,
+                tenant=tenant,
+            ),
+        )
 
     async def _send_release_signal(self, acquired_resource: AcquiredResource) -> None:
         await workflow.get_external_workflow_handle_for(
@@ -51,38 +107,140 @@ class ResourcePoolClient:
             ),
         )
 
+    async def _renew_lease_until_cancelled(
+        self, acquired_resource: AcquiredResource, lease_duration_seconds: float
+    ) -> None:
+        # Renew well before expiry so that a single delayed workflow task doesn't cost us the lease
+        renew_interval = timedelta(seconds=lease_duration_seconds / 3)
+        while not acquired_resource.lease_expired:
+            await workflow.sleep(renew_interval)
+            await workflow.get_external_workflow_handle_for(
+                ResourcePoolWorkflow.run, self.pool_workflow_id
+            ).signal(
+                "renew_lease",
+                RenewLeaseRequest(release_key=acquired_resource.release_key),
+            )
+
+    async def wait_for_resource(
+        self,
+        *,
+        max_wait_time: timedelta,
+        lease_duration_seconds: Optional[float],
+        priority: int = 0,
+        tenant: Optional[str] = None,
+    ) -> AcquiredResource:
+        await self._send_acquire_signal(
+            lease_duration_seconds,
+            wait_if_unavailable=True,
+            priority=priority,
+            tenant=tenant,
+        )
+        try:
+            await workflow.wait_condition(
+                lambda: len(self.acquired_resources) > 0, timeout=max_wait_time
+            )
+        except asyncio.TimeoutError:
+            self.abandoned_requests += 1
+            raise
+        return self.acquired_resources.pop(0)
+
+    # Like wait_for_resource, but returns None rather than queueing if the pool has no free resource right now, or if it
+    # doesn't answer within max_wait_time.
+    async def try_acquire_resource(
+        self,
+        *,
+        max_wait_time: timedelta,
+        lease_duration_seconds: Optional[float],
+        priority: int = 0,
+        tenant: Optional[str] = None,
+    ) -> Optional[AcquiredResource]:
+        await self._send_acquire_signal(
+            lease_duration_seconds,
+            wait_if_unavailable=False,
+            priority=priority,
+            tenant=tenant,
+        )
+        try:
+            await workflow.wait_condition(
+                lambda: len(self.acquired_resources) > 0
+                or self.unavailable_responses > 0,
+                timeout=max_wait_time,
+            )
+        except asyncio.TimeoutError:
+            self.abandoned_requests += 1
+            return None
+        if len(self.acquired_resources) > 0:
+            return self.acquired_resources.pop(0)
+        self.unavailable_responses -= 1
+        return None
+
+    @asynccontextmanager
+    async def hold_resource(
+        self, resource: AcquiredResource
+    ) -> AsyncGenerator[AcquiredResource, None]:
+        renew_task: Optional[asyncio.Task[None]] = None
+        if resource.lease_duration_seconds is not None:
+            renew_task = asyncio.create_task(
+                self._renew_lease_until_cancelled(
+                    resource, resource.lease_duration_seconds
+                )
+            )
+
+        # During the yield, the calling workflow owns the resource. Without a lease this is a lock: our finally block
+        # will release the resource if an activity fails. This is why callers assert the lack of workflow-level timeouts
+        # - the finally block wouldn't run if there was a timeout. With a lease, the pool may reclaim the resource if a
+        # renewal is late, in which case it sets resource.lease_expired and callers must stop using the resource.
+        self.held_resources[resource.release_key] = resource
+        try:
+            yield resource
+        finally:
+            del self.held_resources[resource.release_key]
+            if renew_task is not None:
+                renew_task.cancel()
+            if not resource.detached and not resource.lease_expired:
+                await self._send_release_signal(resource)
+
     @asynccontextmanager
     async def acquire_resource(
         self,
         *,
         reattach: Optional[DetachedResource] = None,
         max_wait_time: timedelta = timedelta(minutes=5),
+        lease_duration: Optional[timedelta] = None,
+        priority: int = 0,
+        tenant: Optional[str] = None,
     ) -> AsyncGenerator[AcquiredResource, None]:
-        _warn_when_workflow_has_timeouts()
+        # If lease_duration is set, the pool reclaims the resource unless we renew the lease in time. We renew it in the
+        # background for as long as we hold the resource, so a holder that times out or is terminated only keeps the
+        # resource until its lease runs out.
+        lease_duration_seconds = (
+            lease_duration.total_seconds() if lease_duration is not None else None
+        )
+        if reattach is not None:
+            lease_duration_seconds = reattach.lease_duration_seconds
+        if lease_duration_seconds is None:
+            _warn_when_workflow_has_timeouts()
 
         if reattach is None:
-            await self._send_acquire_signal()
-            await workflow.wait_condition(
-                lambda: len(self.acquired_resources) > 0, timeout=max_wait_time
+            resource = await self.wait_for_resource(
+                max_wait_time=max_wait_time,
+                lease_duration_seconds=lease_duration_seconds,
+                priority=priority,
+                tenant=tenant,
             )
-            resource = self.acquired_resources.pop(0)
         else:
             resource = AcquiredResource(
-                resource=reattach.resource, release_key=reattach.release_key
+                resource=reattach.resource,
+                release_key=reattach.release_key,
+                lease_duration_seconds=reattach.lease_duration_seconds,
             )
 
         # Can't happen, but the typechecker doesn't know about workflow.wait_condition
         if resource is None:
             raise RuntimeError("resource was None when it can't be")
 
-        # During the yield, the calling workflow owns the resource. Note that this is a lock, not a lease! Our
-        # finally block will release the resource if an activity fails. This is why we asserted the lack of
-        # workflow-level timeouts above - the finally block wouldn't run if there was a timeout.
-        try:
+        async with self.hold_resource(resource):
             yield resource
-        finally:
-            if not resource.detached:
-                await self._send_release_signal(resource)
 
 
 def _warn_when_workflow_has_timeouts() -> None:
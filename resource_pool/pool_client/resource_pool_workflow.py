@@ -1,16 +1,22 @@
-from dataclasses import dataclass
+import asyncio
+import heapq
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from typing import Optional
 
 from temporalio import workflow
 from temporalio.exceptions import ApplicationError
 
-from resource_pool.shared import AcquireRequest, AcquireResponse
+from resource_pool.pool_client.waiter_queue import PriorityClassStats, WaiterQueue
+from resource_pool.shared import AcquireRequest, AcquireResponse, RenewLeaseRequest
 
 
 # Internal to this workflow, we'll associate randomly generated release signal names with each acquire request.
 @dataclass
 class InternalAcquireRequest(AcquireRequest):
-    release_signal: Optional[str]
+    release_signal: Optional[str] = field(default=None)
+    # Only set for leased resources. The resource is reclaimed if the holder doesn't renew before this time.
+    lease_expires_at: Optional[datetime] = field(default=None)
 
 
 @dataclass
@@ -18,6 +24,9 @@ class ResourcePoolWorkflowInput:
     # Key is resource, value is current holder of the resource (None if not held)
     resources: dict[str, Optional[InternalAcquireRequest]]
     waiters: list[InternalAcquireRequest]
+    # Key is tenant, value is its share of the pool relative to other tenants in the same priority class. Tenants not
+    # listed here have a weight of 1.
+    tenant_weights: dict[str, float] = field(default_factory=dict)
 
 
 @workflow.defn
@@ -25,12 +34,23 @@ class ResourcePoolWorkflow:
     @workflow.init
     def __init__(self, input: ResourcePoolWorkflowInput) -> None:
         self.resources = input.resources
-        self.waiters = input.waiters
+        self.tenant_weights = input.tenant_weights
+        self.waiters = WaiterQueue(input.waiters, input.tenant_weights)
         self.release_key_to_resource: dict[str, str] = {}
 
+        # Min-heap of (expiry, release_key) for every outstanding lease. Renewing a lease pushes a new entry rather than
+        # updating the old one in place; stale entries are discarded when they reach the top of the heap. This lets a
+        # single timer (for the earliest expiry) cover any number of outstanding leases.
+        self.lease_expirations: list[tuple[datetime, str]] = []
+
         for resource, holder in self.resources.items():
             if holder is not None and holder.release_signal is not None:
                 self.release_key_to_resource[holder.release_signal] = resource
+                if holder.lease_expires_at is not None:
+                    heapq.heappush(
+                        self.lease_expirations,
+                        (holder.lease_expires_at, holder.release_signal),
+                    )
 
     @workflow.signal
     async def add_resources(self, resources: list[str]) -> None:
@@ -44,8 +64,28 @@ class ResourcePoolWorkflow:
 
     @workflow.signal
     async def acquire_resource(self, request: AcquireRequest) -> None:
-        self.waiters.append(
-            InternalAcquireRequest(workflow_id=request.workflow_id, release_signal=None)
+        # Resources that are free right now may already be promised to earlier waiters
+        if not request.wait_if_unavailable and self.count_free_resources() <= len(
+            self.waiters
+        ):
+            requester = workflow.get_external_workflow_handle(request.workflow_id)
+            try:
+                await requester.signal(
+                    f"resource_unavailable_{workflow.info().workflow_id}"
+                )
+            except ApplicationError as e:
+                if e.type != "ExternalWorkflowExecutionNotFound":
+                    raise e
+            return
+
+        self.waiters.push(
+            InternalAcquireRequest(
+                workflow_id=request.workflow_id,
+                lease_duration_seconds=request.lease_duration_seconds,
+                priority=request.priority,
+                tenant=request.tenant,
+                release_signal=None,
+            )
         )
         workflow.logger.info(
             f"workflow_id={request.workflow_id} is waiting for a resource"
@@ -73,10 +113,30 @@ class ResourcePoolWorkflow:
         self.resources[resource] = None
         del self.release_key_to_resource[release_key]
 
+    @workflow.signal
+    def renew_lease(self, request: RenewLeaseRequest) -> None:
+        resource = self.release_key_to_resource.get(request.release_key)
+        if resource is None:
+            # Most likely the lease already expired and the resource was reclaimed
+            workflow.logger.warning(
+                f"Ignoring renewal of unknown release_key: {request.release_key}"
+            )
+            return
+
+        holder = self.resources[resource]
+        if holder is None or holder.lease_duration_seconds is None:
+            return
+
+        self.set_lease_expiry(holder)
+
     @workflow.query
     def get_current_holders(self) -> dict[str, Optional[InternalAcquireRequest]]:
         return self.resources
 
+    @workflow.query
+    def get_queue_stats(self) -> list[PriorityClassStats]:
+        return self.waiters.stats()
+
     async def assign_resource(
         self, resource: str, internal_request: InternalAcquireRequest
     ) -> None:
@@ -89,12 +149,18 @@ class ResourcePoolWorkflow:
             release_signal = str(workflow.uuid4())
             await requester.signal(
                 f"assign_resource_{workflow.info().workflow_id}",
-                AcquireResponse(release_key=release_signal, resource=resource),
+                AcquireResponse(
+                    release_key=release_signal,
+                    resource=resource,
+                    lease_duration_seconds=internal_request.lease_duration_seconds,
+                ),
             )
 
             internal_request.release_signal = release_signal
             self.resources[resource] = internal_request
             self.release_key_to_resource[release_signal] = resource
+            if internal_request.lease_duration_seconds is not None:
+                self.set_lease_expiry(internal_request)
         except ApplicationError as e:
             if e.type == "ExternalWorkflowExecutionNotFound":
                 workflow.logger.info(
@@ -111,7 +177,7 @@ class ResourcePoolWorkflow:
         if next_free_resource is None:
             return False
 
-        next_waiter = self.waiters.pop(0)
+        next_waiter = self.waiters.pop()
         await self.assign_resource(next_free_resource, next_waiter)
         return True
 
@@ -121,9 +187,58 @@ class ResourcePoolWorkflow:
             None,
         )
 
+    def count_free_resources(self) -> int:
+        return sum(1 for holder in self.resources.values() if holder is None)
+
     def can_assign_resource(self) -> bool:
         return len(self.waiters) > 0 and self.get_free_resource() is not None
 
+    def set_lease_expiry(self, holder: InternalAcquireRequest) -> None:
+        assert holder.release_signal is not None
+        assert holder.lease_duration_seconds is not None
+        holder.lease_expires_at = workflow.now() + timedelta(
+            seconds=holder.lease_duration_seconds
+        )
+        heapq.heappush(
+            self.lease_expirations, (holder.lease_expires_at, holder.release_signal)
+        )
+
+    async def reclaim_expired_leases(self) -> None:
+        now = workflow.now()
+        while self.lease_expirations and self.lease_expirations[0][0] <= now:
+            expires_at, release_key = heapq.heappop(self.lease_expirations)
+            resource = self.release_key_to_resource.get(release_key)
+            if resource is None:
+                # Released before it expired
+                continue
+
+            holder = self.resources[resource]
+            if holder is None or holder.lease_expires_at != expires_at:
+                # Renewed since this entry was pushed
+                continue
+
+            workflow.logger.warning(
+                f"Lease on resource {resource} held by workflow_id={holder.workflow_id} expired, reclaiming it"
+            )
+            self.resources[resource] = None
+            del self.release_key_to_resource[release_key]
+
+            # Tell the holder, in case it is still running and doesn't know it has stopped renewing
+            requester = workflow.get_external_workflow_handle(holder.workflow_id)
+            try:
+                await requester.signal(
+                    f"lease_expired_{workflow.info().workflow_id}",
+                    AcquireResponse(release_key=release_key, resource=resource),
+                )
+            except ApplicationError as e:
+                if e.type != "ExternalWorkflowExecutionNotFound":
+                    raise e
+
+    def time_until_next_lease_expiry(self) -> Optional[timedelta]:
+        if not self.lease_expirations:
+            return None
+        return max(self.lease_expirations[0][0] - workflow.now(), timedelta(0))
+
     def should_continue_as_new(self) -> bool:
         return (
             workflow.info().is_continue_as_new_suggested()
@@ -133,9 +248,16 @@ class ResourcePoolWorkflow:
     @workflow.run
     async def run(self, _: ResourcePoolWorkflowInput) -> None:
         while True:
-            await workflow.wait_condition(
-                lambda: self.can_assign_resource() or self.should_continue_as_new()
-            )
+            await self.reclaim_expired_leases()
+
+            try:
+                await workflow.wait_condition(
+                    lambda: self.can_assign_resource() or self.should_continue_as_new(),
+                    timeout=self.time_until_next_lease_expiry(),
+                )
+            except asyncio.TimeoutError:
+                # The earliest lease is due, loop around to reclaim it
+                continue
 
             if await self.assign_next_resource():
                 continue
@@ -144,6 +266,7 @@ class ResourcePoolWorkflow:
                 workflow.continue_as_new(
                     ResourcePoolWorkflowInput(
                         resources=self.resources,
-                        waiters=self.waiters,
+                        waiters=self.waiters.to_list(),
+                        tenant_weights=self.tenant_weights,
                     )
                 )
@@ -0,0 +1,91 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import AsyncGenerator, Optional
+
+from temporalio import workflow
+
+from resource_pool.pool_client.consistent_hash_ring import ConsistentHashRing
+from resource_pool.pool_client.resource_pool_client import (
+    ResourcePoolClient,
+    _warn_when_workflow_has_timeouts,
+)
+from resource_pool.pool_client.sharded_resource_pool_workflow import (
+    shard_workflow_id,
+)
+from resource_pool.shared import AcquiredResource
+
+
+# Use this class in workflow code that needs to run on resources from a ShardedResourcePoolWorkflow.
+class ShardedResourcePoolClient:
+    def __init__(
+        self,
+        pool_workflow_id: str,
+        num_shards: int,
+        max_probes: int = 3,
+        probe_timeout: timedelta = timedelta(seconds=5),
+    ) -> None:
+        self.pool_workflow_id = pool_workflow_id
+        # How many shards to try, starting with the home shard, before queueing on the home shard
+        self.max_probes = max_probes
+        # How long to wait for a shard to answer a probe before treating it as having nothing free
+        self.probe_timeout = probe_timeout
+
+        shard_ids = [
+            shard_workflow_id(pool_workflow_id, shard) for shard in range(num_shards)
+        ]
+        self.ring = ConsistentHashRing(shard_ids)
+        self.shard_clients = {
+            shard_id: ResourcePoolClient(shard_id) for shard_id in shard_ids
+        }
+
+    @asynccontextmanager
+    async def acquire_resource(
+        self,
+        *,
+        max_wait_time: timedelta = timedelta(minutes=5),
+        lease_duration: Optional[timedelta] = None,
+        priority: int = 0,
+        tenant: Optional[str] = None,
+    ) -> AsyncGenerator[AcquiredResource, None]:
+        lease_duration_seconds = (
+            lease_duration.total_seconds() if lease_duration is not None else None
+        )
+        if lease_duration_seconds is None:
+            _warn_when_workflow_has_timeouts()
+
+        # Each workflow has a home shard, so acquirers are spread across shards. If the home shard has nothing free,
+        # probe the next shards around the ring before falling back to waiting in line on the home shard, all within
+        # max_wait_time.
+        deadline = workflow.now() + max_wait_time
+        shard_ids = self.ring.nodes_for(workflow.info().workflow_id)
+        resource: Optional[AcquiredResource] = None
+        for shard_id in shard_ids[: self.max_probes]:
+            remaining = deadline - workflow.now()
+            if remaining <= timedelta(0):
+                break
+            shard_client = self.shard_clients[shard_id]
+            resource = await shard_client.try_acquire_resource(
+                max_wait_time=min(self.probe_timeout, remaining),
+                lease_duration_seconds=lease_duration_seconds,
+                priority=priority,
+                tenant=tenant,
+            )
+            if resource is not None:
+                break
+
+        if resource is None:
+            remaining = deadline - workflow.now()
+            if remaining <= timedelta(0):
+                # As wait_for_resource raises when max_wait_time runs out
+                raise asyncio.TimeoutError()
+            shard_client = self.shard_clients[shard_ids[0]]
+            resource = await shard_client.wait_for_resource(
+                max_wait_time=remaining,
+                lease_duration_seconds=lease_duration_seconds,
+                priority=priority,
+                tenant=tenant,
+            )
+
+        async with shard_client.hold_resource(resource):
+            yield resource
@@ -0,0 +1,119 @@
+from dataclasses import dataclass, field
+
+from temporalio import workflow
+from temporalio.exceptions import ApplicationError
+
+from resource_pool.pool_client.resource_pool_workflow import (
+    ResourcePoolWorkflow,
+    ResourcePoolWorkflowInput,
+)
+
+
+def shard_workflow_id(pool_workflow_id: str, shard: int) -> str:
+    return f"{pool_workflow_id}-shard-{shard}"
+
+
+@dataclass
+class ShardedResourcePoolWorkflowInput:
+    num_shards: int
+    # Resources that haven't been placed on a shard yet
+    resources: list[str]
+    # Key is resource, value is the shard it was placed on. Empty until the shards have been started.
+    resource_shards: dict[str, int] = field(default_factory=dict)
+    shards_started: bool = field(default=False)
+
+
+# Coordinates a pool whose resources are spread across num_shards ResourcePoolWorkflows, so that acquire and release
+# traffic is spread across several workflows instead of all going through one. Acquirers talk to the shards directly
+# (see ShardedResourcePoolClient); this workflow only starts the shards and decides where new resources go.
+@workflow.defn
+class ShardedResourcePoolWorkflow:
+    @workflow.init
+    def __init__(self, input: ShardedResourcePoolWorkflowInput) -> None:
+        if input.num_shards < 1:
+            raise ApplicationError("num_shards must be at least 1", non_retryable=True)
+
+        self.num_shards = input.num_shards
+        self.pending_resources = list(input.resources)
+        self.resource_shards = input.resource_shards
+        self.shards_started = input.shards_started
+
+    @workflow.signal
+    def add_resources(self, resources: list[str]) -> None:
+        self.pending_resources.extend(resources)
+
+    @workflow.query
+    def get_resource_shards(self) -> dict[str, int]:
+        return self.resource_shards
+
+    def shard_resource_counts(self) -> list[int]:
+        counts = [0] * self.num_shards
+        for shard in self.resource_shards.values():
+            counts[shard] += 1
+        return counts
+
+    async def start_shards(self) -> None:
+        for shard in range(self.num_shards):
+            # Abandon the shards so that they keep running when this workflow continues as new
+            await workflow.start_child_workflow(
+                ResourcePoolWorkflow.run,
+                ResourcePoolWorkflowInput(resources={}, waiters=[]),
+                id=shard_workflow_id(workflow.info().workflow_id, shard),
+                parent_close_policy=workflow.ParentClosePolicy.ABANDON,
+            )
+        self.shards_started = True
+
+    # Place each new resource on the shard that currently has the fewest resources, so the shards stay balanced as the
+    # pool grows. Consistent hashing decides which shard each acquirer tries first, so balanced shards mean balanced
+    # load.
+    async def place_pending_resources(self) -> None:
+        counts = self.shard_resource_counts()
+        shard_to_new_resources: dict[int, list[str]] = {}
+        for resource in self.pending_resources:
+            if resource in self.resource_shards:
+                workflow.logger.warning(
+                    f"Ignoring attempt to add already-existing resource: {resource}"
+                )
+                continue
+
+            shard = min(range(self.num_shards), key=lambda s: counts[s])
+            counts[shard] += 1
+            self.resource_shards[resource] = shard
+            shard_to_new_resources.setdefault(shard, []).append(resource)
+        self.pending_resources = []
+
+        for shard, resources in shard_to_new_resources.items():
+            await workflow.get_external_workflow_handle_for(
+                ResourcePoolWorkflow.run,
+                shard_workflow_id(workflow.info().workflow_id, shard),
+            ).signal(ResourcePoolWorkflow.add_resources, resources)
+
+    def should_continue_as_new(self) -> bool:
+        return (
+            workflow.info().is_continue_as_new_suggested()
+            and workflow.all_handlers_finished()
+        )
+
+    @workflow.run
+    async def run(self, _: ShardedResourcePoolWorkflowInput) -> None:
+        if not self.shards_started:
+            await self.start_shards()
+
+        while True:
+            await workflow.wait_condition(
+                lambda: len(self.pending_resources) > 0 or self.should_continue_as_new()
+            )
+
+            if len(self.pending_resources) > 0:
+                await self.place_pending_resources()
+                continue
+
+            if self.should_continue_as_new():
+                workflow.continue_as_new(
+                    ShardedResourcePoolWorkflowInput(
+                        num_shards=self.num_shards,
+                        resources=self.pending_resources,
+                        resource_shards=self.resource_shards,
+                        shards_started=self.shards_started,
+                    )
+                )
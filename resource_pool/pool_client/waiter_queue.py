@@ -0,0 +1,104 @@
+import heapq
+from dataclasses import dataclass, field
+from typing import Generic, Optional, TypeVar
+
+from resource_pool.shared import AcquireRequest
+
+RequestT = TypeVar("RequestT", bound=AcquireRequest)
+
+
+@dataclass
+class PriorityClassStats:
+    priority: int
+    waiting: int
+    # Key is tenant ("" for requests without one), value is the number of its requests waiting in this class
+    waiting_by_tenant: dict[str, int]
+
+
+@dataclass
+class _PriorityClass(Generic[RequestT]):
+    # Min-heap of (virtual finish time, arrival sequence, request)
+    heap: list[tuple[float, int, RequestT]] = field(default_factory=list)
+    # Finish time of the last request served from this class
+    virtual_time: float = 0.0
+    # Key is tenant, value is the finish time of its most recently queued request. Only tenants with queued requests
+    # have an entry.
+    tenant_finish_times: dict[str, float] = field(default_factory=dict)
+    tenant_waiting: dict[str, int] = field(default_factory=dict)
+
+
+# Orders waiters for a resource pool. Requests with a lower priority value are always served first. Within a priority
+# class, tenants share grants in proportion to their weights using weighted fair queuing: each request is stamped with a
+# virtual finish time of max(class virtual time, tenant's previous finish time) + 1 / tenant weight, and requests are
+# served in finish-time order. A tenant that floods the queue therefore only pushes back its own requests.
+class WaiterQueue(Generic[RequestT]):
+    def __init__(
+        self,
+        requests: list[RequestT],
+        tenant_weights: Optional[dict[str, float]] = None,
+    ) -> None:
+        self.tenant_weights = tenant_weights or {}
+        self._classes: dict[int, _PriorityClass[RequestT]] = {}
+        self._next_sequence = 0
+        self._length = 0
+        for request in requests:
+            self.push(request)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def push(self, request: RequestT) -> None:
+        priority_class = self._classes.setdefault(request.priority, _PriorityClass())
+        tenant = request.tenant or ""
+        weight = self.tenant_weights.get(tenant, 1.0)
+        start = max(
+            priority_class.virtual_time,
+            priority_class.tenant_finish_times.get(tenant, 0.0),
+        )
+        finish = start + 1.0 / weight
+        priority_class.tenant_finish_times[tenant] = finish
+        priority_class.tenant_waiting[tenant] = (
+            priority_class.tenant_waiting.get(tenant, 0) + 1
+        )
+        heapq.heappush(priority_class.heap, (finish, self._next_sequence, request))
+        self._next_sequence += 1
+        self._length += 1
+
+    def pop(self) -> RequestT:
+        priority = min(
+            (priority for priority, c in self._classes.items() if c.heap),
+            default=None,
+        )
+        if priority is None:
+            raise IndexError("pop from empty WaiterQueue")
+
+        priority_class = self._classes[priority]
+        finish, _, request = heapq.heappop(priority_class.heap)
+        priority_class.virtual_time = finish
+        tenant = request.tenant or ""
+        priority_class.tenant_waiting[tenant] -= 1
+        if priority_class.tenant_waiting[tenant] == 0:
+            del priority_class.tenant_waiting[tenant]
+            del priority_class.tenant_finish_times[tenant]
+        if not priority_class.heap:
+            del self._classes[priority]
+        self._length -= 1
+        return request
+
+    # The queued requests in the order they would be served
+    def to_list(self) -> list[RequestT]:
+        return [
+            request
+            for priority in sorted(self._classes)
+            for _, _, request in sorted(self._classes[priority].heap)
+        ]
+
+    def stats(self) -> list[PriorityClassStats]:
+        return [
+            PriorityClassStats(
+                priority=priority,
+                waiting=len(self._classes[priority].heap),
+                waiting_by_tenant=dict(self._classes[priority].tenant_waiting),
+            )
+            for priority in sorted(self._classes)
+        ]
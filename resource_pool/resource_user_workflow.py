@@ -4,6 +4,7 @@ from datetime import timedelta
 from typing import Optional
 
 from temporalio import activity, workflow
+from temporalio.exceptions import ApplicationError
 
 from resource_pool.pool_client import ResourcePoolClient
 from resource_pool.shared import DetachedResource
@@ -42,6 +43,9 @@ class ResourceUserWorkflowInput:
     # Used to transfer resource ownership between iterations during continue_as_new
     already_acquired_resource: Optional[DetachedResource] = field(default=None)
 
+    # If set, hold the resource as a lease of this many seconds instead of a lock
+    lease_duration_seconds: Optional[float] = field(default=None)
+
 
 class FailWorkflowException(Exception):
     pass
@@ -57,10 +61,20 @@ class ResourceUserWorkflow:
     async def run(self, input: ResourceUserWorkflowInput) -> None:
         pool_client = ResourcePoolClient(input.resource_pool_workflow_id)
 
+        lease_duration = (
+            timedelta(seconds=input.lease_duration_seconds)
+            if input.lease_duration_seconds is not None
+            else None
+        )
         async with pool_client.acquire_resource(
-            reattach=input.already_acquired_resource
+            reattach=input.already_acquired_resource, lease_duration=lease_duration
         ) as acquired_resource:
             for iteration in ["first", "second"]:
+                if acquired_resource.lease_expired:
+                    # Another workflow may be using the resource by now
+                    raise ApplicationError(
+                        f"Lease on {acquired_resource.resource} expired before the {iteration} iteration"
+                    )
                 await workflow.execute_activity(
                     use_resource,
                     UseResourceActivityInput(acquired_resource.resource, iteration),
@@ -83,6 +97,7 @@ class ResourceUserWorkflow:
                     iteration_to_fail_after=input.iteration_to_fail_after,
                     should_continue_as_new=False,
                     already_acquired_resource=detached_resource,
+                    lease_duration_seconds=input.lease_duration_seconds,
                 )
 
                 workflow.continue_as_new(next_input)
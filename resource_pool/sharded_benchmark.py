@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+
+from temporalio import workflow
+from temporalio.client import Client
+from temporalio.envconfig import ClientConfig
+from temporalio.worker import Worker
+
+from resource_pool.pool_client import (
+    ResourcePoolWorkflow,
+    ShardedResourcePoolClient,
+    ShardedResourcePoolWorkflow,
+)
+from resource_pool.pool_client.sharded_resource_pool_workflow import (
+    ShardedResourcePoolWorkflowInput,
+    shard_workflow_id,
+)
+
+TASK_QUEUE = "resource_pool-benchmark-task-queue"
+
+
+@dataclass
+class AcquirerWorkflowInput:
+    pool_workflow_id: str
+    num_shards: int
+    acquisitions: int
+
+
+# Repeatedly acquires and immediately releases a resource, so the pool's throughput is the only thing being measured.
+@workflow.defn
+class AcquirerWorkflow:
+    @workflow.run
+    async def run(self, input: AcquirerWorkflowInput) -> None:
+        pool_client = ShardedResourcePoolClient(
+            input.pool_workflow_id, input.num_shards
+        )
+        for _ in range(input.acquisitions):
+            async with pool_client.acquire_resource():
+                pass
+
+
+class Args(argparse.Namespace):
+    shards: list[int]
+    resources: int
+    acquirers: int
+    acquisitions: int
+
+
+async def measure(client: Client, args: Args, num_shards: int) -> float:
+    pool_workflow_id = f"resource_pool-benchmark-{uuid.uuid4()}"
+    resources = [f"resource_{i}" for i in range(args.resources)]
+    pool_handle = await client.start_workflow(
+        ShardedResourcePoolWorkflow.run,
+        ShardedResourcePoolWorkflowInput(num_shards=num_shards, resources=resources),
+        id=pool_workflow_id,
+        task_queue=TASK_QUEUE,
+    )
+
+    # Wait until every resource has been placed on a shard
+    while len(
+        await pool_handle.query(ShardedResourcePoolWorkflow.get_resource_shards)
+    ) < len(resources):
+        await asyncio.sleep(0.1)
+
+    start = time.monotonic()
+    await asyncio.gather(
+        *(
+            client.execute_workflow(
+                AcquirerWorkflow.run,
+                AcquirerWorkflowInput(
+                    pool_workflow_id=pool_workflow_id,
+                    num_shards=num_shards,
+                    acquisitions=args.acquisitions,
+                ),
+                id=f"{pool_workflow_id}-acquirer-{i}",
+                task_queue=TASK_QUEUE,
+            )
+            for i in range(args.acquirers)
+        )
+    )
+    elapsed = time.monotonic() - start
+
+    await pool_handle.terminate()
+    for shard in range(num_shards):
+        await client.get_workflow_handle(
+            shard_workflow_id(pool_workflow_id, shard)
+        ).terminate()
+
+    return args.acquirers * args.acquisitions / elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure acquires/sec of a sharded resource pool"
+    )
+    parser.add_argument(
+        "--shards", type=int, nargs="+", default=[1, 4, 16], help="shard counts to try"
+    )
+    parser.add_argument(
+        "--resources", type=int, default=32, help="number of resources in the pool"
+    )
+    parser.add_argument(
+        "--acquirers",
+        type=int,
+        default=64,
+        help="number of concurrent acquiring workflows",
+    )
+    parser.add_argument(
+        "--acquisitions",
+        type=int,
+        default=5,
+        help="acquire/release cycles per acquiring workflow",
+    )
+    args = parser.parse_args(namespace=Args())
+
+    config = ClientConfig.load_client_connect_config()
+    config.setdefault("target_host", "localhost:7233")
+    client = await Client.connect(**config)
+
+    async with Worker(
+        client,
+        task_queue=TASK_QUEUE,
+        workflows=[ShardedResourcePoolWorkflow, ResourcePoolWorkflow, AcquirerWorkflow],
+    ):
+        for num_shards in args.shards:
+            acquires_per_second = await measure(client, args, num_shards)
+            print(f"{num_shards:>3} shard(s): {acquires_per_second:8.1f} acquires/sec")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
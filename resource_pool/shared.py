@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field
+from typing import Optional
 
 RESOURCE_POOL_WORKFLOW_ID = "resource_pool"
 
@@ -6,26 +7,51 @@ RESOURCE_POOL_WORKFLOW_ID = "resource_pool"
 @dataclass
 class AcquireRequest:
     workflow_id: str
+    # If set, the resource is granted as a lease that expires unless the holder renews it within this many seconds. If
+    # None, the resource is locked until it is explicitly released.
+    lease_duration_seconds: Optional[float] = field(default=None)
+    # If False and the pool has no free resource, the pool replies with a resource_unavailable signal instead of
+    # queueing the request. Sharded pools use this to probe other shards.
+    wait_if_unavailable: bool = field(default=True)
+    # Waiters with a lower priority value are always served first
+    priority: int = field(default=0)
+    # Within a priority class, tenants share resources in proportion to their weights in the pool
+    tenant: Optional[str] = field(default=None)
 
 
 @dataclass
 class AcquireResponse:
     release_key: str
     resource: str
+    lease_duration_seconds: Optional[float] = field(default=None)
+
+
+@dataclass
+class RenewLeaseRequest:
+    release_key: str
 
 
 @dataclass
 class DetachedResource:
     resource: str
     release_key: str
+    lease_duration_seconds: Optional[float] = field(default=None)
 
 
 @dataclass
 class AcquiredResource:
     resource: str
     release_key: str
+    lease_duration_seconds: Optional[float] = field(default=None)
     detached: bool = field(default=False)
+    # Set if the pool reclaimed the resource because the lease wasn't renewed in time. The resource may already be held
+    # by another workflow, so stop using it.
+    lease_expired: bool = field(default=False)
 
     def detach(self) -> DetachedResource:
         self.detached = True
-        return DetachedResource(resource=self.resource, release_key=self.release_key)
+        return DetachedResource(
+            resource=self.resource,
+            release_key=self.release_key,
+            lease_duration_seconds=self.lease_duration_seconds,
+        )
@@ -46,6 +46,8 @@ async def main() -> None:
             input.should_continue_as_new = True
         if i == 1:
             input.iteration_to_fail_after = "first"
+        if i == 2:
+            input.lease_duration_seconds = 30
 
         handle = await client.start_workflow(
             workflow=ResourceUserWorkflow.run,
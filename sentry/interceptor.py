@@ -1,6 +1,6 @@
 import logging
 from dataclasses import asdict, is_dataclass
-from typing import Any, Optional, Type
+from typing import Any, Callable, Optional, Type
 
 from temporalio import activity, workflow
 from temporalio.worker import (
@@ -13,13 +13,164 @@ from temporalio.worker import (
 )
 
 with workflow.unsafe.imports_passed_through():
+    import copy
+    import queue
+    import threading
+    import time
+
     import sentry_sdk
 
 
 logger = logging.getLogger(__name__)
 
+# Fingerprints are forgotten once this many are tracked, which resets their rate limits
+_MAX_TRACKED_FINGERPRINTS = 10_000
+
+
+class _TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float) -> None:
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated_at) * self.refill_per_second,
+        )
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def _fingerprint(execution_type: str, type_name: str, error: BaseException) -> tuple:
+    # Identical failures come from the same place in the code. The message is left out since it often contains IDs.
+    tb = error.__traceback__
+    while tb is not None and tb.tb_next is not None:
+        tb = tb.tb_next
+    location = (tb.tb_frame.f_code.co_filename, tb.tb_lineno) if tb else None
+    return (execution_type, type_name, type(error).__qualname__, location)
+
+
+def _capped(context: dict[str, Any], max_field_length: int) -> dict[str, Any]:
+    # Replace large fields with a truncated repr so one huge input can't bloat every event
+    capped: dict[str, Any] = {}
+    for key, value in context.items():
+        if isinstance(value, (bool, int, float, type(None))):
+            capped[key] = value
+            continue
+        text = value if isinstance(value, str) else repr(value)
+        if len(text) > max_field_length:
+            capped[key] = text[:max_field_length] + "...<truncated>"
+        else:
+            capped[key] = value
+    return capped
+
+
+def _input_context(args: Any) -> Optional[dict[str, Any]]:
+    if len(args) == 1:
+        [arg] = args
+        if is_dataclass(arg) and not isinstance(arg, type):
+            return asdict(arg)
+    return None
+
+
+class SentryReporter:
+    """Reports failures to Sentry without slowing down the worker.
+
+    Failures are deduplicated by fingerprint (where they were raised, the exception type and the workflow/activity type),
+    and each fingerprint is rate limited with a token bucket that allows bursts of `burst` events refilled at
+    `events_per_minute`. Events over the limit are dropped, and the next event reported for the fingerprint says how
+    many were suppressed. Only events that are reported have their input and info serialized, and that happens on a
+    background thread together with building and sending the event. Fields longer than `max_field_length` are truncated.
+    """
+
+    def __init__(
+        self,
+        burst: int = 5,
+        events_per_minute: float = 10.0,
+        max_field_length: int = 1024,
+        max_queue_size: int = 1000,
+    ) -> None:
+        self.burst = burst
+        self.events_per_minute = events_per_minute
+        self.max_field_length = max_field_length
+        self._buckets: dict[tuple, _TokenBucket] = {}
+        self._suppressed: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[
+            tuple[BaseException, Any, dict[str, Callable[[], Optional[dict]]], int]
+        ] = queue.Queue(max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+    def report(
+        self,
+        fingerprint: tuple,
+        error: BaseException,
+        scope: Any,
+        contexts: dict[str, Callable[[], Optional[dict]]],
+    ) -> None:
+        """Queue `error` to be captured with a copy of `scope`. `contexts` are called on the background thread, and only
+        if the event is reported."""
+        with self._lock:
+            bucket = self._buckets.get(fingerprint)
+            if bucket is None:
+                if len(self._buckets) >= _MAX_TRACKED_FINGERPRINTS:
+                    self._buckets.clear()
+                    self._suppressed.clear()
+                bucket = _TokenBucket(self.burst, self.events_per_minute / 60)
+                self._buckets[fingerprint] = bucket
+            if not bucket.take():
+                self._suppressed[fingerprint] = self._suppressed.get(fingerprint, 0) + 1
+                return
+            suppressed = self._suppressed.pop(fingerprint, 0)
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="sentry-reporter", daemon=True
+                )
+                self._thread.start()
+
+        try:
+            # Copy the scope since the caller's scope is discarded once it returns
+            self._queue.put_nowait((error, copy.copy(scope), contexts, suppressed))
+        except queue.Full:
+            logger.warning("Sentry reporter queue is full, dropping event")
+
+    def flush(self) -> None:
+        """Block until every queued event has been captured."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            error, scope, contexts, suppressed = self._queue.get()
+            try:
+                for name, get_context in contexts.items():
+                    context = get_context()
+                    if context is not None:
+                        scope.set_context(name, _capped(context, self.max_field_length))
+                if suppressed:
+                    scope.set_context(
+                        "temporal.deduplication", {"suppressed_events": suppressed}
+                    )
+                scope.capture_exception(error)
+            except Exception:
+                logger.exception("Failed to report error to Sentry")
+            finally:
+                self._queue.task_done()
+
 
 class _SentryActivityInboundInterceptor(ActivityInboundInterceptor):
+    def __init__(
+        self, next: ActivityInboundInterceptor, reporter: SentryReporter
+    ) -> None:
+        super().__init__(next)
+        self._reporter = reporter
+
     async def execute_activity(self, input: ExecuteActivityInput) -> Any:
         # https://docs.sentry.io/platforms/python/troubleshooting/#addressing-concurrency-issues
         with sentry_sdk.isolation_scope() as scope:
@@ -38,16 +189,22 @@ class _SentryActivityInboundInterceptor(ActivityInboundInterceptor):
             try:
                 return await super().execute_activity(input)
             except Exception as e:
-                if len(input.args) == 1:
-                    [arg] = input.args
-                    if is_dataclass(arg) and not isinstance(arg, type):
-                        scope.set_context("temporal.activity.input", asdict(arg))
-                scope.set_context("temporal.activity.info", activity.info().__dict__)
-                scope.capture_exception()
+                self._reporter.report(
+                    _fingerprint("activity", activity_info.activity_type, e),
+                    e,
+                    scope,
+                    {
+                        "temporal.activity.input": lambda: _input_context(input.args),
+                        "temporal.activity.info": lambda: activity_info.__dict__,
+                    },
+                )
                 raise e
 
 
 class _SentryWorkflowInterceptor(WorkflowInboundInterceptor):
+    # Set on the subclass returned by SentryInterceptor.workflow_interceptor_class
+    reporter: SentryReporter
+
     async def execute_workflow(self, input: ExecuteWorkflowInput) -> Any:
         # https://docs.sentry.io/platforms/python/troubleshooting/#addressing-concurrency-issues
         with sentry_sdk.isolation_scope() as scope:
@@ -64,26 +221,42 @@ class _SentryWorkflowInterceptor(WorkflowInboundInterceptor):
             try:
                 return await super().execute_workflow(input)
             except Exception as e:
-                if len(input.args) == 1:
-                    [arg] = input.args
-                    if is_dataclass(arg) and not isinstance(arg, type):
-                        scope.set_context("temporal.workflow.input", asdict(arg))
-                scope.set_context("temporal.workflow.info", workflow.info().__dict__)
                 if not workflow.unsafe.is_replaying():
                     with workflow.unsafe.sandbox_unrestricted():
-                        scope.capture_exception()
+                        self.reporter.report(
+                            _fingerprint("workflow", workflow_info.workflow_type, e),
+                            e,
+                            scope,
+                            {
+                                "temporal.workflow.input": lambda: _input_context(
+                                    input.args
+                                ),
+                                "temporal.workflow.info": lambda: workflow_info.__dict__,
+                            },
+                        )
                 raise e
 
 
 class SentryInterceptor(Interceptor):
     """Temporal Interceptor class which will report workflow & activity exceptions to Sentry"""
 
+    def __init__(self, reporter: Optional[SentryReporter] = None) -> None:
+        self.reporter = reporter or SentryReporter()
+        # Workflow interceptors are instantiated by the worker, so bind the reporter to a subclass
+        self._workflow_interceptor_class = type(
+            "_BoundSentryWorkflowInterceptor",
+            (_SentryWorkflowInterceptor,),
+            {"reporter": self.reporter},
+        )
+
     def intercept_activity(
         self, next: ActivityInboundInterceptor
     ) -> ActivityInboundInterceptor:
-        return _SentryActivityInboundInterceptor(super().intercept_activity(next))
+        return _SentryActivityInboundInterceptor(
+            super().intercept_activity(next), self.reporter
+        )
 
     def workflow_interceptor_class(
         self, input: WorkflowInterceptorClassInput
     ) -> Optional[Type[WorkflowInboundInterceptor]]:
-        return _SentryWorkflowInterceptor
+        return self._workflow_interceptor_class
@@ -0,0 +1,144 @@
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Mapping, NoReturn, Optional
+
+import pytest
+import temporalio.api.common.v1
+import temporalio.worker
+from temporalio.exceptions import ApplicationError
+
+from context_propagation.deadline import (
+    DeadlinePropagator,
+    deadline,
+    deadline_after,
+    remaining_time,
+)
+from context_propagation.propagation import (
+    ContextPropagation,
+    _PropagationWorkflowOutboundInterceptor,
+)
+
+
+@dataclass
+class ActivityInput:
+    start_to_close_timeout: Optional[timedelta]
+    schedule_to_close_timeout: Optional[timedelta] = None
+    headers: Mapping[str, temporalio.api.common.v1.Payload] = field(
+        default_factory=dict
+    )
+
+
+@dataclass
+class ChildWorkflowInput:
+    execution_timeout: Optional[timedelta] = None
+    run_timeout: Optional[timedelta] = None
+    headers: Mapping[str, temporalio.api.common.v1.Payload] = field(
+        default_factory=dict
+    )
+
+
+@dataclass
+class ContinueAsNewInput:
+    workflow: Optional[str] = "MyWorkflow"
+    run_timeout: Optional[timedelta] = None
+    headers: Mapping[str, temporalio.api.common.v1.Payload] = field(
+        default_factory=dict
+    )
+
+
+class _ContinuedAsNew(Exception):
+    pass
+
+
+class RecordingOutboundInterceptor(temporalio.worker.WorkflowOutboundInterceptor):
+    def __init__(self) -> None:
+        self.continued_as_new: Optional[ContinueAsNewInput] = None
+
+    def continue_as_new(self, input: temporalio.worker.ContinueAsNewInput) -> NoReturn:
+        self.continued_as_new = input  # type: ignore[assignment]
+        raise _ContinuedAsNew()
+
+
+def test_outbound_timeouts_are_clamped_to_remaining_time():
+    propagation = ContextPropagation([DeadlinePropagator()])
+    activity_input = ActivityInput(start_to_close_timeout=timedelta(minutes=5))
+    child_input = ChildWorkflowInput(run_timeout=timedelta(hours=1))
+
+    with deadline_after(timedelta(seconds=30)):
+        with propagation.outbound(activity_input, "start_activity", "my_activity"):
+            pass
+        with propagation.outbound(child_input, "start_child_workflow", "MyWorkflow"):
+            pass
+
+    for timeout in [
+        activity_input.start_to_close_timeout,
+        activity_input.schedule_to_close_timeout,
+        child_input.execution_timeout,
+        child_input.run_timeout,
+    ]:
+        assert timeout is not None
+        assert timedelta(seconds=29) < timeout <= timedelta(seconds=30)
+
+    # The deadline travels in the header
+    with propagation.activate(activity_input):
+        remaining = remaining_time()
+        assert remaining is not None and remaining <= timedelta(seconds=30)
+    assert remaining_time() is None
+
+
+def test_shorter_timeouts_are_kept():
+    propagation = ContextPropagation([DeadlinePropagator()])
+    input = ActivityInput(start_to_close_timeout=timedelta(seconds=5))
+    with deadline_after(timedelta(minutes=1)):
+        # An inner, later deadline doesn't extend the outer one
+        with deadline_after(timedelta(hours=1)):
+            with propagation.outbound(input, "start_activity", "my_activity"):
+                pass
+    assert input.start_to_close_timeout == timedelta(seconds=5)
+    assert input.schedule_to_close_timeout is not None
+    assert input.schedule_to_close_timeout <= timedelta(minutes=1)
+
+
+def test_work_past_the_deadline_is_rejected():
+    propagation = ContextPropagation([DeadlinePropagator()])
+    token = deadline.set(time.time() - 1)
+    try:
+        with pytest.raises(ApplicationError) as err:
+            with propagation.outbound(
+                ActivityInput(start_to_close_timeout=None),
+                "start_activity",
+                "my_activity",
+            ):
+                pass
+        assert err.value.type == "DeadlineExceeded"
+
+        # A header carrying a deadline that has passed by the time the activity runs
+        input = ActivityInput(start_to_close_timeout=None)
+        propagation.set_header(input)
+    finally:
+        deadline.reset(token)
+
+    with pytest.raises(ApplicationError):
+        with propagation.inbound(input, "execute_activity", "my_activity"):
+            pass
+
+
+def test_deadline_survives_continue_as_new():
+    propagation = ContextPropagation([DeadlinePropagator()])
+    recorder = RecordingOutboundInterceptor()
+    outbound = _PropagationWorkflowOutboundInterceptor(recorder, propagation)
+
+    with deadline_after(timedelta(seconds=30)):
+        with pytest.raises(_ContinuedAsNew):
+            outbound.continue_as_new(ContinueAsNewInput())  # type: ignore[arg-type]
+
+    input = recorder.continued_as_new
+    assert input is not None
+    assert input.run_timeout is not None
+    assert timedelta(seconds=29) < input.run_timeout <= timedelta(seconds=30)
+
+    # The new run keeps the deadline
+    with propagation.inbound(input, "execute_workflow", "MyWorkflow"):
+        remaining = remaining_time()
+        assert remaining is not None and remaining <= timedelta(seconds=30)
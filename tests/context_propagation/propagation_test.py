@@ -0,0 +1,213 @@
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional
+
+import pytest
+import temporalio.api.common.v1
+import temporalio.converter
+
+from context_propagation import shared
+from context_propagation.propagation import (
+    HEADER_KEY,
+    ContextPropagation,
+    ContextVarPropagator,
+    JSONSerializer,
+    StrSerializer,
+    decode_header,
+    encode_header,
+)
+from context_propagation.shared import propagate_context_var
+
+user_id: ContextVar[Optional[str]] = ContextVar("user_id", default=None)
+tenant: ContextVar[Optional[str]] = ContextVar("tenant", default=None)
+trace_headers: ContextVar[Optional[dict[str, str]]] = ContextVar(
+    "trace_headers", default=None
+)
+
+
+class CountingStrSerializer(StrSerializer):
+    def __init__(self) -> None:
+        self.to_bytes_calls = 0
+        self.from_bytes_calls = 0
+
+    def to_bytes(self, value: str) -> bytes:
+        self.to_bytes_calls += 1
+        return super().to_bytes(value)
+
+    def from_bytes(self, data: bytes) -> str:
+        self.from_bytes_calls += 1
+        return super().from_bytes(data)
+
+
+@dataclass
+class Input:
+    headers: Mapping[str, temporalio.api.common.v1.Payload] = field(
+        default_factory=dict
+    )
+
+
+def test_header_round_trip():
+    entries = [("user_id", b"some-user"), ("big", b"x" * 1000), ("empty", b"")]
+    assert decode_header(encode_header(entries)) == entries
+
+
+def test_all_values_travel_in_one_header():
+    propagation = ContextPropagation(
+        [
+            ContextVarPropagator("user_id", user_id, StrSerializer()),
+            ContextVarPropagator("tenant", tenant, StrSerializer()),
+            ContextVarPropagator("trace", trace_headers, JSONSerializer()),
+        ]
+    )
+    input = Input()
+    tokens: list[Any] = [
+        user_id.set("some-user"),
+        tenant.set("some-tenant"),
+        trace_headers.set({"trace-id": "abc"}),
+    ]
+    try:
+        propagation.set_header(input)
+    finally:
+        trace_headers.reset(tokens.pop())
+        tenant.reset(tokens.pop())
+        user_id.reset(tokens.pop())
+
+    assert list(input.headers) == [HEADER_KEY]
+    with propagation.activate(input):
+        assert user_id.get() == "some-user"
+        assert tenant.get() == "some-tenant"
+        assert trace_headers.get() == {"trace-id": "abc"}
+    assert user_id.get() is None
+    assert tenant.get() is None
+    assert trace_headers.get() is None
+
+
+def test_serialized_values_and_headers_are_cached():
+    serializer = CountingStrSerializer()
+    propagation = ContextPropagation(
+        [ContextVarPropagator("user_id", user_id, serializer)]
+    )
+    inputs = [Input() for _ in range(5)]
+
+    token = user_id.set("some-user")
+    try:
+        for input in inputs:
+            propagation.set_header(input)
+    finally:
+        user_id.reset(token)
+
+    assert serializer.to_bytes_calls == 1
+    assert len({id(input.headers[HEADER_KEY]) for input in inputs}) == 1
+
+    for input in inputs:
+        with propagation.activate(input):
+            assert user_id.get() == "some-user"
+    assert serializer.from_bytes_calls == 1
+
+
+def test_unknown_values_are_ignored():
+    sender = ContextPropagation(
+        [
+            ContextVarPropagator("user_id", user_id, StrSerializer()),
+            ContextVarPropagator("tenant", tenant, StrSerializer()),
+        ]
+    )
+    receiver = ContextPropagation(
+        [ContextVarPropagator("user_id", user_id, StrSerializer())]
+    )
+    input = Input()
+    user_token = user_id.set("some-user")
+    tenant_token = tenant.set("some-tenant")
+    try:
+        sender.set_header(input)
+    finally:
+        tenant.reset(tenant_token)
+        user_id.reset(user_token)
+
+    with receiver.activate(input):
+        assert user_id.get() == "some-user"
+        assert tenant.get() is None
+
+
+def test_no_header_without_context():
+    input = Input()
+    ContextPropagation(
+        [ContextVarPropagator("user_id", user_id, StrSerializer())]
+    ).set_header(input)
+    assert input.headers == {}
+
+
+def test_registered_context_vars_are_propagated():
+    propagators = list(shared.propagators)
+    propagate_context_var("tenant", tenant, StrSerializer())
+    try:
+        propagation = ContextPropagation(shared.propagators)
+    finally:
+        shared.propagators[:] = propagators
+
+    input = Input()
+    token = tenant.set("some-tenant")
+    try:
+        propagation.set_header(input)
+    finally:
+        tenant.reset(token)
+
+    with propagation.activate(input):
+        assert tenant.get() == "some-tenant"
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        # Unknown version
+        b"\x02" + encode_header([("user_id", b"some-user")])[1:],
+        # Name longer than the header
+        b"\x01\x07user",
+        # Value longer than the header
+        encode_header([("user_id", b"some-user")])[:-1],
+        # Varint never ends
+        b"\x01\x07user_id\xff\xff",
+        # Name isn't UTF-8
+        b"\x01\x01\xff\x00",
+    ],
+)
+def test_malformed_headers_are_ignored(data: bytes):
+    with pytest.raises(ValueError):
+        decode_header(data)
+
+    propagation = ContextPropagation(
+        [ContextVarPropagator("user_id", user_id, StrSerializer())]
+    )
+    input = Input(
+        headers={
+            HEADER_KEY: temporalio.api.common.v1.Payload(
+                metadata={"encoding": b"binary/plain"}, data=data
+            )
+        }
+    )
+    with propagation.activate(input):
+        assert user_id.get() is None
+
+
+def test_legacy_header_is_read():
+    propagation = ContextPropagation(
+        [
+            ContextVarPropagator(
+                "user_id", user_id, StrSerializer(), legacy_header_key="__my_user_id"
+            )
+        ]
+    )
+    payload_converter = temporalio.converter.default().payload_converter
+    input = Input(headers={"__my_user_id": payload_converter.to_payload("old-user")})
+    with propagation.activate(input):
+        assert user_id.get() == "old-user"
+
+    # The context header takes precedence
+    token = user_id.set("new-user")
+    try:
+        propagation.set_header(input)
+    finally:
+        user_id.reset(token)
+    with propagation.activate(input):
+        assert user_id.get() == "new-user"
@@ -3,6 +3,7 @@ import uuid
 from temporalio.client import Client
 from temporalio.worker import Worker
 
+from custom_converter.binary import binary_passthrough_data_converter
 from custom_converter.shared import (
     GreetingInput,
     GreetingOutput,
@@ -26,3 +27,19 @@ async def test_workflow_with_custom_converter(client: Client):
         )
     assert isinstance(result, GreetingOutput)
     assert result.result == "Hello, Temporal"
+
+
+def test_binary_passthrough_converter():
+    payload_converter = binary_passthrough_data_converter.payload_converter
+    blob = bytes(range(256)) * 4
+    for value in [blob, bytearray(blob), memoryview(blob)]:
+        (payload,) = payload_converter.to_payloads([value])
+        assert payload.metadata["encoding"] == b"binary/plain"
+        assert payload.data == blob
+
+        (as_bytes, as_bytearray, as_memoryview) = payload_converter.from_payloads(
+            [payload] * 3, [bytes, bytearray, memoryview]
+        )
+        assert type(as_bytes) is bytes and as_bytes == blob
+        assert type(as_bytearray) is bytearray and as_bytearray == blob
+        assert type(as_memoryview) is memoryview and as_memoryview == blob
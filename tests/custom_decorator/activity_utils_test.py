@@ -0,0 +1,71 @@
+import asyncio
+import dataclasses
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from temporalio import activity
+from temporalio.testing import ActivityEnvironment
+
+from custom_decorator.activity_utils import auto_heartbeater, checkpoint, resume_state
+
+
+@dataclass
+class Progress:
+    next_line: int = 0
+
+
+@auto_heartbeater
+async def process_lines(lines: int) -> int:
+    progress = resume_state(Progress) or Progress()
+    for line in range(progress.next_line, lines):
+        await asyncio.sleep(0.01)
+        checkpoint(Progress(line + 1))
+    # Let the last checkpoint go out
+    await asyncio.sleep(0.1)
+    return progress.next_line
+
+
+def activity_environment(heartbeat_details: list[Any]) -> ActivityEnvironment:
+    env = ActivityEnvironment()
+    env.info = dataclasses.replace(
+        env.info,
+        heartbeat_timeout=timedelta(seconds=0.1),
+        heartbeat_details=heartbeat_details,
+    )
+    return env
+
+
+async def test_checkpoints_are_coalesced_into_heartbeats():
+    env = activity_environment([])
+    heartbeats: list[Any] = []
+    env.on_heartbeat = lambda *details: heartbeats.append(details)
+
+    assert await env.run(process_lines, 20) == 0
+    # Twenty checkpoints over ~0.3s, heartbeated every 0.05s
+    assert 2 <= len(heartbeats) < 20
+    assert heartbeats[-1] == (Progress(20),)
+
+
+async def test_retry_resumes_from_last_checkpoint():
+    # Details from a previous attempt are decoded without type hints
+    env = activity_environment([{"next_line": 15}])
+    heartbeats: list[Any] = []
+    env.on_heartbeat = lambda *details: heartbeats.append(details)
+
+    assert await env.run(process_lines, 20) == 15
+    assert heartbeats[-1] == (Progress(20),)
+
+
+def test_checkpoint_without_heartbeat_timeout_heartbeats_directly():
+    env = ActivityEnvironment()
+    heartbeats: list[Any] = []
+    env.on_heartbeat = lambda *details: heartbeats.append(details)
+
+    @auto_heartbeater
+    def report() -> None:
+        assert activity.info().heartbeat_timeout is None
+        checkpoint(Progress(1))
+
+    env.run(report)
+    assert heartbeats == [(Progress(1),)]
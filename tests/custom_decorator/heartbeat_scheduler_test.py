@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from custom_decorator.heartbeat_scheduler import (
+    AsyncHeartbeatScheduler,
+    ThreadHeartbeatScheduler,
+)
+
+activity_name: ContextVar[Optional[str]] = ContextVar("activity_name", default=None)
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.heartbeats: list[tuple[Optional[str], tuple[Any, ...]]] = []
+        self.lock = threading.Lock()
+
+    def heartbeat(self, *details: Any) -> None:
+        # Record which activity's context the heartbeat was sent from
+        with self.lock:
+            self.heartbeats.append((activity_name.get(), details))
+
+
+async def test_async_scheduler_heartbeats_in_activity_context_with_latest_details():
+    recorder = Recorder()
+    scheduler = AsyncHeartbeatScheduler.for_running_loop()
+    assert AsyncHeartbeatScheduler.for_running_loop() is scheduler
+
+    async def activity(name: str, interval: float) -> None:
+        activity_name.set(name)
+        handle = scheduler.register(interval, recorder.heartbeat)
+        for progress in range(5):
+            handle.set_details(progress)
+            await asyncio.sleep(0.05)
+        scheduler.unregister(handle)
+
+    await asyncio.gather(activity("fast", 0.02), activity("slow", 0.1))
+    await asyncio.sleep(0.1)
+
+    fast = [details for name, details in recorder.heartbeats if name == "fast"]
+    slow = [details for name, details in recorder.heartbeats if name == "slow"]
+    assert len(fast) > len(slow) >= 1
+    assert fast[-1] in [(3,), (4,)]
+    # Nothing after unregistering
+    count = len(recorder.heartbeats)
+    await asyncio.sleep(0.15)
+    assert len(recorder.heartbeats) == count
+
+
+def test_thread_scheduler_heartbeats_sync_activities():
+    recorder = Recorder()
+    scheduler = ThreadHeartbeatScheduler()
+
+    def activity(name: str) -> None:
+        activity_name.set(name)
+        handle = scheduler.register(0.02, recorder.heartbeat)
+        handle.set_details(name)
+        time.sleep(0.15)
+        scheduler.unregister(handle)
+
+    threads = [
+        threading.Thread(target=activity, args=(f"activity-{i}",)) for i in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i in range(10):
+        name = f"activity-{i}"
+        assert (name, (name,)) in recorder.heartbeats
@@ -0,0 +1,26 @@
+from temporalio.runtime import MetricBuffer, Runtime, TelemetryConfig
+
+from custom_metric.instrumentation import OTHER_LABEL_VALUE, WorkerInstruments
+
+
+def test_bound_instruments_are_cached_and_labels_bounded():
+    buffer = MetricBuffer(1000)
+    runtime = Runtime(telemetry=TelemetryConfig(metrics=buffer))
+    instruments = WorkerInstruments(runtime.metric_meter, max_label_values=2)
+
+    first = instruments.bind(instruments.activity_attempt, {"activity_type": "a"})
+    assert (
+        instruments.bind(instruments.activity_attempt, {"activity_type": "a"}) is first
+    )
+
+    for activity_type in ["a", "b", "c", "d"]:
+        instruments.bind(
+            instruments.activity_attempt, {"activity_type": activity_type}
+        ).record(1)
+
+    recorded = [
+        update.attributes["activity_type"]
+        for update in buffer.retrieve_updates()
+        if update.metric.name == "custom_activity_attempt"
+    ]
+    assert recorded == ["a", "b", OTHER_LABEL_VALUE, OTHER_LABEL_VALUE]
@@ -0,0 +1,40 @@
+import dataclasses
+from pathlib import Path
+
+import temporalio.converter
+
+from encryption.codec import ClaimCheckCodec, LocalFileBlobStore
+
+
+async def test_claim_check_codec_offloads_large_payloads(tmp_path: Path):
+    store = LocalFileBlobStore(tmp_path)
+    data_converter = dataclasses.replace(
+        temporalio.converter.default(),
+        payload_codec=ClaimCheckCodec(store, threshold_bytes=1024),
+    )
+
+    small = "small"
+    large = "x" * 10_000
+    payloads = await data_converter.encode([small, large, large])
+
+    # Small payloads are left alone, large ones are replaced with a reference
+    assert payloads[0].metadata["encoding"] == b"json/plain"
+    assert payloads[1].metadata["encoding"] == b"binary/claim-check"
+    assert payloads[1].ByteSize() < 200
+
+    # Identical payloads are stored once
+    assert payloads[1] == payloads[2]
+    assert len(list(tmp_path.iterdir())) == 1
+
+    assert await data_converter.decode(payloads, [str, str, str]) == [
+        small,
+        large,
+        large,
+    ]
+
+    # A codec with an empty cache, e.g. in another worker, reads from the store
+    other_data_converter = dataclasses.replace(
+        temporalio.converter.default(),
+        payload_codec=ClaimCheckCodec(store, threshold_bytes=1024),
+    )
+    assert await other_data_converter.decode(payloads[1:2], [str]) == [large]
@@ -0,0 +1,163 @@
+import dataclasses
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from enum import Enum
+from ipaddress import IPv4Address
+from typing import Dict, List, Optional
+
+import pytest
+import temporalio.converter
+from temporalio.client import Client
+from temporalio.worker import Worker
+
+# orjson is in the optional orjson-converter dependency group
+pytest.importorskip("orjson")
+
+from orjson_converter.converter import (
+    OrjsonJSONPayloadConverter,
+    orjson_data_converter,
+)
+from orjson_converter.worker import (
+    MyDataclass,
+    MyPydanticModel,
+    MyWorkflow,
+    my_activity,
+)
+
+
+class Color(Enum):
+    RED = "red"
+    BLUE = "blue"
+
+
+@dataclasses.dataclass
+class Node:
+    name: str
+    color: Color
+    children: List["Node"]
+    weights: Dict[int, float]
+    parent_ip: Optional[IPv4Address] = None
+
+
+@dataclasses.dataclass
+class Event:
+    name: str
+    at: datetime
+    tags: List[str]
+
+
+def make_items() -> List[MyDataclass]:
+    return [
+        MyDataclass(
+            name="first",
+            created_at=datetime(2000, 1, 2, 3, 4, 5),
+            models=[
+                MyPydanticModel(
+                    some_ip=IPv4Address("127.0.0.1"),
+                    some_date=datetime(2000, 1, 2, 3, 4, 5),
+                ),
+                MyPydanticModel(
+                    some_ip=IPv4Address("127.0.0.2"),
+                    some_date=datetime(2001, 2, 3, 4, 5, 6, tzinfo=timezone.utc),
+                ),
+            ],
+        )
+    ]
+
+
+def test_round_trip_matches_default_json_encoding():
+    payload_converter = orjson_data_converter.payload_converter
+    tree = Node(
+        name="root",
+        color=Color.RED,
+        weights={1: 0.5},
+        children=[
+            Node(
+                name="leaf",
+                color=Color.BLUE,
+                children=[],
+                weights={},
+                parent_ip=IPv4Address("10.0.0.1"),
+            )
+        ],
+    )
+
+    for value, type_hint in [(tree, Node), (make_items(), List[MyDataclass])]:
+        # Decoding twice exercises the cached decoder
+        for _ in range(2):
+            payloads = payload_converter.to_payloads([value])
+            assert payloads[0].metadata["encoding"] == b"json/plain"
+            assert payload_converter.from_payloads(payloads, [type_hint]) == [value]
+
+    # Payloads stay readable by the default converter
+    event = Event(name="created", at=datetime(2000, 1, 2, 3, 4, 5), tags=["a", "b"])
+    payloads = payload_converter.to_payloads([event])
+    default_converter = temporalio.converter.default().payload_converter
+    assert default_converter.from_payloads(payloads, [Event]) == [event]
+
+
+def test_decodes_utc_suffix():
+    # As written by other SDKs
+    payloads = orjson_data_converter.payload_converter.to_payloads(
+        [{"name": "created", "at": "2000-01-02T03:04:05Z", "tags": []}]
+    )
+    assert orjson_data_converter.payload_converter.from_payloads(payloads, [Event]) == [
+        Event(
+            name="created",
+            at=datetime(2000, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            tags=[],
+        )
+    ]
+
+
+def test_concurrent_first_decodes():
+    tree = Node(
+        name="root",
+        color=Color.RED,
+        weights={},
+        children=[Node(name="leaf", color=Color.BLUE, children=[], weights={})],
+    )
+    payload = orjson_data_converter.payload_converter.to_payloads([[tree]])[0]
+    # Switch threads often, so they interleave while building decoders
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for _ in range(50):
+            # A fresh converter, so every thread races to build the decoders
+            converter = OrjsonJSONPayloadConverter()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(
+                    executor.map(
+                        lambda _: converter.from_payload(payload, List[Node]),
+                        range(8),
+                    )
+                )
+            assert results == [[tree]] * 8
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+
+async def test_workflow_with_orjson_converter(client: Client):
+    # Replace data converter in client
+    new_config = client.config()
+    new_config["data_converter"] = orjson_data_converter
+    client = Client(**new_config)
+    task_queue_name = str(uuid.uuid4())
+
+    orig_items = make_items()
+
+    async with Worker(
+        client,
+        task_queue=task_queue_name,
+        workflows=[MyWorkflow],
+        activities=[my_activity],
+    ):
+        result = await client.execute_workflow(
+            MyWorkflow.run,
+            orig_items,
+            id=str(uuid.uuid4()),
+            task_queue=task_queue_name,
+        )
+    assert orig_items == result
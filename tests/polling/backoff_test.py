@@ -0,0 +1,111 @@
+import dataclasses
+import time
+from datetime import timedelta
+
+import pytest
+from temporalio.exceptions import ApplicationError
+from temporalio.runtime import MetricBuffer, Runtime, TelemetryConfig
+from temporalio.testing import ActivityEnvironment
+
+from polling.backoff import (
+    CompletionTimes,
+    PollingPolicy,
+    PollState,
+    poll_once,
+    poll_until_done,
+)
+
+
+def test_next_delay_backs_off_to_maximum():
+    policy = PollingPolicy(
+        initial_interval=timedelta(seconds=1),
+        backoff_coefficient=2,
+        maximum_interval=timedelta(seconds=5),
+        jitter=0,
+    )
+    delays = [policy.next_delay(PollState(polls=polls)) for polls in range(1, 6)]
+    assert delays == [1, 2, 4, 5, 5]
+
+    # Waits for the expected completion, then backs off
+    state = PollState(polls=1, started_at=time.time() - 1)
+    assert policy.next_delay(state, 4) == pytest.approx(3, abs=0.1)
+    assert policy.next_delay(state, 0.5) == 1
+
+    jittered = PollingPolicy(jitter=0.5).next_delay(PollState(polls=1))
+    assert 0.5 <= jittered <= 1
+
+
+def test_completion_times():
+    completion_times = CompletionTimes(percentile=0.5, min_samples=3)
+    completion_times.record("a", 3)
+    completion_times.record("a", 1)
+    assert completion_times.expected("a") is None
+    completion_times.record("a", 2)
+    assert completion_times.expected("a") == 2
+    assert completion_times.expected("b") is None
+
+
+async def test_poll_until_done_resumes_from_heartbeat():
+    buffer = MetricBuffer(1000)
+    env = ActivityEnvironment()
+    env.metric_meter = Runtime(telemetry=TelemetryConfig(metrics=buffer)).metric_meter
+    # As heartbeated by a previous attempt
+    env.info = dataclasses.replace(
+        env.info, heartbeat_details=[{"polls": 3, "started_at": time.time()}]
+    )
+    heartbeats: list[PollState] = []
+    env.on_heartbeat = heartbeats.append
+    polls = 0
+
+    async def poll() -> str:
+        nonlocal polls
+        polls += 1
+        if polls < 3:
+            raise RuntimeError("Not done")
+        return "done"
+
+    policy = PollingPolicy(
+        initial_interval=timedelta(milliseconds=1),
+        backoff_coefficient=1,
+        jitter=0,
+    )
+    completion_times = CompletionTimes(min_samples=1)
+    assert await env.run(poll_until_done, poll, policy, completion_times) == "done"
+
+    assert {state.polls for state in heartbeats} == {4, 5}
+    assert completion_times.expected(env.info.activity_type) is not None
+    updates = buffer.retrieve_updates()
+    assert [
+        update.value
+        for update in updates
+        if update.metric.name == "polling_polls_per_completion"
+    ] == [6]
+    assert (
+        sum(update.value for update in updates if update.metric.name == "polling_polls")
+        == 3
+    )
+
+
+@pytest.mark.parametrize(
+    "details", [[], ["Invoking activity"], [{"unexpected": 1}], [{"polls": 2}]]
+)
+def test_poll_state_from_heartbeat(details: list):
+    env = ActivityEnvironment()
+    env.info = dataclasses.replace(env.info, heartbeat_details=details)
+    state = env.run(PollState.from_heartbeat)
+    assert state.polls == (2 if details == [{"polls": 2}] else 0)
+
+
+async def test_poll_once_fails_with_next_delay():
+    env = ActivityEnvironment()
+    heartbeats: list[PollState] = []
+    env.on_heartbeat = heartbeats.append
+
+    async def poll() -> str:
+        raise RuntimeError("Not done")
+
+    policy = PollingPolicy(initial_interval=timedelta(seconds=10), jitter=0)
+    with pytest.raises(ApplicationError) as err:
+        await env.run(poll_once, poll, policy)
+    assert err.value.next_retry_delay == timedelta(seconds=10)
+    assert [state.polls for state in heartbeats] == [1]
@@ -0,0 +1,25 @@
+from typing import Any
+
+from temporalio.service import RPCError, RPCStatusCode
+
+from polling.batch.poller import BatchPoller
+
+
+class _GoneActivityHandle:
+    async def heartbeat(self) -> None:
+        raise RPCError("activity not found", RPCStatusCode.NOT_FOUND, b"")
+
+
+class _GoneActivityClient:
+    def get_async_activity_handle(self, task_token: bytes) -> _GoneActivityHandle:
+        return _GoneActivityHandle()
+
+
+async def test_heartbeat_forgets_activities_not_found():
+    async def poll(requests: dict[str, Any]) -> dict[str, Any]:
+        return {}
+
+    poller = BatchPoller(_GoneActivityClient(), poll)  # type: ignore[arg-type]
+    poller.add("operation", b"task-token", "request")
+    await poller.heartbeat_pending()
+    assert poller.pending == 0
@@ -0,0 +1,52 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
+from temporalio.client import Client
+from temporalio.worker import Worker
+
+from polling.batch.activities import BatchPollingActivities
+from polling.batch.poller import BatchPoller
+from polling.batch.workflows import GreetingWorkflow
+from polling.test_service import get_service_results
+
+
+async def test_batch_polling_workflows(client: Client):
+    requests = []
+
+    async def poll(inputs):
+        requests.append(len(inputs))
+        return await get_service_results(inputs)
+
+    poller = BatchPoller(client, poll, interval=timedelta(milliseconds=200))
+    activities = BatchPollingActivities(poller)
+    task_queue = f"tq-{uuid.uuid4()}"
+    poller_task = asyncio.create_task(poller.run())
+    try:
+        async with Worker(
+            client,
+            task_queue=task_queue,
+            workflows=[GreetingWorkflow],
+            activities=[activities.compose_greeting],
+            # Waiting activities don't hold a slot
+            max_concurrent_activities=2,
+        ):
+            results = await asyncio.gather(
+                *(
+                    client.execute_workflow(
+                        GreetingWorkflow.run,
+                        f"Temporal {i}",
+                        id=f"batch-polling-{uuid.uuid4()}",
+                        task_queue=task_queue,
+                    )
+                    for i in range(10)
+                )
+            )
+    finally:
+        poller_task.cancel()
+
+    assert results == [f"Hello, Temporal {i}!" for i in range(10)]
+    assert poller.pending == 0
+    # Far fewer requests than one per operation per poll
+    assert max(requests) > 1
+    assert len(requests) < 10 * 5
@@ -0,0 +1,85 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from process_pool_activities import shared_memory_executor
+from process_pool_activities.shared_memory_executor import (
+    SharedMemoryExecutor,
+    _Pickler,
+)
+
+
+def _reverse(data: bytes, suffix: bytearray, *, prefix: bytes) -> tuple:
+    assert isinstance(data, bytes) and isinstance(suffix, bytearray)
+    return prefix + data[::-1], bytearray(suffix.upper()), len(data)
+
+
+def _fail(data: bytes) -> None:
+    raise ValueError(f"{len(data)} bytes")
+
+
+def _segments() -> set[str]:
+    # Only Linux lists shared memory segments as files
+    if not os.path.isdir("/dev/shm"):
+        return set()
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+
+def test_large_buffers_are_pickled_separately():
+    for obj, separate in [
+        (b"x" * 100, []),
+        (b"x" * 1000, [1000]),
+        (bytearray(2000), [2000]),
+        ({"data": [b"x" * 1000, b"y" * 10, bytearray(1000)]}, [1000, 1000]),
+    ]:
+        pickler = _Pickler.pickle(obj, threshold=1000)
+        assert [len(data) for data in pickler.bytes] + [
+            buffer.nbytes for buffer in pickler.buffers
+        ] == separate
+
+
+def test_arguments_and_results_through_shared_memory():
+    before = _segments()
+    with SharedMemoryExecutor(ProcessPoolExecutor(1), threshold=1024) as executor:
+        # The result of the second fits the segment sized after the first, the third's needs a new one
+        for size in [10_000, 10_000, 20_000]:
+            data = os.urandom(size)
+            assert executor.submit(
+                _reverse, data, bytearray(b"abc" * 1000), prefix=b"small"
+            ).result() == (b"small" + data[::-1], bytearray(b"ABC" * 1000), size)
+
+        with pytest.raises(ValueError, match="20000 bytes"):
+            executor.submit(_fail, data).result()
+
+        # Small arguments and results don't use shared memory
+        assert executor.submit(len, b"small").result() == 5
+    # Every segment is unlinked
+    assert _segments() == before
+
+
+def _reversed(data: bytes) -> bytes:
+    return data[::-1]
+
+
+def test_results_larger_than_segment_go_through_pipe_where_segments_die_with_creator(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    # As on Windows. Runs in a thread, since the setting doesn't carry over to other processes.
+    monkeypatch.setattr(
+        shared_memory_executor, "_RESULT_SEGMENTS_OUTLIVE_CREATOR", False
+    )
+    data = os.urandom(10_000)
+    pickled = shared_memory_executor._run(
+        _reversed, _Pickler.pickle(((data,), {}), 1_000_000).pickled(None), None, 1024
+    )
+    assert pickled.segment_name is None and pickled.pipe_fallback_size == 10_000
+
+    before = _segments()
+    with SharedMemoryExecutor(ThreadPoolExecutor(1), threshold=1024) as executor:
+        for size in [10_000, 10_000, 20_000]:
+            data = os.urandom(size)
+            assert executor.submit(_reversed, data).result() == data[::-1]
+        # Sized after the result that went through the pipe
+        assert executor._result_size == 20_000
+    assert _segments() == before
@@ -0,0 +1,76 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from temporalio.worker import SharedHeartbeatSender
+
+from process_pool_activities.shared_state import SharedMemoryStateManager
+
+
+def _wait_and_heartbeat(
+    sender: SharedHeartbeatSender, started: Any, cancelled: Any, heartbeats: int
+) -> bool:
+    for i in range(heartbeats):
+        sender.send_heartbeat(b"task-token", i, f"detail {i}")
+    started.set()
+    return cancelled.wait(10)
+
+
+async def test_heartbeats_and_cancellation_across_processes():
+    manager = SharedMemoryStateManager(heartbeat_buffer_size=256)
+    heartbeats: list[tuple] = []
+    try:
+        started = manager.new_event()
+        cancelled = manager.new_event()
+        sender = await manager.register_heartbeater(
+            b"task-token", lambda *details: heartbeats.append(details)
+        )
+        with ProcessPoolExecutor(
+            1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            # Many more heartbeats than fit the buffer at once
+            result = asyncio.get_running_loop().run_in_executor(
+                executor, _wait_and_heartbeat, sender, started, cancelled, 200
+            )
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            assert not cancelled.is_set()
+            cancelled.set()
+            assert await result
+        await manager.unregister_heartbeater(b"task-token")
+    finally:
+        manager.close()
+    # Every heartbeat sent before unregistering, in order
+    assert heartbeats == [(i, f"detail {i}") for i in range(200)]
+
+
+async def test_unregister_flushes_heartbeats():
+    manager = SharedMemoryStateManager(poll_interval=60)
+    heartbeats: list[tuple] = []
+    try:
+        first = await manager.register_heartbeater(b"first", heartbeats.append)
+        second = await manager.register_heartbeater(b"second", heartbeats.append)
+        first.send_heartbeat(b"first", "first")
+        second.send_heartbeat(b"second", "second")
+        await asyncio.wait_for(manager.unregister_heartbeater(b"first"), 5)
+        assert "first" in heartbeats
+        await asyncio.wait_for(manager.unregister_heartbeater(b"second"), 5)
+        assert sorted(heartbeats) == ["first", "second"]
+    finally:
+        manager.close()
+
+
+async def test_buffers_and_events_are_reused():
+    manager = SharedMemoryStateManager(max_events=1, max_heartbeaters=1)
+    try:
+        for i in range(3):
+            event = manager.new_event()
+            # Events start cleared, whatever their slot was left at
+            assert not event.is_set()
+            event.set()
+            del event
+            await manager.register_heartbeater(b"task-token", lambda *details: None)
+            await manager.unregister_heartbeater(b"task-token")
+    finally:
+        manager.close()
@@ -0,0 +1,84 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from process_pool_activities.warm_pool import Resource, WarmProcessPoolExecutor
+
+
+class _Tracked:
+    def __init__(self, log: Path) -> None:
+        self.log = log
+        self._write("created")
+
+    def close(self) -> None:
+        self._write("closed")
+
+    def _write(self, event: str) -> None:
+        with self.log.open("a") as log:
+            log.write(f"{os.getpid()} {event}\n")
+
+
+_log: Path
+_tracked = Resource(lambda: _Tracked(_log), _Tracked.close)
+_leaked: list[bytes] = []
+
+
+def _set_log(log: Path) -> None:
+    global _log
+    _log = log
+
+
+def _use_resource() -> tuple[int, int]:
+    return os.getpid(), id(_tracked.get())
+
+
+def _leak(mb: int) -> int:
+    _leaked.append(os.urandom(mb * 2**20))
+    return os.getpid()
+
+
+def _events(log: Path) -> list[tuple[int, str]]:
+    return [
+        (int(pid), event)
+        for pid, event in (line.split() for line in log.read_text().splitlines())
+    ]
+
+
+def test_resources_are_reused_and_closed(tmp_path: Path):
+    log = tmp_path / "log"
+    with WarmProcessPoolExecutor(2, initializer=_set_log, initargs=(log,)) as executor:
+        futures = [executor.submit(_use_resource) for _ in range(10)]
+        results = [future.result() for future in futures]
+    # One resource per process, reused by each of its activities
+    resource_ids: dict[int, set[int]] = {}
+    for pid, resource_id in results:
+        resource_ids.setdefault(pid, set()).add(resource_id)
+    assert all(len(ids) == 1 for ids in resource_ids.values())
+    events = _events(log)
+    assert sorted(events) == sorted(
+        [(pid, "created") for pid in resource_ids]
+        + [(pid, "closed") for pid in resource_ids]
+    )
+
+
+def test_processes_replaced_after_max_tasks(tmp_path: Path):
+    log = tmp_path / "log"
+    with WarmProcessPoolExecutor(
+        1, initializer=_set_log, initargs=(log,), max_tasks_per_process=2
+    ) as executor:
+        pids = [executor.submit(_use_resource).result()[0] for _ in range(6)]
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4] == pids[5]
+    assert executor.replaced_processes == 3
+    # Replaced processes closed their resources too
+    assert [event for _, event in _events(log)].count("closed") == 3
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Memory isn't measured")
+def test_processes_replaced_over_max_rss():
+    with WarmProcessPoolExecutor(1, max_rss_mb=200) as executor:
+        pids = [executor.submit(_leak, 50).result() for _ in range(8)]
+    # Replaced before leaking past 200MB and again after that
+    assert 2 <= len(set(pids)) < 8
+    assert pids[:2] == [pids[0]] * 2
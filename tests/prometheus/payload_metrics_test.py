@@ -0,0 +1,80 @@
+import dataclasses
+from dataclasses import dataclass
+
+import temporalio.converter
+from temporalio.converter import ActivitySerializationContext
+from temporalio.runtime import MetricBuffer, Runtime, TelemetryConfig
+
+from encryption.codec import EncryptionCodec
+from prometheus.payload_metrics import metered_data_converter
+from prometheus.payload_report import top_payload_producers
+
+
+@dataclass
+class Order:
+    id: str
+    items: list[str]
+
+
+async def test_metered_data_converter_records_sizes_and_latency():
+    buffer = MetricBuffer(1000)
+    runtime = Runtime(telemetry=TelemetryConfig(metrics=buffer))
+    data_converter = metered_data_converter(
+        dataclasses.replace(
+            temporalio.converter.default(), payload_codec=EncryptionCodec()
+        ),
+        meter=runtime.metric_meter,
+    ).with_context(
+        ActivitySerializationContext(
+            namespace="default",
+            activity_id="1",
+            activity_type="process_order",
+            activity_task_queue="tq",
+            workflow_id="wf",
+            workflow_type="OrderWorkflow",
+            is_local=False,
+        )
+    )
+
+    order = Order(id="order-1", items=["a", "b"])
+    payloads = await data_converter.encode([order])
+    assert await data_converter.decode(payloads, [Order]) == [order]
+
+    updates = buffer.retrieve_updates()
+    sizes = {
+        (u.attributes["stage"], u.attributes["direction"], u.attributes["encoding"])
+        for u in updates
+        if u.metric.name == "payload_size"
+    }
+    assert sizes == {
+        ("converter", "outbound", "json/plain"),
+        ("codec", "outbound", "binary/encrypted"),
+        ("codec", "inbound", "binary/encrypted"),
+        ("converter", "inbound", "json/plain"),
+    }
+    latencies = [u for u in updates if u.metric.name == "payload_latency"]
+    assert len(latencies) == 4
+    assert all(u.attributes["kind"] == "activity" for u in latencies)
+    assert all(u.attributes["type"] == "process_order" for u in latencies)
+
+
+def test_top_payload_producers():
+    metrics_text = "\n".join(
+        [
+            "# TYPE payload_size histogram",
+            'payload_size_sum{direction="outbound",encoding="json/plain",kind="activity",stage="converter",type="small"} 100',
+            'payload_size_count{direction="outbound",encoding="json/plain",kind="activity",stage="converter",type="small"} 10',
+            'payload_size_sum{direction="outbound",encoding="json/plain",kind="workflow",stage="converter",type="Big"} 5000',
+            'payload_size_count{direction="outbound",encoding="json/plain",kind="workflow",stage="converter",type="Big"} 2',
+            'payload_size_sum{direction="outbound",encoding="binary/plain",kind="workflow",stage="converter",type="Big"} 1000',
+            'payload_size_count{direction="outbound",encoding="binary/plain",kind="workflow",stage="converter",type="Big"} 2',
+            'payload_size_sum{direction="inbound",encoding="json/plain",kind="activity",stage="converter",type="inbound"} 99999',
+            'payload_size_count{direction="inbound",encoding="json/plain",kind="activity",stage="converter",type="inbound"} 1',
+        ]
+    )
+    producers = top_payload_producers(metrics_text, top=5)
+    assert [(p.kind, p.type, p.total_bytes, p.payloads) for p in producers] == [
+        ("workflow", "Big", 6000, 4),
+        ("activity", "small", 100, 10),
+    ]
+    assert producers[0].average_bytes == 1500
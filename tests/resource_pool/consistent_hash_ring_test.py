@@ -0,0 +1,28 @@
+from collections import Counter
+
+from resource_pool.pool_client.consistent_hash_ring import ConsistentHashRing
+
+
+def test_nodes_for_returns_every_node_once_starting_with_home_node():
+    ring = ConsistentHashRing([f"shard-{i}" for i in range(4)])
+    for key in ["a", "b", "workflow-123"]:
+        nodes = ring.nodes_for(key)
+        assert sorted(nodes) == sorted(ring.nodes)
+        assert nodes[0] == ring.node_for(key)
+
+
+def test_keys_are_spread_across_nodes():
+    ring = ConsistentHashRing([f"shard-{i}" for i in range(4)])
+    counts = Counter(ring.node_for(f"workflow-{i}") for i in range(4000))
+    assert set(counts) == set(ring.nodes)
+    # Each shard should get a reasonable share of the 1000 keys it would get with a perfect split
+    assert all(count > 500 for count in counts.values())
+
+
+def test_adding_a_node_only_moves_keys_to_that_node():
+    before = ConsistentHashRing([f"shard-{i}" for i in range(4)])
+    after = ConsistentHashRing([f"shard-{i}" for i in range(5)])
+    for i in range(1000):
+        key = f"workflow-{i}"
+        if before.node_for(key) != after.node_for(key):
+            assert after.node_for(key) == "shard-4"
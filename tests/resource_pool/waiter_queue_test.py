@@ -0,0 +1,60 @@
+from typing import Optional
+
+from resource_pool.pool_client.waiter_queue import PriorityClassStats, WaiterQueue
+from resource_pool.shared import AcquireRequest
+
+
+def request(
+    workflow_id: str, priority: int = 0, tenant: Optional[str] = None
+) -> AcquireRequest:
+    return AcquireRequest(workflow_id, priority=priority, tenant=tenant)
+
+
+def drain(queue: WaiterQueue[AcquireRequest]) -> list[str]:
+    return [queue.pop().workflow_id for _ in range(len(queue))]
+
+
+def test_single_tenant_is_fifo():
+    queue = WaiterQueue([request("a"), request("b"), request("c")])
+    assert drain(queue) == ["a", "b", "c"]
+
+
+def test_lower_priority_value_is_served_first():
+    queue = WaiterQueue(
+        [request("batch-1", priority=5), request("interactive", priority=1)]
+    )
+    queue.push(request("batch-2", priority=5))
+    assert drain(queue) == ["interactive", "batch-1", "batch-2"]
+
+
+def test_flooding_tenant_does_not_starve_others():
+    queue = WaiterQueue([request(f"flood-{i}", tenant="flood") for i in range(10)])
+    queue.push(request("quiet", tenant="quiet"))
+    # The quiet tenant only waits behind one of the flooding tenant's requests
+    assert drain(queue)[:2] == ["flood-0", "quiet"]
+
+
+def test_tenants_share_in_proportion_to_weight():
+    queue = WaiterQueue(
+        [request(f"a-{i}", tenant="a") for i in range(6)]
+        + [request(f"b-{i}", tenant="b") for i in range(6)],
+        tenant_weights={"a": 2.0},
+    )
+    first_six = drain(queue)[:6]
+    assert sum(1 for workflow_id in first_six if workflow_id.startswith("a")) == 4
+
+
+def test_to_list_and_stats():
+    queue = WaiterQueue(
+        [
+            request("x", priority=2, tenant="t1"),
+            request("y", priority=1),
+            request("z", priority=2, tenant="t2"),
+        ]
+    )
+    assert [r.workflow_id for r in queue.to_list()] == ["y", "x", "z"]
+    assert queue.stats() == [
+        PriorityClassStats(priority=1, waiting=1, waiting_by_tenant={"": 1}),
+        PriorityClassStats(priority=2, waiting=2, waiting_by_tenant={"t1": 1, "t2": 1}),
+    ]
+    assert len(queue) == 3
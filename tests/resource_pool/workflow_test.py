@@ -1,16 +1,27 @@
 import asyncio
-from collections import defaultdict
+import uuid
+from collections import Counter, defaultdict
+from datetime import timedelta
 from typing import Any, Optional, Sequence
 
-from temporalio import activity
+from temporalio import activity, workflow
 from temporalio.client import Client, WorkflowFailureError, WorkflowHandle
 from temporalio.common import WorkflowIDConflictPolicy
 from temporalio.worker import Worker
 
+from resource_pool.pool_client import (
+    ResourcePoolClient,
+    ShardedResourcePoolClient,
+    ShardedResourcePoolWorkflow,
+)
 from resource_pool.pool_client.resource_pool_workflow import (
     ResourcePoolWorkflow,
     ResourcePoolWorkflowInput,
 )
+from resource_pool.pool_client.sharded_resource_pool_workflow import (
+    ShardedResourcePoolWorkflowInput,
+    shard_workflow_id,
+)
 from resource_pool.resource_user_workflow import (
     ResourceUserWorkflow,
     ResourceUserWorkflowInput,
@@ -118,3 +129,173 @@ async def run_all_workflows(client: Client):
             pass
 
     await resource_pool_handle.terminate()
+
+
+@workflow.defn
+class LeaseHoldingWorkflow:
+    @workflow.run
+    async def run(self, pool_workflow_id: str) -> None:
+        pool_client = ResourcePoolClient(pool_workflow_id)
+        async with pool_client.acquire_resource(lease_duration=timedelta(seconds=2)):
+            # Hold the resource until we're terminated
+            await workflow.wait_condition(lambda: False)
+
+
+async def test_resource_pool_reclaims_expired_lease(client: Client):
+    pool_workflow_id = f"resource_pool-{uuid.uuid4()}"
+
+    async with Worker(
+        client,
+        task_queue=TASK_QUEUE,
+        workflows=[ResourcePoolWorkflow, LeaseHoldingWorkflow],
+    ):
+        pool_handle = await client.start_workflow(
+            ResourcePoolWorkflow.run,
+            ResourcePoolWorkflowInput(resources={"r_a": None}, waiters=[]),
+            id=pool_workflow_id,
+            task_queue=TASK_QUEUE,
+        )
+        holder_handle = await client.start_workflow(
+            LeaseHoldingWorkflow.run,
+            pool_workflow_id,
+            id=f"lease-holder-{uuid.uuid4()}",
+            task_queue=TASK_QUEUE,
+        )
+
+        async def holder_workflow_id() -> Optional[str]:
+            holders = await pool_handle.query(ResourcePoolWorkflow.get_current_holders)
+            holder = holders["r_a"]
+            return holder.workflow_id if holder is not None else None
+
+        # The holder keeps renewing its lease, so it keeps the resource past the lease duration
+        while await holder_workflow_id() is None:
+            await asyncio.sleep(0.1)
+        await asyncio.sleep(3)
+        assert await holder_workflow_id() == holder_handle.id
+
+        # Once the holder stops renewing, the pool reclaims the resource
+        await holder_handle.terminate()
+        for _ in range(100):
+            if await holder_workflow_id() is None:
+                break
+            await asyncio.sleep(0.1)
+        assert await holder_workflow_id() is None
+
+        await pool_handle.terminate()
+
+
+@workflow.defn
+class LeaseOutlivingWorkflow:
+    @workflow.run
+    async def run(self, pool_workflow_id: str) -> None:
+        pool_client = ResourcePoolClient(pool_workflow_id)
+        resource = await pool_client.wait_for_resource(
+            max_wait_time=timedelta(minutes=1), lease_duration_seconds=1
+        )
+        # Hold the resource without renewing the lease, as if renewals were delayed
+        pool_client.held_resources[resource.release_key] = resource
+        await workflow.wait_condition(lambda: resource.lease_expired)
+
+
+async def test_resource_pool_notifies_holder_of_expired_lease(client: Client):
+    pool_workflow_id = f"resource_pool-{uuid.uuid4()}"
+
+    async with Worker(
+        client,
+        task_queue=TASK_QUEUE,
+        workflows=[ResourcePoolWorkflow, LeaseOutlivingWorkflow],
+    ):
+        pool_handle = await client.start_workflow(
+            ResourcePoolWorkflow.run,
+            ResourcePoolWorkflowInput(resources={"r_a": None}, waiters=[]),
+            id=pool_workflow_id,
+            task_queue=TASK_QUEUE,
+        )
+        # Completes once it is told the lease expired
+        await client.execute_workflow(
+            LeaseOutlivingWorkflow.run,
+            pool_workflow_id,
+            id=f"lease-outliving-{uuid.uuid4()}",
+            task_queue=TASK_QUEUE,
+            execution_timeout=timedelta(seconds=30),
+        )
+        holders = await pool_handle.query(ResourcePoolWorkflow.get_current_holders)
+        assert holders["r_a"] is None
+
+        await pool_handle.terminate()
+
+
+@workflow.defn
+class ShardedResourceUserWorkflow:
+    @workflow.run
+    async def run(self, pool_workflow_id: str) -> None:
+        pool_client = ShardedResourcePoolClient(pool_workflow_id, num_shards=4)
+        async with pool_client.acquire_resource() as acquired_resource:
+            await workflow.execute_activity(
+                "use_resource",
+                UseResourceActivityInput(acquired_resource.resource, "first"),
+                start_to_close_timeout=timedelta(seconds=10),
+            )
+
+
+async def test_sharded_resource_pool_workflow(client: Client):
+    pool_workflow_id = f"resource_pool-{uuid.uuid4()}"
+    resources = [f"r_{i}" for i in range(6)]
+
+    # key is resource, value is the number of workflows currently using it
+    in_use: defaultdict[str, int] = defaultdict(int)
+    max_in_use: defaultdict[str, int] = defaultdict(int)
+
+    @activity.defn(name="use_resource")
+    async def use_resource_mock(input: UseResourceActivityInput) -> None:
+        in_use[input.resource] += 1
+        max_in_use[input.resource] = max(
+            max_in_use[input.resource], in_use[input.resource]
+        )
+        await asyncio.sleep(0.05)
+        in_use[input.resource] -= 1
+
+    async with Worker(
+        client,
+        task_queue=TASK_QUEUE,
+        workflows=[
+            ShardedResourcePoolWorkflow,
+            ResourcePoolWorkflow,
+            ShardedResourceUserWorkflow,
+        ],
+        activities=[use_resource_mock],
+    ):
+        pool_handle = await client.start_workflow(
+            ShardedResourcePoolWorkflow.run,
+            ShardedResourcePoolWorkflowInput(num_shards=4, resources=resources),
+            id=pool_workflow_id,
+            task_queue=TASK_QUEUE,
+        )
+
+        await asyncio.gather(
+            *(
+                client.execute_workflow(
+                    ShardedResourceUserWorkflow.run,
+                    pool_workflow_id,
+                    id=f"sharded-resource-user-workflow-{i}-{uuid.uuid4()}",
+                    task_queue=TASK_QUEUE,
+                )
+                for i in range(12)
+            )
+        )
+
+        # No resource was used by more than one workflow at a time
+        assert all(count == 1 for count in max_in_use.values())
+
+        # Resources were spread evenly over the shards
+        resource_shards = await pool_handle.query(
+            ShardedResourcePoolWorkflow.get_resource_shards
+        )
+        assert sorted(resource_shards) == resources
+        assert sorted(Counter(resource_shards.values()).values()) == [1, 1, 2, 2]
+
+        await pool_handle.terminate()
+        for shard in range(4):
+            await client.get_workflow_handle(
+                shard_workflow_id(pool_workflow_id, shard)
+            ).terminate()
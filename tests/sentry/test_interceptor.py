@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import unittest.mock
 from collections import abc
@@ -22,7 +23,7 @@ from temporalio.worker.workflow_sandbox import (
 )
 
 from sentry.activity import broken_activity, working_activity
-from sentry.interceptor import SentryInterceptor
+from sentry.interceptor import SentryInterceptor, SentryReporter
 from sentry.workflow import SentryExampleWorkflow, SentryExampleWorkflowInput
 from tests.sentry.fake_sentry_transport import FakeSentryTransport
 
@@ -45,14 +46,23 @@ def sentry_init(transport: FakeSentryTransport) -> None:
 
 
 @pytest.fixture
-async def worker(client: Client) -> abc.AsyncIterator[Worker]:
+def interceptor() -> SentryInterceptor:
+    """Fixture to provide the interceptor, so tests can wait for its reports."""
+    # Refill slowly enough that no tokens come back during a test
+    return SentryInterceptor(SentryReporter(events_per_minute=1))
+
+
+@pytest.fixture
+async def worker(
+    client: Client, interceptor: SentryInterceptor
+) -> abc.AsyncIterator[Worker]:
     """Fixture to provide a worker for testing."""
     async with Worker(
         client,
         task_queue="sentry-task-queue",
         workflows=[SentryExampleWorkflow],
         activities=[broken_activity, working_activity],
-        interceptors=[SentryInterceptor()],
+        interceptors=[interceptor],
         workflow_runner=SandboxedWorkflowRunner(
             restrictions=SandboxRestrictions.default.with_passthrough_modules(
                 "sentry_sdk"
@@ -63,7 +73,10 @@ async def worker(client: Client) -> abc.AsyncIterator[Worker]:
 
 
 async def test_sentry_interceptor_reports_no_errors_when_workflow_succeeds(
-    client: Client, worker: Worker, transport: FakeSentryTransport
+    client: Client,
+    worker: Worker,
+    interceptor: SentryInterceptor,
+    transport: FakeSentryTransport,
 ) -> None:
     """Test that Sentry interceptor reports no errors when workflow succeeds."""
     # WHEN
@@ -76,13 +89,17 @@ async def test_sentry_interceptor_reports_no_errors_when_workflow_succeeds(
         )
     except Exception:
         pytest.fail("Workflow should not raise an exception")
+    interceptor.reporter.flush()
 
     # THEN
     assert len(transport.events) == 0, "No events should be captured"
 
 
 async def test_sentry_interceptor_captures_errors(
-    client: Client, worker: Worker, transport: FakeSentryTransport
+    client: Client,
+    worker: Worker,
+    interceptor: SentryInterceptor,
+    transport: FakeSentryTransport,
 ) -> None:
     """Test that errors are captured with correct Sentry metadata."""
     # WHEN
@@ -96,6 +113,7 @@ async def test_sentry_interceptor_captures_errors(
         pytest.fail("Workflow should raise an exception")
     except Exception:
         pass
+    interceptor.reporter.flush()
 
     # THEN
     # there should be two events: one for the failed activity and one for the failed workflow
@@ -162,3 +180,35 @@ async def test_sentry_interceptor_captures_errors(
         **event["contexts"]["temporal.workflow.info"]  # type: ignore
     )
     assert workflow_info.workflow_type == "SentryExampleWorkflow"
+
+
+async def test_sentry_interceptor_deduplicates_failure_storms(
+    client: Client,
+    worker: Worker,
+    interceptor: SentryInterceptor,
+    transport: FakeSentryTransport,
+) -> None:
+    """Test that many identical failures are rate limited per fingerprint."""
+    # WHEN
+    results = await asyncio.gather(
+        *(
+            client.execute_workflow(
+                SentryExampleWorkflow.run,
+                SentryExampleWorkflowInput(option="broken"),
+                id=f"sentry-workflow-id-{i}",
+                task_queue=worker.task_queue,
+            )
+            for i in range(50)
+        ),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, Exception) for result in results)
+    interceptor.reporter.flush()
+
+    # THEN
+    # only a burst of events is reported for the activity failure and for the workflow failure
+    execution_types = [
+        event["tags"]["temporal.execution_type"] for event in transport.events
+    ]
+    assert execution_types.count("activity") == interceptor.reporter.burst
+    assert execution_types.count("workflow") == interceptor.reporter.burst
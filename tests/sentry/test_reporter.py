@@ -0,0 +1,105 @@
+import sys
+import threading
+
+import pytest
+
+if sys.version_info >= (3, 14):
+    pytest.skip(
+        "Sentry does not support Python 3.14 yet.",
+        allow_module_level=True,
+    )
+
+import sentry_sdk
+
+from sentry.interceptor import SentryReporter
+from tests.sentry.fake_sentry_transport import FakeSentryTransport
+
+
+@pytest.fixture
+def transport() -> FakeSentryTransport:
+    """Fixture to provide a fake transport for Sentry SDK."""
+    transport = FakeSentryTransport()
+    sentry_sdk.init(transport=transport)
+    return transport
+
+
+def fail(message: str) -> Exception:
+    try:
+        raise ValueError(message)
+    except ValueError as e:
+        return e
+
+
+def test_reporter_rate_limits_identical_failures(
+    transport: FakeSentryTransport,
+) -> None:
+    """Test that thousands of identical failures only produce a burst of events, and only those are serialized."""
+    reporter = SentryReporter(burst=3, events_per_minute=0.001)
+    serialized = 0
+
+    def input_context() -> dict:
+        nonlocal serialized
+        serialized += 1
+        return {"payload": "x" * 10_000}
+
+    def report_failures() -> None:
+        for i in range(1000):
+            with sentry_sdk.isolation_scope() as scope:
+                scope.set_tag("temporal.execution_type", "activity")
+                reporter.report(
+                    ("activity", "my_activity", "ValueError", ("activity.py", 1)),
+                    fail(f"Failure {i}"),
+                    scope,
+                    {"temporal.activity.input": input_context},
+                )
+
+    threads = [threading.Thread(target=report_failures) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    reporter.flush()
+
+    assert len(transport.events) == 3
+    assert serialized == 3
+    for event in transport.events:
+        assert event["tags"] == {"temporal.execution_type": "activity"}
+        payload: str = event["contexts"]["temporal.activity.input"]["payload"]  # type: ignore
+        assert payload.endswith("...<truncated>")
+        assert len(payload) < 2000
+
+
+def test_reporter_reports_suppressed_count(transport: FakeSentryTransport) -> None:
+    """Test that the next reported event says how many were suppressed."""
+    reporter = SentryReporter(burst=1, events_per_minute=60)
+    fingerprint = ("workflow", "MyWorkflow", "ValueError", None)
+    with sentry_sdk.isolation_scope() as scope:
+        for _ in range(10):
+            reporter.report(fingerprint, fail("Failure"), scope, {})
+        # Let the bucket refill one token
+        reporter._buckets[fingerprint].tokens = 1
+        reporter.report(fingerprint, fail("Failure"), scope, {})
+    reporter.flush()
+
+    assert len(transport.events) == 2
+    assert "temporal.deduplication" not in transport.events[0]["contexts"]
+    assert transport.events[1]["contexts"]["temporal.deduplication"] == {
+        "suppressed_events": 9
+    }
+
+
+def test_reporter_tracks_fingerprints_separately(
+    transport: FakeSentryTransport,
+) -> None:
+    """Test that a noisy failure doesn't use up the budget of other failures."""
+    reporter = SentryReporter(burst=1, events_per_minute=0.001)
+    with sentry_sdk.isolation_scope() as scope:
+        for _ in range(100):
+            reporter.report(("activity", "noisy"), fail("Noisy"), scope, {})
+        reporter.report(("activity", "quiet"), fail("Quiet"), scope, {})
+    reporter.flush()
+
+    assert [e["exception"]["values"][0]["value"] for e in transport.events] == [
+        "Noisy",
+        "Quiet",
+    ]
@@ -0,0 +1,154 @@
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+import pytest
+
+if sys.version_info >= (3, 14):
+    pytest.skip("trio-asyncio not supported on Python 3.14+", allow_module_level=True)
+
+
+import trio_asyncio
+from temporalio import activity, workflow
+from temporalio.client import Client, WorkflowHandle
+from temporalio.runtime import MetricBuffer, Runtime, TelemetryConfig
+from temporalio.worker import Worker
+
+from trio_async.pool_metrics import PoolMetrics
+from trio_async.worker_pools import MeteredTrioExecutor, WorkerPools
+
+
+@activity.defn
+def block(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@workflow.defn
+class BurstWorkflow:
+    def __init__(self) -> None:
+        self.bursting = False
+
+    @workflow.run
+    async def run(self, count: int, seconds: float) -> None:
+        await workflow.wait_condition(lambda: self.bursting)
+        await asyncio.gather(
+            *(
+                workflow.execute_activity(
+                    block, seconds, start_to_close_timeout=timedelta(minutes=1)
+                )
+                for _ in range(count)
+            )
+        )
+
+    @workflow.signal
+    def start_burst(self) -> None:
+        self.bursting = True
+
+    @workflow.query
+    def is_bursting(self) -> bool:
+        return self.bursting
+
+
+def test_pool_metrics():
+    buffer = MetricBuffer(1000)
+    runtime = Runtime(telemetry=TelemetryConfig(metrics=buffer))
+    metrics = PoolMetrics(runtime.metric_meter, "activity", 4)
+
+    for _ in range(3):
+        metrics.submitted()
+    assert metrics.run(lambda: (metrics.running, metrics.queued)) == (1, 2)
+    metrics.done()
+    assert (metrics.running, metrics.queued, metrics.peak_running) == (0, 2, 1)
+
+    updates = {
+        update.metric.name: update.value
+        for update in buffer.retrieve_updates()
+        if update.attributes["pool"] == "activity"
+    }
+    assert updates == {
+        "executor_pool_size": 4,
+        "executor_pool_running": 0,
+        "executor_pool_queued": 2,
+    }
+
+
+async def test_activities_dont_starve_workflow_tasks(client: Client):
+    async def query_latencies(handle: WorkflowHandle) -> list[float]:
+        latencies = []
+        for _ in range(10):
+            start = time.perf_counter()
+            await handle.query(BurstWorkflow.is_bursting)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    async def measure_burst(
+        worker: Worker, activity_metrics: PoolMetrics
+    ) -> tuple[list[float], list[float], int]:
+        async with worker:
+            handle = await client.start_workflow(
+                BurstWorkflow.run,
+                args=[40, 0.5],
+                id=f"wf-{uuid.uuid4()}",
+                task_queue=worker.task_queue,
+            )
+            # Queries are answered by workflow tasks
+            idle = await query_latencies(handle)
+            await handle.signal(BurstWorkflow.start_burst)
+            while activity_metrics.running < 4:
+                await asyncio.sleep(0.01)
+            saturated = await query_latencies(handle)
+            still_running = activity_metrics.running
+            await handle.result()
+            return idle, saturated, still_running
+
+    @trio_asyncio.aio_as_trio
+    async def inside_trio(
+        client: Client,
+    ) -> list[tuple[list[float], list[float], int]]:
+        # One executor for both, smaller than their limits combined, as before
+        # WorkerPools
+        metrics = PoolMetrics(Runtime.default().metric_meter, "shared", 4)
+        with MeteredTrioExecutor(metrics) as executor:
+            shared = await measure_burst(
+                Worker(
+                    client,
+                    task_queue=f"tq-{uuid.uuid4()}",
+                    activities=[block],
+                    workflows=[BurstWorkflow],
+                    activity_executor=executor,
+                    workflow_task_executor=executor,
+                    max_concurrent_activities=4,
+                    max_concurrent_workflow_tasks=10,
+                ),
+                metrics,
+            )
+        with WorkerPools(
+            max_concurrent_activities=4, max_concurrent_workflow_tasks=10
+        ) as pools:
+            separate = await measure_burst(
+                pools.new_worker(
+                    client,
+                    task_queue=f"tq-{uuid.uuid4()}",
+                    activities=[block],
+                    workflows=[BurstWorkflow],
+                ),
+                pools.activity_metrics,
+            )
+        return [shared, separate]
+
+    if sys.version_info[:2] < (3, 12):
+        pytest.skip("Trio support requires >= 3.12")
+
+    shared, separate = trio_asyncio.run(inside_trio, client)
+
+    # Every activity thread was busy throughout, and workflow tasks waited for
+    # them with a shared executor, but took as long with separate ones
+    for idle, saturated, still_running in (shared, separate):
+        assert still_running == 4
+    idle, saturated, _ = shared
+    assert statistics.median(saturated) > 3 * statistics.median(idle) + 0.1
+    idle, saturated, _ = separate
+    assert statistics.median(saturated) < 3 * statistics.median(idle) + 0.1
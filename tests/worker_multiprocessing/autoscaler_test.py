@@ -0,0 +1,58 @@
+from worker_multiprocessing.autoscaler import Autoscaler
+from worker_multiprocessing.worker_stats import WorkerStatus
+
+
+def status(utilization: float, latency: float = 0.0) -> WorkerStatus:
+    return WorkerStatus(
+        "workflow",
+        0,
+        pid=1,
+        started_at=0.0,
+        slot_utilization=utilization,
+        schedule_to_start_latency=latency,
+    )
+
+
+def run(
+    autoscaler: Autoscaler, current: int, statuses, start: float, seconds: int
+) -> tuple[int, float]:
+    now = start
+    for now in range(int(start), int(start) + seconds):
+        autoscaler.observe(now, statuses)
+        current = autoscaler.desired(now, current)
+    return current, now + 1
+
+
+def test_scales_up_on_saturation_or_latency_and_down_when_idle():
+    autoscaler = Autoscaler("workflow", 1, 3, window=10, cooldown=10)
+
+    # Needs half a window of samples before deciding
+    current, now = run(autoscaler, 1, [status(1.0)], 0, 4)
+    assert current == 1
+    current, now = run(autoscaler, current, [status(1.0)], now, 2)
+    assert current == 2
+
+    # Tasks waiting to start scale up even if slots aren't saturated, after the cooldown
+    current, now = run(autoscaler, current, [status(0.5, latency=2.0)] * 2, now, 9)
+    assert current == 2
+    current, now = run(autoscaler, current, [status(0.5, latency=2.0)] * 2, now, 2)
+    assert current == 3
+    # Capped at the maximum
+    current, now = run(autoscaler, current, [status(1.0)] * 3, now, 60)
+    assert current == 3
+
+    # Steady load between the thresholds stays put
+    current, now = run(autoscaler, current, [status(0.5)] * 3, now, 60)
+    assert current == 3
+
+    # Idle scales down one at a time to the minimum
+    current, now = run(autoscaler, current, [status(0.1)] * 3, now, 11)
+    assert current == 2
+    current, now = run(autoscaler, current, [status(0.1)] * 2, now, 60)
+    assert current == 1
+
+
+def test_clamps_to_bounds():
+    autoscaler = Autoscaler("activity", 2, 4)
+    assert autoscaler.desired(0, 1) == 2
+    assert autoscaler.desired(0, 5) == 4
@@ -0,0 +1,29 @@
+import gc
+import pickle
+from unittest.mock import patch
+
+from temporalio.worker.workflow_sandbox import SandboxedWorkflowRunner
+
+from worker_multiprocessing.preload import PreloadedSandboxedWorkflowRunner, preload
+from worker_multiprocessing.workflows import ParallelizedWorkflow
+
+
+def test_preload_validates_once_and_freezes_heap():
+    runner = PreloadedSandboxedWorkflowRunner()
+    try:
+        with patch.object(
+            SandboxedWorkflowRunner,
+            "prepare_workflow",
+            autospec=True,
+            side_effect=SandboxedWorkflowRunner.prepare_workflow,
+        ) as prepare_workflow:
+            preload(runner, [ParallelizedWorkflow])
+            assert gc.get_freeze_count() > 0
+            # Workers constructed with the runner, e.g. in forked processes, skip validation too
+            preload(runner, [ParallelizedWorkflow])
+        assert prepare_workflow.call_count == 1
+    finally:
+        gc.unfreeze()
+
+    # Spawned processes get a copy of the runner
+    assert pickle.loads(pickle.dumps(runner))._prepared == {ParallelizedWorkflow}
@@ -0,0 +1,161 @@
+import json
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+import urllib.request
+from typing import Any
+
+import pytest
+
+from worker_multiprocessing.autoscaler import Autoscaler
+from worker_multiprocessing.supervisor import ProcessSpec, WorkerSupervisor
+from worker_multiprocessing.worker_stats import WorkerStats
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Test entries rely on fork"
+)
+
+
+def crashing_entry(spec: ProcessSpec, status_queue: Any) -> None:
+    sys.exit(1)
+
+
+def draining_entry(spec: ProcessSpec, status_queue: Any) -> None:
+    # Stands in for a worker: reports progress until SIGTERM, then exits cleanly
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    stats = WorkerStats(spec.worker_type, spec.index)
+    while not stopped.is_set():
+        stats.count("activities_completed")
+        status_queue.put(stats.snapshot())
+        stopped.wait(0.05)
+    sys.exit(0)
+
+
+def stuck_entry(spec: ProcessSpec, status_queue: Any) -> None:
+    # Stands in for a worker that doesn't shut down
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    while True:
+        time.sleep(1)
+
+
+def run_in_thread(supervisor: WorkerSupervisor) -> threading.Thread:
+    thread = threading.Thread(target=supervisor.run)
+    thread.start()
+    return thread
+
+
+def wait_for(condition, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def test_crashed_processes_restart_with_backoff():
+    supervisor = WorkerSupervisor(
+        crashing_entry,
+        [ProcessSpec("activity", 0)],
+        mp_context=multiprocessing.get_context("fork"),
+        initial_backoff=0.1,
+        max_backoff=0.4,
+    )
+    thread = run_in_thread(supervisor)
+    start = time.monotonic()
+    wait_for(lambda: supervisor.status()["totals"]["restarts"] >= 4)
+    supervisor.stop()
+    thread.join()
+
+    # Backoffs of 0.1, 0.2, 0.4 and 0.4 seconds
+    assert time.monotonic() - start >= 1.0
+    assert supervisor._supervised[0].consecutive_failures >= 4
+
+
+def test_status_endpoint_and_graceful_drain():
+    supervisor = WorkerSupervisor(
+        draining_entry,
+        [ProcessSpec("workflow", 0), ProcessSpec("activity", 0)],
+        mp_context=multiprocessing.get_context("fork"),
+        status_port=0,
+    )
+    thread = run_in_thread(supervisor)
+    wait_for(lambda: supervisor.status()["totals"]["activities_completed"] >= 10)
+
+    assert supervisor.status_url
+    with urllib.request.urlopen(supervisor.status_url) as response:
+        status = json.load(response)
+    assert status["totals"]["alive"] == 2
+    assert [p["name"] for p in status["processes"]] == [
+        "workflow-worker:0",
+        "activity-worker:0",
+    ]
+    assert status["totals"]["activities_completed_per_second"] > 0
+
+    processes = [s.process for s in supervisor._supervised]
+    supervisor.stop()
+    thread.join()
+    assert [p.exitcode for p in processes if p] == [0, 0]
+
+
+class FixedAutoscaler(Autoscaler):
+    def __init__(self, worker_type: str) -> None:
+        super().__init__(worker_type, 1, 3)
+        self.processes = 1
+
+    def desired(self, now: float, current: int) -> int:
+        return self.processes
+
+
+def test_autoscaling_adds_and_gracefully_retires_processes():
+    autoscaler = FixedAutoscaler("activity")
+    supervisor = WorkerSupervisor(
+        draining_entry,
+        [ProcessSpec("activity", 0)],
+        mp_context=multiprocessing.get_context("fork"),
+        autoscalers=[autoscaler],
+        cpus=[0],
+    )
+    thread = run_in_thread(supervisor)
+
+    autoscaler.processes = 3
+    wait_for(lambda: supervisor.status()["totals"]["alive"] == 3)
+    processes = supervisor.status()["processes"]
+    assert [p["name"] for p in processes] == [
+        "activity-worker:0",
+        "activity-worker:1",
+        "activity-worker:2",
+    ]
+    assert {p["cpu"] for p in processes} == {0}
+    retired = supervisor._supervised[2].process
+
+    autoscaler.processes = 2
+    wait_for(lambda: len(supervisor.status()["processes"]) == 2)
+    assert retired and retired.exitcode == 0
+    assert supervisor.status()["totals"]["restarts"] == 0
+
+    supervisor.stop()
+    thread.join()
+
+
+def test_retired_processes_are_killed_after_shutdown_timeout():
+    autoscaler = FixedAutoscaler("activity")
+    autoscaler.processes = 2
+    supervisor = WorkerSupervisor(
+        stuck_entry,
+        [ProcessSpec("activity", 0)],
+        mp_context=multiprocessing.get_context("fork"),
+        autoscalers=[autoscaler],
+        shutdown_timeout=0.5,
+    )
+    thread = run_in_thread(supervisor)
+    wait_for(lambda: supervisor.status()["totals"]["alive"] == 2)
+    retired = supervisor._supervised[1].process
+
+    autoscaler.processes = 1
+    wait_for(lambda: len(supervisor.status()["processes"]) == 1)
+    assert retired and retired.exitcode == -signal.SIGKILL
+
+    supervisor.stop()
+    thread.join()
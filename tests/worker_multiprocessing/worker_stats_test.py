@@ -0,0 +1,48 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any, cast
+
+from worker_multiprocessing.worker_stats import MeteredSlotSupplier, WorkerStats
+
+ctx = cast(Any, SimpleNamespace(slot_info=object()))
+unused_ctx = cast(Any, SimpleNamespace(slot_info=None))
+
+
+async def test_slot_supplier_limits_slots_and_measures_utilization():
+    slots = MeteredSlotSupplier(2)
+    first = await slots.reserve_slot(ctx)
+    await slots.reserve_slot(ctx)
+    assert slots.try_reserve_slot(ctx) is None
+
+    waiting = asyncio.create_task(slots.reserve_slot(ctx))
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+    # A reservation that is cancelled while waiting doesn't take a slot
+    cancelled = asyncio.create_task(slots.reserve_slot(ctx))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+
+    # One slot busy for the whole window, one idle
+    slots.mark_slot_used(SimpleNamespace(permit=first))  # type: ignore[arg-type]
+    slots.utilization()
+    await asyncio.sleep(0.1)
+    assert 0.45 < slots.utilization() < 0.55
+
+    # Releasing an unused slot hands it to the waiting reservation
+    slots.release_slot(unused_ctx)
+    await asyncio.wait_for(waiting, 1)
+    assert slots.try_reserve_slot(ctx) is None
+    slots.release_slot(ctx)
+    assert slots.try_reserve_slot(ctx) is not None
+
+
+def test_snapshot_averages_schedule_to_start_since_last_report():
+    stats = WorkerStats("activity", 0)
+    stats.count("activities_completed")
+    stats.record_schedule_to_start(1.0)
+    stats.record_schedule_to_start(3.0)
+
+    status = stats.snapshot()
+    assert status.activities_completed == 1
+    assert status.schedule_to_start_latency == 2.0
+    assert stats.snapshot().schedule_to_start_latency == 0.0
@@ -6,9 +6,9 @@ import sys
 import trio_asyncio
 from temporalio.client import Client
 from temporalio.envconfig import ClientConfig
-from temporalio.worker import Worker
 
 from trio_async import activities, workflows
+from trio_async.worker_pools import WorkerPools
 
 
 @trio_asyncio.aio_as_trio  # Note this decorator which allows asyncio primitives
@@ -22,12 +22,15 @@ async def main():
 
     # Temporal runs threaded activities and workflow tasks via run_in_executor.
     # Due to how trio_asyncio works, you can only do run_in_executor with their
-    # specific executor. We make sure to give it 200 max since we are using it
-    # for both activities and workflow tasks and by default the worker supports
-    # 100 max concurrent activity tasks and 100 max concurrent workflow tasks.
-    with trio_asyncio.TrioExecutor(max_workers=200) as thread_executor:
+    # specific executor. WorkerPools creates separate ones for activities and
+    # workflow tasks, sized to the max concurrent activities and workflow tasks
+    # of the worker (which default to 100 each), so slow sync activities can't
+    # starve workflow tasks of threads.
+    with WorkerPools(
+        max_concurrent_activities=100, max_concurrent_workflow_tasks=100
+    ) as pools:
         # Run a worker for the workflow
-        async with Worker(
+        async with pools.new_worker(
             client,
             task_queue="trio-async-task-queue",
             activities=[
@@ -35,8 +38,6 @@ async def main():
                 activities.say_hello_activity_sync,
             ],
             workflows=[workflows.SayHelloWorkflow],
-            activity_executor=thread_executor,
-            workflow_task_executor=thread_executor,
         ):
             # Wait until interrupted
             logging.info("Worker started, ctrl+c to exit")
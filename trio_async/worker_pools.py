@@ -0,0 +1,79 @@
+from typing import Any, Callable, Optional
+
+import trio_asyncio
+from temporalio.client import Client
+from temporalio.common import MetricMeter
+from temporalio.runtime import Runtime
+from temporalio.worker import Worker
+
+from trio_async.pool_metrics import PoolMetrics
+
+
+class MeteredTrioExecutor(trio_asyncio.TrioExecutor):
+    """A `TrioExecutor` with a thread for each of `metrics.size` calls at once, counting them in `metrics`."""
+
+    def __init__(self, metrics: PoolMetrics) -> None:
+        super().__init__(max_workers=metrics.size)
+        self.metrics = metrics
+
+    async def submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        self.metrics.submitted()
+        try:
+            return await super().submit(self.metrics.run, func, *args)
+        finally:
+            self.metrics.done()
+
+
+class WorkerPools:
+    """Separate executors for a worker's workflow tasks and sync activities, each with a thread for every task the
+    worker runs at once, so sync activities, however slow and many, never hold up workflow tasks.
+
+    Create workers with `new_worker`, and shut the executors down once they have stopped, e.g.:
+
+        with WorkerPools(max_concurrent_activities=50) as pools:
+            async with pools.new_worker(client, task_queue="my-task-queue", ...):
+                ...
+
+    Utilization of each executor is in `workflow_task_metrics` and `activity_metrics`, and recorded to `meter` (the
+    default runtime's meter if not given).
+    """
+
+    def __init__(
+        self,
+        max_concurrent_activities: int = 100,
+        max_concurrent_workflow_tasks: int = 100,
+        meter: Optional[MetricMeter] = None,
+    ) -> None:
+        meter = meter or Runtime.default().metric_meter
+        self.activity_metrics = PoolMetrics(
+            meter, "activity", max_concurrent_activities
+        )
+        self.workflow_task_metrics = PoolMetrics(
+            meter, "workflow_task", max_concurrent_workflow_tasks
+        )
+        # Due to how trio_asyncio works, run_in_executor only works with its
+        # executor
+        self.activity_executor = MeteredTrioExecutor(self.activity_metrics)
+        self.workflow_task_executor = MeteredTrioExecutor(self.workflow_task_metrics)
+
+    def new_worker(self, client: Client, **kwargs: Any) -> Worker:
+        """A worker using these executors, and running as many tasks at once as they have threads. Other arguments are
+        passed to `Worker`."""
+        return Worker(
+            client,
+            activity_executor=self.activity_executor,
+            workflow_task_executor=self.workflow_task_executor,
+            max_concurrent_activities=self.activity_metrics.size,
+            max_concurrent_workflow_tasks=self.workflow_task_metrics.size,
+            **kwargs,
+        )
+
+    def shutdown(self) -> None:
+        self.activity_executor.shutdown()
+        self.workflow_task_executor.shutdown()
+
+    def __enter__(self) -> "WorkerPools":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
@@ -0,0 +1,90 @@
+import collections
+from typing import Sequence
+
+from worker_multiprocessing.worker_stats import WorkerStatus
+
+
+class Autoscaler:
+    """Decides how many processes of `worker_type` to run, between `min_processes` and `max_processes`.
+
+    Each supervisor tick, the latest reports of the running processes are averaged into a sample of slot utilization
+    and schedule-to-start latency. Averaged over the last `window` seconds, a utilization of at least
+    `scale_up_utilization` or a latency of at least `max_schedule_to_start` adds a process, and a utilization of at most
+    `scale_down_utilization` with the latency under half the maximum removes one. After a change, nothing changes again
+    for `cooldown` seconds, and not until samples of the new set of processes span half the window.
+    """
+
+    def __init__(
+        self,
+        worker_type: str,
+        min_processes: int,
+        max_processes: int,
+        *,
+        scale_up_utilization: float = 0.8,
+        scale_down_utilization: float = 0.3,
+        max_schedule_to_start: float = 1.0,
+        window: float = 30.0,
+        cooldown: float = 30.0,
+    ) -> None:
+        if not 0 < min_processes <= max_processes:
+            raise ValueError("Expected 0 < min_processes <= max_processes")
+        self.worker_type = worker_type
+        self.min_processes = min_processes
+        self.max_processes = max_processes
+        self.scale_up_utilization = scale_up_utilization
+        self.scale_down_utilization = scale_down_utilization
+        self.max_schedule_to_start = max_schedule_to_start
+        self.window = window
+        self.cooldown = cooldown
+        # (time, utilization, schedule-to-start latency)
+        self._samples: collections.deque[tuple[float, float, float]] = (
+            collections.deque()
+        )
+        self._changed_at = float("-inf")
+
+    def observe(self, now: float, statuses: Sequence[WorkerStatus]) -> None:
+        if not statuses:
+            return
+        self._samples.append(
+            (
+                now,
+                sum(s.slot_utilization for s in statuses) / len(statuses),
+                max(s.schedule_to_start_latency for s in statuses),
+            )
+        )
+        while self._samples[0][0] < now - self.window:
+            self._samples.popleft()
+
+    def desired(self, now: float, current: int) -> int:
+        """The number of processes to run, given `current` are running."""
+        if current < self.min_processes:
+            return self.min_processes
+        if current > self.max_processes:
+            return self.max_processes
+        # Wait for enough samples to see a trend, e.g. after starting or a change
+        if (
+            now - self._changed_at < self.cooldown
+            or not self._samples
+            or now - self._samples[0][0] < self.window / 2
+        ):
+            return current
+
+        utilization = sum(s[1] for s in self._samples) / len(self._samples)
+        latency = sum(s[2] for s in self._samples) / len(self._samples)
+        desired = current
+        if (
+            utilization >= self.scale_up_utilization
+            or latency >= self.max_schedule_to_start
+        ):
+            desired = min(current + 1, self.max_processes)
+        elif (
+            utilization <= self.scale_down_utilization
+            and latency < self.max_schedule_to_start / 2
+        ):
+            desired = max(current - 1, self.min_processes)
+
+        if desired != current:
+            self._changed_at = now
+            # The samples describe load spread over the old number of processes
+            self._samples.clear()
+        return desired
@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import time
+import uuid
+
+from temporalio.client import Client
+from temporalio.envconfig import ClientConfig
+
+from worker_multiprocessing import WORKFLOW_TASK_QUEUE
+from worker_multiprocessing.workflows import ParallelizedWorkflow
+
+
+class Args(argparse.Namespace):
+    phases: list[tuple[float, float]]
+
+
+def phase(value: str) -> tuple[float, float]:
+    rate, duration = value.split(":")
+    return float(rate), float(duration)
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Start workflows in phases of different rates to exercise worker autoscaling"
+    )
+    parser.add_argument(
+        "phases",
+        nargs="*",
+        type=phase,
+        default=[(5, 60), (100, 120), (5, 120)],
+        help="phases as <workflows per second>:<seconds> (default: 5:60 100:120 5:120)",
+    )
+    args = parser.parse_args(namespace=Args())
+
+    config = ClientConfig.load_client_connect_config()
+    config.setdefault("target_host", "localhost:7233")
+    client = await Client.connect(**config)
+
+    pending: set[asyncio.Task] = set()
+    for rate, duration in args.phases:
+        print(f"starting {rate:g} workflow(s) per second for {duration:g}s")
+        started = 0
+        phase_start = time.monotonic()
+        while (elapsed := time.monotonic() - phase_start) < duration:
+            # Start however many workflows are due, so the rate holds even if starting is slow
+            while started < rate * elapsed:
+                task = asyncio.create_task(
+                    client.execute_workflow(
+                        ParallelizedWorkflow.run,
+                        id=f"load-workflow-id-{uuid.uuid4()}",
+                        task_queue=WORKFLOW_TASK_QUEUE,
+                    )
+                )
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                started += 1
+            await asyncio.sleep(0.01)
+        print(f"started {started} workflow(s), {len(pending)} still running")
+
+    await asyncio.gather(*pending)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+import asyncio
+import gc
+from dataclasses import dataclass, field
+from typing import Sequence
+
+import temporalio.workflow
+from temporalio.worker.workflow_sandbox import SandboxedWorkflowRunner
+
+
+@dataclass(frozen=True)
+class PreloadedSandboxedWorkflowRunner(SandboxedWorkflowRunner):
+    """Sandboxed runner that doesn't validate a workflow again once it has validated it.
+
+    Workers validate each of their workflows in the sandbox when constructed. Validating with this runner before
+    forking worker processes that use it means each process skips that.
+
+    This relies on SDK internals, `SandboxedWorkflowRunner.prepare_workflow` and `temporalio.workflow._Definition`,
+    which may change in any SDK release. Check it still works when upgrading the SDK, or pass `--no-preload`.
+    """
+
+    _prepared: set[type] = field(default_factory=set, init=False, compare=False)
+
+    def prepare_workflow(self, defn: temporalio.workflow._Definition) -> None:
+        if defn.cls in self._prepared:
+            return
+        super().prepare_workflow(defn)
+        self._prepared.add(defn.cls)
+
+
+def preload(
+    runner: PreloadedSandboxedWorkflowRunner, workflows: Sequence[type]
+) -> None:
+    """Validate `workflows` in `runner`'s sandbox and freeze everything loaded so far, so processes forked afterwards
+    share it with this one copy-on-write.
+
+    Garbage collection writes to the objects it tracks, which copies the memory pages holding them into every child that
+    collects. Frozen objects are left alone, so call `gc.disable()` before importing and loading as much as possible, and
+    `gc.enable()` again afterwards, here and in each child.
+    """
+
+    async def prepare() -> None:
+        # Validation creates a workflow instance, which needs a running event loop
+        for workflow in workflows:
+            runner.prepare_workflow(
+                temporalio.workflow._Definition.must_from_class(workflow)
+            )
+
+    asyncio.run(prepare())
+    gc.freeze()
@@ -0,0 +1,90 @@
+import argparse
+import functools
+import gc
+import multiprocessing
+import threading
+import time
+
+from worker_multiprocessing.preload import preload
+from worker_multiprocessing.supervisor import ProcessSpec, WorkerSupervisor
+from worker_multiprocessing.worker import worker_entry, workflow_runner
+from worker_multiprocessing.workflows import ParallelizedWorkflow
+
+
+class Args(argparse.Namespace):
+    num_workers: int
+    no_preload: bool
+    timeout: float
+
+
+def memory_mb(pid: int) -> dict[str, float]:
+    """RSS of `pid`, split into pages shared with other processes and its own, and its proportional share (PSS)."""
+    fields: dict[str, float] = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "shared": fields["Shared_Clean"] + fields["Shared_Dirty"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def main():
+    gc.disable()
+    parser = argparse.ArgumentParser(
+        description="Measure how long workflow worker processes take to start polling and how much memory they share"
+    )
+    parser.add_argument("-n", "--num-workers", type=int, default=4)
+    parser.add_argument("--no-preload", action="store_true")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args(namespace=Args())
+
+    runner = workflow_runner()
+    if not args.no_preload:
+        preload(runner, [ParallelizedWorkflow])
+    gc.enable()
+
+    supervisor = WorkerSupervisor(
+        functools.partial(worker_entry, runner),
+        [ProcessSpec("workflow", i) for i in range(args.num_workers)],
+        mp_context=multiprocessing.get_context("fork"),
+    )
+    thread = threading.Thread(target=supervisor.run)
+    thread.start()
+    try:
+        deadline = time.monotonic() + args.timeout
+        while any(
+            p["startup_seconds"] is None for p in supervisor.status()["processes"]
+        ):
+            if time.monotonic() > deadline:
+                raise RuntimeError("Timed out waiting for workers to poll")
+            time.sleep(0.1)
+
+        print(f"preload: {not args.no_preload}")
+        print(
+            f"{'process':<20} {'first poll':>10} {'rss':>8} {'pss':>8} {'shared':>8} {'private':>8}"
+        )
+        totals = {"rss": 0.0, "pss": 0.0, "shared": 0.0, "private": 0.0}
+        for process in supervisor.status()["processes"]:
+            memory = memory_mb(process["pid"])
+            for key in totals:
+                totals[key] += memory[key]
+            print(
+                f"{process['name']:<20} {process['startup_seconds']:>9.3f}s "
+                + " ".join(f"{memory[key]:>6.1f}MB" for key in totals)
+            )
+        print(
+            f"{'total':<20} {'':>10} "
+            + " ".join(f"{totals[key]:>6.1f}MB" for key in totals)
+        )
+    finally:
+        supervisor.stop()
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+import collections
+import dataclasses
+import http.server
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable, Optional, Sequence
+
+from worker_multiprocessing.autoscaler import Autoscaler
+from worker_multiprocessing.worker_stats import WorkerStatus
+
+_COUNTERS = (
+    "activities_completed",
+    "activities_failed",
+    "workflows_completed",
+    "workflows_failed",
+)
+
+
+@dataclass(frozen=True)
+class ProcessSpec:
+    """A worker process the supervisor keeps running, optionally pinned to CPU core `cpu`."""
+
+    worker_type: str
+    index: int
+    cpu: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.worker_type}-worker:{self.index}"
+
+
+# Called in the child process with its spec and the queue to put WorkerStatus reports on. It should return when the
+# process receives SIGTERM, after shutting its worker down gracefully.
+WorkerEntry = Callable[[ProcessSpec, Any], None]
+
+
+def _child_main(entry: WorkerEntry, spec: ProcessSpec, status_queue: Any) -> None:
+    # Forked children inherit the supervisor's signal handlers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    if spec.cpu is not None:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, {spec.cpu})
+        else:
+            print(f"{spec.name} cannot be pinned to a CPU on this platform")
+    entry(spec, status_queue)
+
+
+class _Supervised:
+    def __init__(self, spec: ProcessSpec) -> None:
+        self.spec = spec
+        self.process: Optional[BaseProcess] = None
+        self.started_at = 0.0
+        # Wall clock time, to compare with times the process reports
+        self.spawned_at = 0.0
+        self.start_at = 0.0
+        self.restarts = 0
+        self.consecutive_failures = 0
+        # Being shut down because of scaling down, so it is removed rather than restarted once it exits
+        self.retiring = False
+        # Monotonic time by which a retiring process must have exited before it is killed
+        self.retire_deadline = 0.0
+        self.status: Optional[WorkerStatus] = None
+        self.previous_status: Optional[WorkerStatus] = None
+
+    def rates(self) -> dict[str, float]:
+        current, previous = self.status, self.previous_status
+        if current is None or previous is None:
+            return {f"{counter}_per_second": 0.0 for counter in _COUNTERS}
+        elapsed = max(current.reported_at - previous.reported_at, 1e-9)
+        return {
+            f"{counter}_per_second": (
+                getattr(current, counter) - getattr(previous, counter)
+            )
+            / elapsed
+            for counter in _COUNTERS
+        }
+
+
+class WorkerSupervisor:
+    """Runs a process per spec and keeps it running.
+
+    Processes that exit are restarted after a backoff that doubles from `initial_backoff` up to `max_backoff` with each
+    consecutive failure. A process that ran for `stable_after` seconds before exiting starts over at `initial_backoff`.
+    On SIGTERM or SIGINT, every process is sent SIGTERM to shut its worker down gracefully and is killed if it hasn't
+    exited within `shutdown_timeout`.
+
+    If there is an `Autoscaler` for a worker type, processes of that type are added and gracefully removed to keep the
+    number it decides on running. New processes are pinned to whichever of `cpus` (if given) has the fewest processes.
+
+    Processes report `WorkerStatus` on a queue; if `status_port` is set, the latest health and throughput of every
+    process and their totals are served as JSON at `http://<status_host>:<status_port>/status`.
+    """
+
+    def __init__(
+        self,
+        entry: WorkerEntry,
+        specs: Sequence[ProcessSpec],
+        *,
+        mp_context: Optional[BaseContext] = None,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        stable_after: float = 60.0,
+        shutdown_timeout: float = 30.0,
+        status_host: str = "127.0.0.1",
+        status_port: Optional[int] = None,
+        autoscalers: Sequence[Autoscaler] = (),
+        cpus: Optional[Sequence[int]] = None,
+    ) -> None:
+        self.entry = entry
+        self.mp_context = mp_context or multiprocessing.get_context()
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.shutdown_timeout = shutdown_timeout
+        self.status_host = status_host
+        self.status_port = status_port
+        self.autoscalers = list(autoscalers)
+        self.cpus = list(cpus) if cpus else None
+        self._supervised: list[_Supervised] = []
+        for spec in specs:
+            self._supervised.append(_Supervised(self._with_cpu(spec)))
+        self._status_queue = self.mp_context.Queue(1000)
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._status_server: Optional[http.server.ThreadingHTTPServer] = None
+
+    def run(self) -> None:
+        """Supervise the processes until stopped, then drain them."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
+            signal.signal(signal.SIGINT, lambda *_: self.stop())
+        if self.status_port is not None:
+            self._start_status_server()
+        try:
+            while not self._stopping.is_set():
+                self._supervise()
+                self._autoscale()
+                self._receive_statuses(timeout=0.5)
+            self._drain()
+        finally:
+            if self._status_server:
+                self._status_server.shutdown()
+                self._status_server.server_close()
+
+    def stop(self) -> None:
+        """Stop restarting processes and drain them. Safe to call from signal handlers and other threads."""
+        self._stopping.set()
+
+    @property
+    def status_url(self) -> Optional[str]:
+        if self._status_server is None:
+            return None
+        return f"http://{self.status_host}:{self._status_server.server_port}/status"
+
+    def status(self) -> dict[str, Any]:
+        now = time.monotonic()
+        processes = []
+        with self._lock:
+            for supervised in self._supervised:
+                process = supervised.process
+                status = supervised.status
+                processes.append(
+                    {
+                        "name": supervised.spec.name,
+                        "worker_type": supervised.spec.worker_type,
+                        "index": supervised.spec.index,
+                        "cpu": supervised.spec.cpu,
+                        "pid": process.pid if process else None,
+                        "alive": bool(process and process.is_alive()),
+                        "restarts": supervised.restarts,
+                        "retiring": supervised.retiring,
+                        "uptime_seconds": now - supervised.started_at
+                        if process
+                        else 0.0,
+                        # Time to first poll, including starting the process and connecting the client
+                        "startup_seconds": status.first_poll_at - supervised.spawned_at
+                        if status and status.first_poll_at
+                        else None,
+                        "last_report_age_seconds": time.time() - status.reported_at
+                        if status
+                        else None,
+                        **{
+                            counter: getattr(status, counter) if status else 0
+                            for counter in _COUNTERS
+                        },
+                        "slot_utilization": status.slot_utilization if status else 0.0,
+                        "schedule_to_start_latency": status.schedule_to_start_latency
+                        if status
+                        else 0.0,
+                        **supervised.rates(),
+                    }
+                )
+        totals: dict[str, Any] = {
+            "processes": len(processes),
+            "alive": sum(p["alive"] for p in processes),
+            "restarts": sum(p["restarts"] for p in processes),
+        }
+        for counter in _COUNTERS:
+            totals[counter] = sum(p[counter] for p in processes)
+            totals[f"{counter}_per_second"] = sum(
+                p[f"{counter}_per_second"] for p in processes
+            )
+        return {
+            "draining": self._stopping.is_set(),
+            "processes": processes,
+            "totals": totals,
+        }
+
+    def _start(self, supervised: _Supervised) -> None:
+        spawned_at = time.time()
+        process = self.mp_context.Process(  # type: ignore[attr-defined]
+            target=_child_main,
+            args=(self.entry, supervised.spec, self._status_queue),
+            name=supervised.spec.name,
+        )
+        process.start()
+        with self._lock:
+            supervised.process = process
+            supervised.started_at = time.monotonic()
+            supervised.spawned_at = spawned_at
+
+    def _supervise(self) -> None:
+        now = time.monotonic()
+        for supervised in list(self._supervised):
+            process = supervised.process
+            if supervised.retiring:
+                if process is not None and process.is_alive():
+                    if now < supervised.retire_deadline:
+                        continue
+                    print(f"{process.name} did not shut down in time, killing it")
+                    process.kill()
+                    process.join()
+                print(f"{supervised.spec.name} retired")
+                with self._lock:
+                    self._supervised.remove(supervised)
+                continue
+            if process is not None:
+                if process.is_alive():
+                    continue
+                if now - supervised.started_at >= self.stable_after:
+                    supervised.consecutive_failures = 0
+                backoff = min(
+                    self.max_backoff,
+                    self.initial_backoff * 2**supervised.consecutive_failures,
+                )
+                print(
+                    f"ERROR: {supervised.spec.name} (pid {process.pid}) exited unexpectedly "
+                    f"with code {process.exitcode}, restarting in {backoff:.1f}s"
+                )
+                with self._lock:
+                    supervised.process = None
+                    supervised.status = supervised.previous_status = None
+                    supervised.restarts += 1
+                supervised.consecutive_failures += 1
+                supervised.start_at = now + backoff
+            if supervised.start_at <= now:
+                self._start(supervised)
+
+    def _autoscale(self) -> None:
+        now = time.monotonic()
+        for autoscaler in self.autoscalers:
+            active = [
+                s
+                for s in self._supervised
+                if s.spec.worker_type == autoscaler.worker_type and not s.retiring
+            ]
+            autoscaler.observe(now, [s.status for s in active if s.status])
+            desired = autoscaler.desired(now, len(active))
+            if desired > len(active):
+                print(
+                    f"scaling {autoscaler.worker_type} workers up from {len(active)} to {desired}"
+                )
+                for _ in range(desired - len(active)):
+                    self._add(autoscaler.worker_type)
+            elif desired < len(active):
+                print(
+                    f"scaling {autoscaler.worker_type} workers down from {len(active)} to {desired}"
+                )
+                # Retire the newest processes first
+                for supervised in sorted(active, key=lambda s: s.spec.index)[desired:]:
+                    self._retire(supervised)
+
+    def _add(self, worker_type: str) -> None:
+        used = {
+            s.spec.index for s in self._supervised if s.spec.worker_type == worker_type
+        }
+        index = next(i for i in range(len(used) + 1) if i not in used)
+        supervised = _Supervised(self._with_cpu(ProcessSpec(worker_type, index)))
+        with self._lock:
+            self._supervised.append(supervised)
+        self._start(supervised)
+
+    def _retire(self, supervised: _Supervised) -> None:
+        supervised.retiring = True
+        supervised.retire_deadline = time.monotonic() + self.shutdown_timeout
+        # SIGTERM shuts the worker down gracefully, and _supervise removes the process once it exits, killing it if it
+        # hasn't within shutdown_timeout
+        if supervised.process and supervised.process.is_alive():
+            supervised.process.terminate()
+
+    def _with_cpu(self, spec: ProcessSpec) -> ProcessSpec:
+        if not self.cpus or spec.cpu is not None:
+            return spec
+        assigned = collections.Counter(
+            s.spec.cpu for s in self._supervised if not s.retiring
+        )
+        cpu = min(self.cpus, key=lambda cpu: assigned[cpu])
+        return dataclasses.replace(spec, cpu=cpu)
+
+    def _receive_statuses(self, timeout: float) -> None:
+        try:
+            status = self._status_queue.get(timeout=timeout)
+            while True:
+                self._record_status(status)
+                status = self._status_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _record_status(self, status: WorkerStatus) -> None:
+        with self._lock:
+            for supervised in self._supervised:
+                process = supervised.process
+                # Ignore reports a previous process for the spec sent before exiting
+                if process and process.pid == status.pid:
+                    supervised.previous_status = supervised.status
+                    supervised.status = status
+                    return
+
+    def _drain(self) -> None:
+        processes = [
+            s.process for s in self._supervised if s.process and s.process.is_alive()
+        ]
+        print(f"draining {len(processes)} worker process(es)")
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"{process.name} did not shut down in time, killing it")
+                process.kill()
+                process.join()
+
+    def _start_status_server(self) -> None:
+        # The server instantiates the handler per request, so bind the supervisor to a subclass
+        handler = type(
+            "_BoundStatusRequestHandler", (_StatusRequestHandler,), {"supervisor": self}
+        )
+        self._status_server = http.server.ThreadingHTTPServer(
+            (self.status_host, self.status_port or 0), handler
+        )
+        threading.Thread(
+            target=self._status_server.serve_forever,
+            name="worker-status-server",
+            daemon=True,
+        ).start()
+        print(f"serving worker status at {self.status_url}")
+
+
+class _StatusRequestHandler(http.server.BaseHTTPRequestHandler):
+    # Set on the subclass created by WorkerSupervisor._start_status_server
+    supervisor: WorkerSupervisor
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") != "/status":
+            self.send_error(404)
+            return
+        body = json.dumps(self.supervisor.status()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Don't log every poll of the endpoint
+        pass
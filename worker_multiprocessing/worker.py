@@ -1,22 +1,36 @@
 import argparse
 import asyncio
-import concurrent.futures
 import dataclasses
+import functools
+import gc
 import multiprocessing
-import traceback
-from typing import Literal
+import os
+import signal
+from typing import Any, Optional
 
 from temporalio.client import Client
 from temporalio.envconfig import ClientConfig
 from temporalio.runtime import Runtime, TelemetryConfig
-from temporalio.worker import PollerBehaviorSimpleMaximum, Worker
-from temporalio.worker.workflow_sandbox import (
-    SandboxedWorkflowRunner,
-    SandboxRestrictions,
+from temporalio.worker import (
+    CustomSlotSupplier,
+    FixedSizeSlotSupplier,
+    PollerBehaviorSimpleMaximum,
+    Worker,
+    WorkerTuner,
 )
+from temporalio.worker.workflow_sandbox import SandboxRestrictions
 
 from worker_multiprocessing import ACTIVITY_TASK_QUEUE, WORKFLOW_TASK_QUEUE
 from worker_multiprocessing.activities import echo_pid_activity
+from worker_multiprocessing.autoscaler import Autoscaler
+from worker_multiprocessing.preload import PreloadedSandboxedWorkflowRunner, preload
+from worker_multiprocessing.supervisor import ProcessSpec, WorkerSupervisor
+from worker_multiprocessing.worker_stats import (
+    MeteredSlotSupplier,
+    StatsInterceptor,
+    WorkerStats,
+    report_stats,
+)
 from worker_multiprocessing.workflows import ParallelizedWorkflow
 
 # Immediately prevent the default Runtime from being created to ensure
@@ -27,6 +41,12 @@ Runtime.prevent_default()
 class Args(argparse.Namespace):
     num_workflow_workers: int
     num_activity_workers: int
+    max_workflow_workers: Optional[int]
+    max_activity_workers: Optional[int]
+    pin_cpus: bool
+    status_port: int
+    max_restart_backoff: float
+    no_preload: bool
 
     @property
     def total_workers(self) -> int:
@@ -34,9 +54,45 @@ class Args(argparse.Namespace):
 
 
 def main():
+    # Collecting garbage leaves holes in the memory forked processes share, so hold
+    # off until everything worker processes share is loaded and frozen
+    gc.disable()
+
     parser = argparse.ArgumentParser()
     parser.add_argument("-w", "--num-workflow-workers", type=int, default=2)
     parser.add_argument("-a", "--num-activity-workers", type=int, default=1)
+    parser.add_argument(
+        "--max-workflow-workers",
+        type=int,
+        help="scale workflow workers between --num-workflow-workers and this by load",
+    )
+    parser.add_argument(
+        "--max-activity-workers",
+        type=int,
+        help="scale activity workers between --num-activity-workers and this by load",
+    )
+    parser.add_argument(
+        "--pin-cpus",
+        action="store_true",
+        help="pin each worker process to its own CPU core (Linux only)",
+    )
+    parser.add_argument(
+        "--status-port",
+        type=int,
+        default=8000,
+        help="port to serve worker process status on, 0 to pick a free port",
+    )
+    parser.add_argument(
+        "--max-restart-backoff",
+        type=float,
+        default=60.0,
+        help="maximum seconds to wait before restarting a crashed worker process",
+    )
+    parser.add_argument(
+        "--no-preload",
+        action="store_true",
+        help="validate workflows in each worker process rather than once before forking",
+    )
     args = parser.parse_args(namespace=Args())
     print(
         f"starting {args.num_workflow_workers} workflow worker(s) and {args.num_activity_workers} activity worker(s)"
@@ -50,38 +106,56 @@ def main():
     except ValueError:
         mp_ctx = multiprocessing.get_context("spawn")  # type: ignore
 
-    with concurrent.futures.ProcessPoolExecutor(
-        args.total_workers, mp_context=mp_ctx
-    ) as executor:
-        # Start workflow workers by submitting them to the
-        # ProcessPoolExecutor
-        worker_futures = [
-            executor.submit(worker_entry, "workflow", i)
-            for i in range(args.num_workflow_workers)
-        ]
-
-        # In this sample, we start activity workers as separate processes in the
-        # same way we do workflow workers. In production, activity workers
-        # are often deployed separately from workflow workers to account for
-        # differing scaling characteristics.
-        worker_futures.extend(
-            [
-                executor.submit(worker_entry, "activity", i)
-                for i in range(args.num_activity_workers)
-            ]
+    # In this sample, we start activity workers as separate processes in the
+    # same way we do workflow workers. In production, activity workers
+    # are often deployed separately from workflow workers to account for
+    # differing scaling characteristics.
+    specs = [ProcessSpec("workflow", i) for i in range(args.num_workflow_workers)] + [
+        ProcessSpec("activity", i) for i in range(args.num_activity_workers)
+    ]
+    # Each process carries its own Runtime and sandbox, so only run more than the
+    # minimum while their task slots are saturated or tasks wait to start
+    autoscalers = []
+    if args.max_workflow_workers:
+        autoscalers.append(
+            Autoscaler("workflow", args.num_workflow_workers, args.max_workflow_workers)
+        )
+    if args.max_activity_workers:
+        autoscalers.append(
+            Autoscaler("activity", args.num_activity_workers, args.max_activity_workers)
         )
 
-        try:
-            print("waiting for keyboard interrupt or for all workers to exit")
-            for worker in concurrent.futures.as_completed(worker_futures):
-                print("ERROR: worker exited unexpectedly")
-                if worker.exception():
-                    traceback.print_exception(worker.exception())
-        except KeyboardInterrupt:
-            pass
+    # Validate workflows once here, rather than in every worker process after fork.
+    # With spawn, children re-import everything, so only the runner is shared.
+    runner = workflow_runner()
+    if not args.no_preload:
+        preload(runner, [ParallelizedWorkflow])
+    gc.enable()
+
+    supervisor = WorkerSupervisor(
+        functools.partial(worker_entry, runner),
+        specs,
+        mp_context=mp_ctx,
+        max_backoff=args.max_restart_backoff,
+        status_port=args.status_port,
+        autoscalers=autoscalers,
+        cpus=available_cpus() if args.pin_cpus else None,
+    )
+    print("waiting for SIGTERM or keyboard interrupt")
+    supervisor.run()
+
 
+def available_cpus() -> list[int]:
+    # sched_getaffinity is only available on some platforms, e.g. not macOS
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
 
-def worker_entry(worker_type: Literal["workflow", "activity"], id: int):
+
+def worker_entry(
+    runner: PreloadedSandboxedWorkflowRunner, spec: ProcessSpec, status_queue: Any
+):
+    gc.enable()
     Runtime.set_default(Runtime(telemetry=TelemetryConfig()))
 
     async def run_worker():
@@ -89,22 +163,55 @@ def worker_entry(worker_type: Literal["workflow", "activity"], id: int):
         config.setdefault("target_host", "localhost:7233")
         client = await Client.connect(**config)
 
-        if worker_type == "workflow":
-            worker = workflow_worker(client)
+        if spec.worker_type == "workflow":
+            # Workflow tasks are CPU bound, but generally execute quickly.
+            # Because we're leveraging multiprocessing to achieve parallelism,
+            # we want each workflow worker to be confirgured for small workflow
+            # task processing.
+            slots = MeteredSlotSupplier(2)
+            stats = WorkerStats(spec.worker_type, spec.index, slots)
+            worker = workflow_worker(client, stats, slots, runner)
         else:
-            worker = activity_worker(client)
+            slots = MeteredSlotSupplier(100)
+            stats = WorkerStats(spec.worker_type, spec.index, slots)
+            worker = activity_worker(client, stats, slots)
+
+        # The supervisor sends SIGTERM to drain, and a keyboard interrupt reaches every process in the group
+        shutdown_requested = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, shutdown_requested.set)
+            except NotImplementedError:
+                # Windows event loops don't support signal handlers
+                signal.signal(
+                    sig,
+                    lambda *_: loop.call_soon_threadsafe(shutdown_requested.set),
+                )
 
-        try:
-            print(f"{worker_type}-worker:{id} starting")
-            await asyncio.shield(worker.run())
-        except asyncio.CancelledError:
-            print(f"{worker_type}-worker:{id} shutting down")
+        reporter = asyncio.create_task(report_stats(stats, status_queue))
+        run = asyncio.create_task(worker.run())
+        print(f"{spec.name} starting")
+        await asyncio.wait(
+            [run, asyncio.create_task(shutdown_requested.wait())],
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        if not run.done():
+            print(f"{spec.name} shutting down")
             await worker.shutdown()
+        reporter.cancel()
+        # Raises if the worker failed, so the supervisor restarts the process
+        await run
 
     asyncio.run(run_worker())
 
 
-def workflow_worker(client: Client) -> Worker:
+def workflow_worker(
+    client: Client,
+    stats: WorkerStats,
+    slots: MeteredSlotSupplier,
+    runner: PreloadedSandboxedWorkflowRunner,
+) -> Worker:
     """
     Create a workflow worker that is configured to leverage being run
     as many child processes.
@@ -113,25 +220,29 @@ def workflow_worker(client: Client) -> Worker:
         client,
         task_queue=WORKFLOW_TASK_QUEUE,
         workflows=[ParallelizedWorkflow],
-        # Workflow tasks are CPU bound, but generally execute quickly.
-        # Because we're leveraging multiprocessing to achieve parallelism,
-        # we want each workflow worker to be confirgured for small workflow
-        # task processing.
-        max_concurrent_workflow_tasks=2,
+        interceptors=[StatsInterceptor(stats)],
+        # Slots measure their utilization so the supervisor can scale on it
+        tuner=slot_tuner(workflow_slots=slots),
         workflow_task_poller_behavior=PollerBehaviorSimpleMaximum(2),
-        # Allow workflows to access the os module to access the pid
-        workflow_runner=SandboxedWorkflowRunner(
-            restrictions=dataclasses.replace(
-                SandboxRestrictions.default,
-                invalid_module_members=SandboxRestrictions.invalid_module_members_default.with_child_unrestricted(
-                    "os"
-                ),
-            )
-        ),
+        workflow_runner=runner,
+    )
+
+
+def workflow_runner() -> PreloadedSandboxedWorkflowRunner:
+    # Allow workflows to access the os module to access the pid
+    return PreloadedSandboxedWorkflowRunner(
+        restrictions=dataclasses.replace(
+            SandboxRestrictions.default,
+            invalid_module_members=SandboxRestrictions.invalid_module_members_default.with_child_unrestricted(
+                "os"
+            ),
+        )
     )
 
 
-def activity_worker(client: Client) -> Worker:
+def activity_worker(
+    client: Client, stats: WorkerStats, slots: MeteredSlotSupplier
+) -> Worker:
     """
     Create a basic activity worker
     """
@@ -139,6 +250,23 @@ def activity_worker(client: Client) -> Worker:
         client,
         task_queue=ACTIVITY_TASK_QUEUE,
         activities=[echo_pid_activity],
+        interceptors=[StatsInterceptor(stats)],
+        tuner=slot_tuner(activity_slots=slots),
+    )
+
+
+def slot_tuner(
+    workflow_slots: Optional[CustomSlotSupplier] = None,
+    activity_slots: Optional[CustomSlotSupplier] = None,
+) -> WorkerTuner:
+    """
+    Tuner using the given slot suppliers, and 100 slots for everything else
+    """
+    return WorkerTuner.create_composite(
+        workflow_supplier=workflow_slots or FixedSizeSlotSupplier(100),
+        activity_supplier=activity_slots or FixedSizeSlotSupplier(100),
+        local_activity_supplier=FixedSizeSlotSupplier(100),
+        nexus_supplier=FixedSizeSlotSupplier(100),
     )
 
 
@@ -0,0 +1,263 @@
+import asyncio
+import collections
+import dataclasses
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional, Type
+
+from temporalio import activity, workflow
+from temporalio.worker import (
+    ActivityInboundInterceptor,
+    CustomSlotSupplier,
+    ExecuteActivityInput,
+    ExecuteWorkflowInput,
+    Interceptor,
+    SlotMarkUsedContext,
+    SlotPermit,
+    SlotReleaseContext,
+    SlotReserveContext,
+    WorkflowInboundInterceptor,
+    WorkflowInterceptorClassInput,
+)
+
+
+@dataclass
+class WorkerStatus:
+    """Health and throughput counters of a worker process, sent to the supervisor periodically.
+
+    Counters are totals since the process started, so the supervisor derives rates from consecutive reports.
+    """
+
+    worker_type: str
+    index: int
+    pid: int
+    started_at: float
+    reported_at: float = 0.0
+    activities_completed: int = 0
+    activities_failed: int = 0
+    workflows_completed: int = 0
+    workflows_failed: int = 0
+    # When the worker first reserved a slot to poll with
+    first_poll_at: Optional[float] = None
+    # Averages since the previous report
+    slot_utilization: float = 0.0
+    schedule_to_start_latency: float = 0.0
+
+
+class _Waiter:
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.future: asyncio.Future[None] = loop.create_future()
+        self.granted = False
+
+
+class MeteredSlotSupplier(CustomSlotSupplier):
+    """Fixed number of task slots that measures how many of them are in use over time.
+
+    Core may release slots from other threads than the event loop reserving them, so state is locked and waiting
+    reservations are woken through their loop.
+    """
+
+    def __init__(self, num_slots: int) -> None:
+        self.num_slots = num_slots
+        self._lock = threading.Lock()
+        self._reserved = 0
+        self._used = 0
+        self._waiters: collections.deque[_Waiter] = collections.deque()
+        self._used_seconds = 0.0
+        self._changed_at = self._window_start = time.monotonic()
+        self.first_reserved_at: Optional[float] = None
+
+    async def reserve_slot(self, ctx: SlotReserveContext) -> SlotPermit:
+        with self._lock:
+            if self.first_reserved_at is None:
+                # Core reserves a slot right before each poll
+                self.first_reserved_at = time.time()
+            if self._reserved < self.num_slots:
+                self._reserved += 1
+                return SlotPermit()
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    # Pass on the slot released to us
+                    self._release_reservation()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+        return SlotPermit()
+
+    def try_reserve_slot(self, ctx: SlotReserveContext) -> Optional[SlotPermit]:
+        with self._lock:
+            if self._reserved >= self.num_slots:
+                return None
+            self._reserved += 1
+            return SlotPermit()
+
+    def mark_slot_used(self, ctx: SlotMarkUsedContext) -> None:
+        with self._lock:
+            self._set_used(self._used + 1)
+
+    def release_slot(self, ctx: SlotReleaseContext) -> None:
+        with self._lock:
+            if ctx.slot_info is not None:
+                self._set_used(self._used - 1)
+            self._release_reservation()
+
+    def utilization(self) -> float:
+        """Average fraction of slots in use since the previous call."""
+        with self._lock:
+            self._set_used(self._used)
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            utilization = (
+                self._used_seconds / (elapsed * self.num_slots) if elapsed > 0 else 0.0
+            )
+            self._used_seconds = 0.0
+            self._window_start = now
+            return utilization
+
+    def _set_used(self, used: int) -> None:
+        now = time.monotonic()
+        self._used_seconds += self._used * (now - self._changed_at)
+        self._changed_at = now
+        self._used = used
+
+    def _release_reservation(self) -> None:
+        if not self._waiters:
+            self._reserved -= 1
+            return
+        # Hand the slot straight to the longest waiting reservation
+        waiter = self._waiters.popleft()
+        waiter.granted = True
+        waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+
+
+def _wake(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class WorkerStats:
+    """Counts the work done by this process. Workflows run on the workflow task thread pool, so updates are locked.
+
+    If the worker's slots are a `MeteredSlotSupplier` passed as `slots`, their utilization is reported too.
+    """
+
+    def __init__(
+        self,
+        worker_type: str,
+        index: int,
+        slots: Optional[MeteredSlotSupplier] = None,
+    ) -> None:
+        self.slots = slots
+        self._status = WorkerStatus(worker_type, index, os.getpid(), time.time())
+        self._lock = threading.Lock()
+        self._schedule_to_start_total = 0.0
+        self._schedule_to_start_count = 0
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self._status, counter, getattr(self._status, counter) + 1)
+
+    def record_schedule_to_start(self, seconds: float) -> None:
+        with self._lock:
+            self._schedule_to_start_total += seconds
+            self._schedule_to_start_count += 1
+
+    def snapshot(self) -> WorkerStatus:
+        """The current status. Averages are reset, so this should only be called to report the status."""
+        with self._lock:
+            status = dataclasses.replace(
+                self._status,
+                reported_at=time.time(),
+                first_poll_at=self.slots.first_reserved_at if self.slots else None,
+                slot_utilization=self.slots.utilization() if self.slots else 0.0,
+                schedule_to_start_latency=self._schedule_to_start_total
+                / self._schedule_to_start_count
+                if self._schedule_to_start_count
+                else 0.0,
+            )
+            self._schedule_to_start_total = 0.0
+            self._schedule_to_start_count = 0
+            return status
+
+
+class _StatsActivityInboundInterceptor(ActivityInboundInterceptor):
+    def __init__(self, next: ActivityInboundInterceptor, stats: WorkerStats) -> None:
+        super().__init__(next)
+        self._stats = stats
+
+    async def execute_activity(self, input: ExecuteActivityInput) -> Any:
+        info = activity.info()
+        if info.started_time and info.current_attempt_scheduled_time:
+            self._stats.record_schedule_to_start(
+                (
+                    info.started_time - info.current_attempt_scheduled_time
+                ).total_seconds()
+            )
+        try:
+            result = await super().execute_activity(input)
+        except BaseException:
+            self._stats.count("activities_failed")
+            raise
+        self._stats.count("activities_completed")
+        return result
+
+
+class _StatsWorkflowInboundInterceptor(WorkflowInboundInterceptor):
+    # Set on the subclass returned by StatsInterceptor.workflow_interceptor_class
+    stats: WorkerStats
+
+    async def execute_workflow(self, input: ExecuteWorkflowInput) -> Any:
+        try:
+            result = await super().execute_workflow(input)
+        except BaseException:
+            if not workflow.unsafe.is_replaying():
+                self.stats.count("workflows_failed")
+            raise
+        if not workflow.unsafe.is_replaying():
+            self.stats.count("workflows_completed")
+        return result
+
+
+class StatsInterceptor(Interceptor):
+    """Worker interceptor that counts completed and failed activities and workflows in `stats`."""
+
+    def __init__(self, stats: WorkerStats) -> None:
+        self.stats = stats
+        # Workflow interceptors are instantiated by the worker, so bind the stats to a subclass
+        self._workflow_interceptor_class = type(
+            "_BoundStatsWorkflowInboundInterceptor",
+            (_StatsWorkflowInboundInterceptor,),
+            {"stats": stats},
+        )
+
+    def intercept_activity(
+        self, next: ActivityInboundInterceptor
+    ) -> ActivityInboundInterceptor:
+        return _StatsActivityInboundInterceptor(next, self.stats)
+
+    def workflow_interceptor_class(
+        self, input: WorkflowInterceptorClassInput
+    ) -> Optional[Type[WorkflowInboundInterceptor]]:
+        return self._workflow_interceptor_class
+
+
+async def report_stats(
+    stats: WorkerStats, status_queue: Any, interval: float = 1.0
+) -> None:
+    """Send a snapshot of `stats` to the supervisor's status queue every `interval` seconds until cancelled."""
+    while True:
+        try:
+            status_queue.put_nowait(stats.snapshot())
+        except queue.Full:
+            # The supervisor is behind, and the next report supersedes this one anyway
+            pass
+        await asyncio.sleep(interval)